@@ -6,7 +6,7 @@ import hmac
 import hashlib
 import logging
 from dataclasses import dataclass
-from typing import Any, Dict, Tuple, Optional
+from typing import Any, Dict, Tuple, Optional, Union
 from urllib.parse import urlparse, parse_qs
 
 import requests
@@ -77,6 +77,8 @@ class Config:
         )
 
 class ContentPipeline:
+    MAX_DOWNLOAD_BYTES = 25 * 1024 * 1024  # Guard for download_bytes
+
     def __init__(self, config: Config):
         self.cfg = config
         self._setup_apis()
@@ -259,7 +261,9 @@ class ContentPipeline:
             raise RuntimeError(f"No resultUrls found in Kie resultJson: {parsed}")
         return urls[0]
 
-    def download_bytes(self, url: str) -> Tuple[bytes, str]:
+    def download_bytes(self, url: str) -> Tuple[Union[bytes, bytearray], str]:
+        """Body and content type of a URL (or data: URL). Downloads come back as the
+        bytearray they were streamed into, without a final bytes() copy."""
         if url.startswith("data:"):
             try:
                 header, b64 = url.split(",", 1)
@@ -269,9 +273,15 @@ class ContentPipeline:
                 return data, mime or "application/octet-stream"
             except Exception as e:
                 raise RuntimeError(f"Failed to decode data URL: {e}")
-        r = requests.get(url, timeout=120)
-        self._http_raise(r)
-        return r.content, r.headers.get("Content-Type", "application/octet-stream")
+        # Stream in chunks into one buffer instead of letting requests hold a second copy
+        with requests.get(url, timeout=120, stream=True) as r:
+            self._http_raise(r)
+            data = bytearray()
+            for chunk in r.iter_content(chunk_size=64 * 1024):
+                data.extend(chunk)
+                if len(data) > self.MAX_DOWNLOAD_BYTES:
+                    raise RuntimeError(f"Download exceeds {self.MAX_DOWNLOAD_BYTES} bytes: {url}")
+            return data, r.headers.get("Content-Type", "application/octet-stream")
 
     def claude_linkedin_post(self, transcript: str) -> str:
         logger.info("Generating LinkedIn post with Claude...")
@@ -326,7 +336,8 @@ class ContentPipeline:
         except Exception as e:
             raise RuntimeError(f"Anthropic/Claude request failed: {e}")
 
-    def cloudinary_upload_image(self, image_bytes: bytes, public_id: str) -> Dict[str, Any]:
+    def cloudinary_upload_image(self, image: Any, public_id: str) -> Dict[str, Any]:
+        """Upload image bytes, or a remote http(s) URL that Cloudinary fetches itself."""
         logger.info("Uploading to Cloudinary...")
         timestamp = int(time.time())
         upload_url = f"https://api.cloudinary.com/v1_1/{self.cfg.cloudinary_cloud_name}/image/upload"
@@ -341,15 +352,19 @@ class ContentPipeline:
         }
         signature = cloudinary_signature(self.cfg.cloudinary_api_secret, sign_params)
 
-        files = {
-            "file": ("infographic.png", image_bytes, "image/png"),
-        }
         data = {
             "api_key": self.cfg.cloudinary_api_key,
             "timestamp": str(timestamp),
             "public_id": public_id,
             "signature": signature,
         }
+        files = None
+        if isinstance(image, str):
+            data["file"] = image  # Fetch upload: no download through this process
+        else:
+            files = {
+                "file": ("infographic.png", image, "image/png"),
+            }
 
         if self.cfg.cloudinary_api_key and str(self.cfg.cloudinary_api_key).lower().startswith("fake"):
             return {"secure_url": f"https://res.cloudinary.com/demo/{public_id}.png", "public_id": public_id}
@@ -366,14 +381,15 @@ class ContentPipeline:
         task_id = self.kie_create_task(infographic_brief)
         task_info = self.kie_poll_until_success(task_id)
         kie_image_url = self.kie_extract_image_url(task_info)
-        image_bytes, _ = self.download_bytes(kie_image_url)
+        # Remote images are fetched by Cloudinary directly; only data: URLs are decoded here
+        image = kie_image_url if kie_image_url.startswith("http") else self.download_bytes(kie_image_url)[0]
 
         linkedin_post = self.claude_linkedin_post(transcript)
         newsletter = self.claude_newsletter(transcript)
 
         vid = self.extract_youtube_video_id(self.cfg.youtube_url)
         public_id = f"yt_to_linkedin/{self.slugify(vid)}_{int(time.time())}"
-        cloudinary_resp = self.cloudinary_upload_image(image_bytes, public_id=public_id)
+        cloudinary_resp = self.cloudinary_upload_image(image, public_id=public_id)
 
         return {
             "input": {"youtube_url": self.cfg.youtube_url},
@@ -5,7 +5,7 @@ import os
 import re
 import json
 import hashlib
-import requests
+import hmac
 from datetime import datetime, timedelta
 
 # Ensure root directory is in path so we can import 'app'
@@ -16,7 +16,9 @@ from flask import Flask, render_template, request, jsonify
 # Import from our new app structure
 from app.config import Config
 from app.queue_manager import SimpleQueue, ClientManager, ExperimentTracker, DailyPostTracker
-from app.services import ContentPipeline
+from app.telegram import send_telegram, answer_callback_query
+# Pipeline, SDK and HTTP modules are imported inside the routes that use them,
+# so a cold start for /api/health or a Telegram /queue command skips them
 
 # Configuration
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -64,18 +66,20 @@ def generate_only():
     if not url: return jsonify({"error": "no url"}), 400
     cfg = Config()
     try:
+        from app.services import ContentPipeline
         pipeline = ContentPipeline(cfg, url)
         # We only want to generate content, not post it
         # Step 1: Content (Transcript or Tweet Text)
         content = pipeline.get_content()
+        digest = pipeline.build_digest(content)  # Chunk notes instead of the raw text for long transcripts
         # Step 2: Summary
-        summary = pipeline.generate_summary(content)
+        summary = pipeline.generate_summary(digest)
         # Step 3: Brief -> Image
         brief = pipeline.generate_brief(summary)
         raw_img = pipeline.generate_image_kie(brief)
         final_img = pipeline.upload_cloudinary(raw_img)
         # Step 4: Post Text
-        post_text = pipeline.generate_post_claude(content)
+        post_text = pipeline.generate_post_claude(digest)
         
         result = {
             "url": final_img, 
@@ -98,6 +102,7 @@ def post_custom():
     
     cfg = Config()
     try:
+        from app.services import ContentPipeline
         pipeline = ContentPipeline(cfg) # No URL needed for posting
         pipeline.post_blotato(text, image_url)
         return jsonify({"status": "success"})
@@ -113,12 +118,14 @@ def process_next():
     if not url: return jsonify({"status": "empty"})
     
     try:
+        from app.services import ContentPipeline
         pipeline = ContentPipeline(cfg, url)
         result = pipeline.run_all()
         q.mark_done(url)
         return jsonify({"status": "success", "result": result})
     except Exception as e:
         logger.error(f"Process failed: {e}")
+        q.nack(url, error=str(e))
         return jsonify({"status": "error", "message": str(e)}), 500
 
 @app.route('/api/auto_process', methods=['POST'])
@@ -134,6 +141,7 @@ def auto_process():
     if not url: return jsonify({"status": "idle"})
     
     try:
+        from app.services import ContentPipeline
         pipeline = ContentPipeline(cfg, url)
         result = pipeline.run_all()
         q.mark_done(url)
@@ -144,14 +152,35 @@ def auto_process():
             post_id=result.get("post_id", ""),
             variation=result.get("variation", "unknown"),
             url=url,
-            post_text=result.get("post_text", "")
+            post_text=result.get("post_text", ""),
+            propensity=result.get("propensity")
         )
         
         return jsonify({"status": "posted", "url": url, "post_id": result.get("post_id")})
     except Exception as e:
         logger.error(f"Auto process failed: {e}")
+        q.nack(url, error=str(e))
         return jsonify({"status": "failed", "error": str(e)}), 500
 
+@app.route('/api/kie/callback', methods=['POST'])
+def kie_callback():
+    """Kie.ai job completion callback - stores the result for waiting pipelines.
+    
+    Kie can't send headers, so KIE_CALLBACK_URL carries ?token=<KIE_CALLBACK_SECRET>.
+    Without a configured secret every callback is rejected (pipelines fall back to polling).
+    """
+    from app.kie import KieClient
+    
+    cfg = Config()
+    token = request.args.get('token') or ''
+    if not cfg.kie_callback_secret or not hmac.compare_digest(token, cfg.kie_callback_secret):
+        return jsonify({"error": "unauthorized"}), 401
+    
+    task_id = KieClient(cfg).store_callback(request.json or {})
+    if not task_id:
+        return jsonify({"error": "taskId missing"}), 400
+    return jsonify({"status": "stored", "task_id": task_id})
+
 # ============== EXPERIMENT TRACKING ==============
 
 @app.route('/api/experiments', methods=['GET'])
@@ -182,45 +211,6 @@ def mark_experiment_winner():
 
 # ============== TELEGRAM BOT ==============
 
-def send_telegram(chat_id: str, text: str, cfg: Config, reply_markup: dict = None, photo_url: str = None):
-    """Send a message (optionally with photo and keyboard) via Telegram bot."""
-    # If photo_url is provided and valid, try sending with photo
-    if photo_url and photo_url.strip() and photo_url.startswith('http'):
-        url = f"https://api.telegram.org/bot{cfg.telegram_bot_token}/sendPhoto"
-        payload = {
-            "chat_id": chat_id,
-            "photo": photo_url,
-            "caption": text[:1024],  # Telegram caption limit
-            "parse_mode": "HTML"
-        }
-        if reply_markup:
-            payload["reply_markup"] = reply_markup
-            
-        try:
-            r = requests.post(url, json=payload, timeout=10)
-            r.raise_for_status()
-            return  # Success
-        except Exception as e:
-            logger.warning(f"Telegram sendPhoto failed, falling back to text: {e}")
-            # Fall through to send as text message
-    
-    # Send as text message (fallback or no photo)
-    url = f"https://api.telegram.org/bot{cfg.telegram_bot_token}/sendMessage"
-    payload = {
-        "chat_id": chat_id, 
-        "text": text, 
-        "parse_mode": "HTML"
-    }
-    
-    if reply_markup:
-        payload["reply_markup"] = reply_markup
-        
-    try:
-        r = requests.post(url, json=payload, timeout=10)
-        r.raise_for_status()
-    except Exception as e:
-        logger.error(f"Telegram send failed: {e}")
-
 def extract_url(text: str) -> str:
     """Extract YouTube or Twitter URL from message text."""
     patterns = [
@@ -238,6 +228,16 @@ def extract_url(text: str) -> str:
 # Store active client per chat (in-memory, resets on deploy - fine for single admin)
 active_client = {}
 
+def option_win_rate_lines(stats: dict) -> list:
+    """"• dimension:option: rate (wins/experiments)" lines, best first.
+
+    The rate is the posterior mean win rate, Beta(1 + wins, 1 + losses), as used by the bandit.
+    """
+    def rate(c):
+        return (1 + c['wins']) / (2 + c['experiments'])
+    return [f"• {option}: {rate(c):.0%} ({c['wins']}/{c['experiments']})"
+            for option, c in sorted(stats.get('dimension_counts', {}).items(), key=lambda x: -rate(x[1]))]
+
 def handle_callback_query(callback, cfg: Config):
     """Handle approval/cancel, style buttons, and winner marking."""
     chat_id = str(callback.get('message', {}).get('chat', {}).get('id', ''))
@@ -246,8 +246,7 @@ def handle_callback_query(callback, cfg: Config):
     clients_mgr = ClientManager(cfg)
     
     # Answer callback to remove loading state in Telegram
-    requests.post(f"https://api.telegram.org/bot{cfg.telegram_bot_token}/answerCallbackQuery", 
-                  json={"callback_query_id": query_id})
+    answer_callback_query(query_id, cfg)
     
     # Handle winner marking (format: "winner:post_id")
     if data.startswith("winner:"):
@@ -256,7 +255,11 @@ def handle_callback_query(callback, cfg: Config):
         success = tracker.mark_winner(post_id)
         if success:
             stats = tracker.get_stats()
-            send_telegram(chat_id, f"🏆 <b>Marked as winner!</b>\n\nPost ID: <code>{post_id}</code>\n\n📊 Stats:\n• Total experiments: {stats.get('total_experiments', 0)}\n• Total winners: {stats.get('total_winners', 0)}\n• Weights: {json.dumps(stats.get('weights', {}), indent=2)}", cfg)
+            msg = f"🏆 <b>Marked as winner!</b>\n\nPost ID: <code>{post_id}</code>\n\n📊 Stats:\n• Total experiments (all time): {stats.get('total_experiments', 0)}, newest {stats.get('stored_experiments', 0)} kept\n• Total winners: {stats.get('total_winners', 0)}"
+            option_lines = option_win_rate_lines(stats)
+            if option_lines:
+                msg += "\n\n<b>Top option win rates (estimated):</b>\n" + "\n".join(option_lines[:5])
+            send_telegram(chat_id, msg, cfg)
         else:
             send_telegram(chat_id, f"❌ Could not find post {post_id}", cfg)
         return jsonify({"ok": True})
@@ -299,6 +302,7 @@ def handle_callback_query(callback, cfg: Config):
         send_telegram(chat_id, f"🚀 Posting to LinkedIn for <b>{client_name}</b>...", cfg)
         
         try:
+            from app.services import ContentPipeline
             pipeline = ContentPipeline(cfg, url, blotato_account_id=blotato_id)
             pipeline.post_blotato(post_text, image_url)
             q.mark_done(url, client_name)
@@ -319,9 +323,12 @@ def clear_locks():
     if not q.redis:
         return jsonify({"error": "no redis"}), 500
     
+    from app.jobs import JobQueue
+    jobs = JobQueue(cfg)
     cleared = 0
     all_clients = ['drew'] + list(clients.get_all().keys())
     for name in all_clients:
+        jobs.cancel_pending(name)  # Queued /go jobs would otherwise still run
         if q.redis.delete(f"processing_lock:{name}"):
             cleared += 1
         if q.redis.delete(f"test_lock:{name}"):
@@ -397,6 +404,8 @@ def telegram_webhook():
             "/go - Process next URL now\n"
             "/stop - Force quit all processing\n"
             "/history - Recent posts\n"
+            "/dead - Items that failed too many times\n"
+            "/retry_dead - Requeue dead-lettered items\n"
             "/stats - View experiment statistics\n"
             "/remove &lt;number&gt; - Remove URL from queue\n"
             "/clear - Clear current queue", cfg)
@@ -405,25 +414,18 @@ def telegram_webhook():
     # Command: /stats - Show experiment statistics
     if text == '/stats':
         stats = tracker.get_stats()
-        weights = stats.get('weights', {})
-        variation_counts = stats.get('variation_counts', {})
-        winner_counts = stats.get('winner_counts', {})
-        
-        weight_lines = []
-        for var, w in sorted(weights.items(), key=lambda x: -x[1]):
-            wins = winner_counts.get(var.split(':')[-1] if ':' in var else var, 0)
-            total = variation_counts.get(var.split(':')[-1] if ':' in var else var, 0)
-            weight_lines.append(f"• {var}: {w:.1f}x ({wins}/{total})")
+        option_lines = option_win_rate_lines(stats)
         
         msg = f"📊 <b>Experiment Statistics</b>\n\n"
-        msg += f"🧪 Total experiments: {stats.get('total_experiments', 0)}\n"
+        msg += f"🧪 Total experiments (all time): {stats.get('total_experiments', 0)}\n"
+        msg += f"🗂 Stored (newest kept): {stats.get('stored_experiments', 0)}\n"
         msg += f"🏆 Total winners: {stats.get('total_winners', 0)}\n\n"
         
-        if weight_lines:
-            msg += "<b>Variation Weights:</b>\n"
-            msg += "\n".join(weight_lines[:15])  # Top 15
+        if option_lines:
+            msg += "<b>Option win rates (estimated):</b>\n"
+            msg += "\n".join(option_lines[:15])  # Top 15
         else:
-            msg += "<i>No experiments yet. Weights will appear after you mark winners!</i>"
+            msg += "<i>No experiments yet. Win rates will appear after you mark winners!</i>"
         
         send_telegram(chat_id, msg, cfg)
         return jsonify({"ok": True})
@@ -431,11 +433,15 @@ def telegram_webhook():
     # Command: /stop - Force quit all processing
     if text == '/stop':
         if q.redis:
+            from app.jobs import JobQueue
+            jobs = JobQueue(cfg)
             all_clients = ['drew'] + list(clients.get_all().keys())
             cleared_locks = 0
             cleared_previews = 0
             
             for client_name in all_clients:
+                # Skip queued /go jobs
+                jobs.cancel_pending(client_name)
                 # Clear processing locks
                 if q.redis.delete(f"processing_lock:{client_name}"):
                     cleared_locks += 1
@@ -459,7 +465,8 @@ def telegram_webhook():
             send_telegram(chat_id, 
                 f"🛑 <b>FULL STOP!</b>\n\n"
                 f"✅ Cleared {cleared_locks} lock(s)\n"
-                f"✅ Cleared {cleared_previews} preview(s)\n\n"
+                f"✅ Cleared {cleared_previews} preview(s)\n"
+                f"✅ Cancelled queued /go jobs\n\n"
                 f"Ready for new commands.", cfg)
         else:
             send_telegram(chat_id, "❌ Redis not available.", cfg)
@@ -592,6 +599,29 @@ def telegram_webhook():
             send_telegram(chat_id, msg, cfg)
         return jsonify({"ok": True})
     
+    # Command: /dead - Dead-letter list (items that failed MAX_ATTEMPTS times)
+    if text == '/dead':
+        current = active_client.get(chat_id, 'drew')
+        dead = q.get_dead(current)
+        if not dead:
+            send_telegram(chat_id, f"✅ No dead-lettered items for <b>{current}</b>", cfg)
+        else:
+            msg = f"☠️ <b>Dead-letter list for {current}:</b>\n\n"
+            for item in dead[:10]:
+                url = item.get('url', 'Unknown')
+                short_url = url[:40] + "..." if len(url) > 40 else url
+                msg += f"• {short_url}\n  {item.get('attempts', 0)} attempts: {str(item.get('error', ''))[:80]}\n"
+            msg += "\n💡 /retry_dead to requeue all"
+            send_telegram(chat_id, msg, cfg)
+        return jsonify({"ok": True})
+    
+    # Command: /retry_dead - Requeue dead-lettered items
+    if text == '/retry_dead':
+        current = active_client.get(chat_id, 'drew')
+        count = q.retry_dead(current)
+        send_telegram(chat_id, f"🔁 Requeued {count} item(s) for <b>{current}</b>", cfg)
+        return jsonify({"ok": True})
+    
     # Command: /history - Recent posts
     if text == '/history':
         current = active_client.get(chat_id, 'drew')
@@ -617,8 +647,8 @@ def telegram_webhook():
             if num < 1 or num > len(urls):
                 send_telegram(chat_id, f"❌ Invalid number. Queue has {len(urls)} items.", cfg)
             else:
-                removed = urls.pop(num - 1)
-                q.set_urls(urls, current)
+                removed = urls[num - 1]
+                q.remove_url(removed, current)
                 send_telegram(chat_id, f"🗑 Removed from queue:\n{removed}", cfg)
         except ValueError:
             send_telegram(chat_id, "Usage: /remove <number>", cfg)
@@ -627,7 +657,7 @@ def telegram_webhook():
     # Command: /clear - Clear queue
     if text == '/clear':
         current = active_client.get(chat_id, 'drew')
-        q.set_urls([], current)
+        q.clear(current)
         send_telegram(chat_id, f"🗑 Cleared queue for <b>{current}</b>", cfg)
         return jsonify({"ok": True})
     
@@ -666,6 +696,7 @@ def telegram_webhook():
         send_telegram(chat_id, f"🧪 <b>TEST MODE</b> for {current}...\n\n🔗 {url}\n\n⏳ Processing... (60-120s)", cfg)
         
         try:
+            from app.services import ContentPipeline
             pipeline = ContentPipeline(cfg, url, blotato_account_id=blotato_account_id, style=style)
             result = pipeline.run_all(skip_post=True)
             
@@ -692,80 +723,50 @@ def telegram_webhook():
         return jsonify({"ok": True})
     
     # Command: /process or /go - Process next URL (always preview first)
+    # With a worker to kick (JOBS_TRIGGER_URL), generation runs as a background job and the
+    # webhook only enqueues it; otherwise it runs in this request
     if text == '/process' or text == '/go':
+        from app.jobs import JobQueue, processing_lock_key, run_job, kick_worker
         current = active_client.get(chat_id, 'drew')
+        jobs = JobQueue(cfg)
+        queued = bool(jobs.redis and cfg.jobs_trigger_url)
         
-        # Prevent duplicate processing with a lock
-        lock_key = f"processing_lock:{current}"
+        # Prevent duplicate processing with a lock (released when the job finishes)
+        lock_key = processing_lock_key(current)
         try:
             if q.redis:
                 existing_lock = q.redis.get(lock_key)
                 if existing_lock:
                     send_telegram(chat_id, f"⏳ Already processing for <b>{current}</b>. Please wait or /stop", cfg)
                     return jsonify({"ok": True})
-                q.redis.setex(lock_key, 300, "1")  # 5 min lock
+                # A queued job may wait for the workflow sweep; the job shortens this once it starts
+                q.redis.setex(lock_key, cfg.jobs_lock_seconds if queued else cfg.jobs_time_budget, "1")
         except: pass
         
-        url = q.pop_next(current)
-        if not url:
+        if not q.count(current):
             try:
                 if q.redis: q.redis.delete(lock_key)
             except: pass
             send_telegram(chat_id, f"📭 Queue for <b>{current}</b> is empty!", cfg)
             return jsonify({"ok": True})
         
-        client_info = clients.get_client(current) or {}
-        blotato_account_id = client_info.get('blotato_account_id', cfg.blotato_account_id)
-        style = client_info.get('style', 'soulprint')
-        
-        remaining = len(q.get_urls(current))
-        send_telegram(chat_id, f"👀 Generating for <b>{current}</b>...\n\n🔗 {url}\n📝 {remaining} left\n\n⏳ Processing... (30-60s)", cfg)
+        job = {"type": "preview", "client": current, "chat_id": chat_id}
+        if not queued:
+            # No worker to hand off to (no shared KV or no JOBS_TRIGGER_URL) - run in this request
+            run_job(cfg, job)
+            return jsonify({"ok": True})
         
         try:
-            # Get experiment weights to influence variation selection
-            tracker = ExperimentTracker(cfg)
-            weights = tracker.get_weights()
-            
-            pipeline = ContentPipeline(cfg, url, blotato_account_id=blotato_account_id, style=style)
-            result = pipeline.run_all(skip_post=True)
-            
-            # Log experiment
-            post_id = result.get("post_id", "")
-            tracker.log_experiment(
-                post_id=post_id,
-                variation=result.get("variation", "unknown"),
-                url=url,
-                post_text=result.get("post_text", "")
-            )
-            
-            url_hash = hashlib.md5(url.encode()).hexdigest()[:10]
-            preview_key = f"preview:{current}:{url_hash}"
-            if q.redis:
-                q.redis.setex(preview_key, 3600 * 24, json.dumps(result))
-            
-                # Add winner button with post_id
-                kb = {
-                    "inline_keyboard": [
-                        [
-                            {"text": "✅ Approve & Post", "callback_data": f"post:{current}:{url_hash}"},
-                            {"text": "❌ Cancel", "callback_data": f"cancel:{current}:{url_hash}"}
-                        ],
-                        [
-                            {"text": "🏆 Mark as Winner", "callback_data": f"winner:{post_id}"}
-                        ]
-                    ]
-                }
-                variation_info = result.get('variation', 'unknown')
-                preview_text = f"📝 <b>PREVIEW for {current}</b>\n\n🧪 <i>Variation: {variation_info}</i>\n\n{result['post_text'][:3400]}"
-                send_telegram(chat_id, preview_text, cfg, reply_markup=kb, photo_url=result.get('image_url'))
-            else:
-                send_telegram(chat_id, "❌ Redis unavailable, could not store preview.", cfg)
+            jobs.enqueue("preview", client=current, chat_id=chat_id)
         except Exception as e:
-            send_telegram(chat_id, f"❌ Failed: {str(e)[:400]}", cfg)
-        finally:
             try:
-                if q.redis: q.redis.delete(lock_key)
+                q.redis.delete(lock_key)
             except: pass
+            send_telegram(chat_id, f"❌ Could not queue job: {str(e)[:200]}", cfg)
+            return jsonify({"ok": True})
+        
+        send_telegram(chat_id, f"🕐 Queued generation for <b>{current}</b>. I'll send the preview when it's ready.", cfg)
+        kick_worker(cfg)
         return jsonify({"ok": True})
     
     # Command: /clients
@@ -796,8 +797,7 @@ def telegram_webhook():
     # Command: /status
     if text == '/status':
         current = active_client.get(chat_id, 'drew')
-        urls = q.get_urls(current)
-        send_telegram(chat_id, f"📊 <b>Status for {current}:</b>\n• Queue: {len(urls)} URLs pending", cfg)
+        send_telegram(chat_id, f"📊 <b>Status for {current}:</b>\n• Queue: {q.count(current)} URLs pending", cfg)
         return jsonify({"ok": True})
     
     # Command: /add <name> <blotato_id>
@@ -830,7 +830,7 @@ def telegram_webhook():
     if url:
         current = active_client.get(chat_id, 'drew')
         q.add_url(url, current)
-        queue_size = len(q.get_urls(current))
+        queue_size = q.count(current)
         send_telegram(chat_id, f"✅ Added to <b>{current}</b> queue!\n\n📝 Queue size: {queue_size}", cfg)
         return jsonify({"ok": True})
     
@@ -838,6 +838,20 @@ def telegram_webhook():
     send_telegram(chat_id, "🤔 Send me a YouTube or Twitter/X link, or use /start for help.", cfg)
     return jsonify({"ok": True})
 
+@app.route('/api/run_jobs', methods=['POST', 'GET'])
+def run_jobs():
+    """Worker for queued Telegram jobs (kicked by /go, swept by the run-jobs workflow)."""
+    from app.jobs import run_pending_jobs
+    
+    auth = request.headers.get('Authorization')
+    cfg = Config()
+    if cfg.cron_secret and auth != f"Bearer {cfg.cron_secret}":
+        return jsonify({"error": "unauthorized"}), 401
+    
+    results = run_pending_jobs(cfg)
+    return jsonify({"status": "idle" if not results else "processed", "results": results})
+
+
 @app.route('/api/auto_process_all', methods=['POST', 'GET'])
 def auto_process_all():
     """Process up to 5 URLs from queue and schedule them throughout the day.
@@ -845,6 +859,9 @@ def auto_process_all():
     Runs once daily at 1 AM Chicago. Schedules posts for 1am, 6am, 11am, 4pm, 10pm.
     Uses Blotato's scheduledTime feature to spread posts throughout the day.
     """
+    from app.services import ContentPipeline
+    from app.concurrency import run_batch
+    
     cfg = Config()
     
     # Chicago timezone setup
@@ -861,7 +878,7 @@ def auto_process_all():
         return jsonify({"status": "skipped", "reason": "weekend", "message": "No posting on weekends"})
     
     # Posting hours in Chicago: 1am, 6am, 11am, 4pm (16), 10pm (22)
-    posting_hours = [1, 6, 11, 16, 22]
+    posting_hours = DailyPostTracker.POSTING_HOURS
     
     clients = ClientManager(cfg)
     q = SimpleQueue(cfg)
@@ -890,9 +907,7 @@ def auto_process_all():
     if not items_to_process:
         return jsonify({"status": "idle", "message": "No URLs in any queue"})
     
-    results = []
-    
-    for i, item in enumerate(items_to_process):
+    def process_item(i: int, item: dict) -> dict:
         url = item["url"]
         client_name = item["client"]
         
@@ -923,17 +938,22 @@ def auto_process_all():
                 preview_key = f"preview:{client_name}:{url_hash}"
                 if q.redis:
                     q.redis.setex(preview_key, 3600 * 24, json.dumps(result))
-                results.append({"client": client_name, "url": url, "status": "previewed", "scheduled": schedule_display})
+                q.ack(url, client_name)
+                return {"client": client_name, "url": url, "status": "previewed", "scheduled": schedule_display}
             else:
                 result = pipeline.run_all(skip_post=True)  # Generate content but don't post yet
                 # Post with scheduled time
                 pipeline.post_blotato(result["post_text"], result["image_url"], scheduled_time=scheduled_time_str)
                 q.mark_done(url, client_name)
-                results.append({"client": client_name, "url": url, "status": "scheduled", "scheduled": schedule_display})
+                return {"client": client_name, "url": url, "status": "scheduled", "scheduled": schedule_display}
                 
         except Exception as e:
             logger.error(f"Auto process failed for {client_name}: {e}")
-            results.append({"client": client_name, "url": url, "status": "failed", "error": str(e)})
+            q.nack(url, client_name, str(e))
+            return {"client": client_name, "url": url, "status": "failed", "error": str(e)}
+    
+    # Items run in parallel; provider calls inside each pipeline are capped per provider
+    results = run_batch(items_to_process, process_item, cfg.batch_concurrency)
     
     # Send summary Telegram notification
     if cfg.telegram_bot_token and cfg.telegram_admin_chat_id:
@@ -1129,7 +1149,21 @@ def health_check():
     return jsonify({
         'status': 'healthy',
         'timestamp': datetime.utcnow().isoformat() + 'Z',
-        'version': '2.1.0'
+        'version': '2.1.0',
+        'client_cache': ClientManager.cache_stats()
+    })
+
+
+@app.route('/api/mirrors', methods=['GET'])
+def mirror_scoreboard():
+    """Health scoreboard for Piped/Invidious/Nitter mirrors."""
+    from app.mirrors import MirrorRegistry
+    
+    registry = MirrorRegistry(Config())
+    return jsonify({
+        'mirrors': registry.scoreboard(),
+        'failure_threshold': registry.FAILURE_THRESHOLD,
+        'open_seconds': registry.OPEN_SECONDS
     })
 
 
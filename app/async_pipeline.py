@@ -0,0 +1,219 @@
+"""Async Content Pipeline - ContentPipeline stages as coroutines.
+
+Built on httpx.AsyncClient and the async Gemini/Anthropic SDK clients, so one
+event loop can drive many runs at once (asyncio.gather over run_all_async)
+without a thread per in-flight call. Prompts, request building, the stage
+graph, checkpointing and run_all come from ContentPipeline; this class only
+swaps in native-async stage methods (the *_async ones) via _stage_fns/_post.
+The inherited sync stage methods keep working unchanged.
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+import httpx
+
+from app.config import Config
+from app.services import ContentPipeline, BLOTATO_POSTS_URL, new_gemini_client, new_anthropic_client
+from app.concurrency import async_provider_slot
+from app.kie import KieClient
+from app.bandit import ThompsonSampler
+from app.chunking import MAX_DIGEST_ROUNDS, join_notes
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncContentPipeline(ContentPipeline):
+    """ContentPipeline whose run drives coroutine stages instead of worker threads.
+
+    Pass a shared httpx.AsyncClient to pool connections across runs; otherwise
+    each run opens its own and closes it when done. run_all() stays the
+    inherited sync wrapper for callers outside an event loop.
+    """
+
+    def __init__(self, config: Config, url: str = "", blotato_account_id: str = None,
+                 style: str = "default", http: Optional[httpx.AsyncClient] = None):
+        super().__init__(config, url, blotato_account_id, style)
+        self._http = http
+        self._owns_http = http is None
+        self._async_clients: Dict[str, Any] = {}
+
+    def _async_client(self, provider: str, api_key: str, factory: Callable[[str], Any]) -> Any:
+        """Per-pipeline SDK client, built on first use.
+        
+        Not shared process-wide like the sync clients: their async connection
+        pools bind to the event loop that first uses them.
+        """
+        if not api_key:
+            return None
+        if provider not in self._async_clients:
+            try:
+                self._async_clients[provider] = factory(api_key)
+            except Exception as e:
+                logger.error(f"Failed to init async {provider} client: {e}")
+                self._async_clients[provider] = None
+        return self._async_clients[provider]
+
+    @property
+    def async_gemini_client(self):
+        return self._async_client("gemini", self.cfg.gemini_api_key, new_gemini_client)
+
+    @property
+    def async_anthropic_client(self):
+        return self._async_client(
+            "anthropic", self.cfg.anthropic_api_key, lambda key: new_anthropic_client(key, use_async=True)
+        )
+
+    @property
+    def http(self) -> httpx.AsyncClient:
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                timeout=self.cfg.http_timeout,
+                limits=httpx.Limits(max_keepalive_connections=self.cfg.http_pool_size),
+            )
+        return self._http
+
+    async def aclose(self):
+        """Close the HTTP client if this pipeline created it, and the async SDK clients."""
+        if self._owns_http and self._http is not None:
+            await self._http.aclose()
+            self._http = None
+        clients, self._async_clients = self._async_clients, {}
+        anthropic_client = clients.get("anthropic")
+        if anthropic_client is not None:
+            await anthropic_client.close()
+        gemini_client = clients.get("gemini")
+        if gemini_client is not None:
+            await gemini_client.aio.aclose()
+
+    def _stage_fns(self) -> Dict[str, Callable[[Dict[str, Any]], Awaitable[Any]]]:
+        async def post_text(o: Dict[str, Any]) -> Dict[str, Any]:
+            sampler = await asyncio.to_thread(self.variation_sampler)
+            text = await self.generate_post_claude_async(o["digest"], sampler)
+            return {"text": text, "variation": self.experiment_variation,
+                    "propensity": self.experiment_propensity}
+
+        return {
+            "content": lambda o: self.get_content_async(),
+            "digest": lambda o: self.build_digest_async(o["content"]),
+            "summary": lambda o: self.generate_summary_async(o["digest"]),
+            "brief": lambda o: self.generate_brief_async(o["summary"]),
+            "image": lambda o: self.generate_image_kie_async(o["brief"]),
+            "upload": lambda o: self.upload_cloudinary_async(o["image"]),
+            "post_text": post_text,
+        }
+
+    async def _post(self, text: str, image_url: str):
+        return await self.post_blotato_async(text, image_url)
+
+    async def get_content_async(self) -> str:
+        """Transcript/tweet text (cache first).
+
+        The transcript backends (youtube-transcript-api and the mirror fallbacks)
+        are blocking, so the race runs on a worker thread.
+        """
+        return await asyncio.to_thread(self.get_content)
+
+    async def _gemini_async(self, prompt: str, label: str) -> str:
+        if not self.async_gemini_client:
+            raise RuntimeError("Gemini API key not configured or SDK missing")
+        try:
+            async with async_provider_slot(self.cfg, "gemini"):
+                response = await self.async_gemini_client.aio.models.generate_content(
+                    model=self.cfg.gemini_model,
+                    contents=prompt
+                )
+            return response.text
+        except Exception as e:
+            logger.error(f"Gemini {label} failed: {e}")
+            raise RuntimeError(f"Gemini {label} generation failed: {e}")
+
+    async def _chunk_notes_async(self, prompt: str) -> str:
+        """Notes for one chunk, from the chunk cache when this exact prompt was summarized before."""
+        key = self.chunk_cache.key_for(self.cfg.gemini_model, prompt)
+        notes = await asyncio.to_thread(self.chunk_cache.get_key, key)
+        if not notes:
+            notes = await self._gemini_async(prompt, "chunk summary")
+            await asyncio.to_thread(self.chunk_cache.put_key, key, notes)
+        return notes
+
+    async def build_digest_async(self, content: str) -> str:
+        """Bounded content for Gemini and Claude; long transcripts become chunk notes (gathered concurrently)."""
+        text = content
+        for _ in range(MAX_DIGEST_ROUNDS):
+            if len(text) <= self.cfg.digest_max_chars:
+                return text
+            prompts = self._chunk_prompts(text)
+            logger.info(f"Digesting {len(text)} chars in {len(prompts)} chunks")
+            text = join_notes(await asyncio.gather(*(self._chunk_notes_async(p) for p in prompts)))
+        return text[:self.cfg.digest_max_chars]
+
+    async def generate_summary_async(self, content: str) -> str:
+        """Uses Gemini to summarize the content."""
+        return await self._gemini_async(self._summary_prompt(content), "summary")
+
+    async def generate_brief_async(self, summary: str) -> str:
+        """Uses Gemini to create an infographic brief."""
+        return await self._gemini_async(self._brief_prompt(summary), "brief")
+
+    async def generate_image_kie_async(self, brief: str) -> str:
+        """Generates an image using Kie.ai (submit, then adaptive polling without a held thread)."""
+        if not self.cfg.kie_api_key:
+            raise RuntimeError("Kie API key not configured")
+
+        kie = KieClient(self.cfg)
+        async with async_provider_slot(self.cfg, "kie"):
+            task_id = await kie.submit_async(self._kie_prompt(brief), self.http)
+            return await kie.wait_async(task_id, self.http)
+
+    async def generate_post_claude_async(self, content: str, sampler: ThompsonSampler = None) -> str:
+        """Generates a LinkedIn post using Claude with experimental variations."""
+        if not self.async_anthropic_client:
+            raise RuntimeError("Anthropic API key not configured or SDK missing")
+
+        prompt = self._post_prompt(content, sampler)
+        try:
+            async with async_provider_slot(self.cfg, "anthropic"):
+                msg = await self.async_anthropic_client.messages.create(
+                    model=self.cfg.claude_model,
+                    max_tokens=1500,
+                    messages=[{"role": "user", "content": prompt}]
+                )
+            return self._post_text_from_message(msg)
+        except Exception as e:
+            logger.error(f"Claude post generation failed: {e}")
+            raise RuntimeError(f"Claude generation failed: {e}")
+
+    async def upload_cloudinary_async(self, image_url: str) -> str:
+        """Uploads an image URL to Cloudinary (fetched remotely) and returns the secure URL."""
+        if not self.cfg.cloudinary_cloud_name:
+            return image_url # Fallback if not configured
+
+        try:
+            upload_url, data, public_id = self._cloudinary_upload_request(image_url)
+            async with async_provider_slot(self.cfg, "cloudinary"):
+                res = await self.http.post(upload_url, data=data, timeout=60)
+            res.raise_for_status()
+            return self._cloudinary_final_url(res.json().get("secure_url"), public_id)
+        except Exception as e:
+            logger.error(f"Cloudinary upload failed: {e}")
+            return image_url # Return original on failure
+
+    async def post_blotato_async(self, text: str, image_url: str, scheduled_time: str = None):
+        """Posts to LinkedIn via Blotato API."""
+        headers, payload = self._blotato_request(text, image_url, scheduled_time)
+        try:
+            async with async_provider_slot(self.cfg, "blotato"):
+                r = await self.http.post(BLOTATO_POSTS_URL, headers=headers, json=payload, timeout=30)
+            r.raise_for_status()
+            logger.info("Successfully posted to LinkedIn via Blotato")
+            return r.json()
+        except httpx.HTTPStatusError as e:
+            # Log the response body for debugging 422 errors
+            error_detail = f" - Response: {e.response.text}"
+            logger.error(f"Blotato post failed: {e}{error_detail}")
+            raise RuntimeError(f"Blotato post failed: {e}{error_detail}")
+        except Exception as e:
+            logger.error(f"Blotato post failed: {e}")
+            raise RuntimeError(f"Blotato post failed: {e}")
@@ -0,0 +1,145 @@
+"""Variation Bandit - Thompson sampling over post style variations.
+
+Each variation dimension (hook, structure, closer, cta) is an independent
+bandit. Every option has a Beta(1 + wins, 1 + experiments - wins) posterior
+built from ExperimentTracker's exp/win counters, so the posteriors need nothing new in
+KV. Selection draws one sample per option and keeps the best: O(options) per
+dimension, no tuning, unexplored options still get tried and proven winners
+get picked more often.
+
+Each pick's selection probability (propensity) is logged with the experiment,
+which also marks the record as bandit-selected for offline replay (app.simulator).
+It is a Monte Carlo estimate (PROPENSITY_DRAWS rounds of one draw per option),
+computed once per posterior snapshot and cached, since the counters only move
+when an experiment is logged or a winner marked.
+
+Benchmark against the other policies on synthetic win rates (shorthand for
+`python -m app.simulator synthetic`, so there is one world model and loop):
+
+    python -m app.bandit --rounds 1000 --runs 20
+"""
+
+import sys
+import random
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.queue_manager import ExperimentTracker
+
+DIMENSIONS = ExperimentTracker.DIMENSIONS
+PROPENSITY_DRAWS = 200  # Monte Carlo rounds per posterior snapshot (std error <= 0.035)
+_PROPENSITY_CACHE_SIZE = 256
+
+# "dimension:option" -> (experiments, wins)
+OptionCounts = Dict[str, Tuple[int, int]]
+
+
+class ThompsonSampler:
+    """Beta-Bernoulli Thompson sampling, one posterior per dimension option."""
+
+    name = "thompson"
+
+    def __init__(self, counts: OptionCounts = None, rng: random.Random = None):
+        self.counts: OptionCounts = dict(counts or {})
+        self.rng = rng or random
+
+    # (alpha, beta) per option -> selection probability per option, shared by every sampler
+    _propensities: Dict[Tuple[Tuple[int, int], ...], List[float]] = {}
+
+    @classmethod
+    def from_tracker(cls, tracker: ExperimentTracker, rng: random.Random = None) -> "ThompsonSampler":
+        """Sampler over the tracker's running counters (flat priors if KV is unavailable)."""
+        stats = tracker.get_stats()
+        counts = {
+            option: (entry.get("experiments", 0), entry.get("wins", 0))
+            for option, entry in stats.get("dimension_counts", {}).items()
+        }
+        return cls(counts, rng)
+
+    def posterior(self, dimension: str, option: str) -> Tuple[int, int]:
+        """(alpha, beta) of the option's win-rate posterior."""
+        experiments, wins = self.counts.get(f"{dimension}:{option}", (0, 0))
+        return 1 + wins, 1 + max(experiments - wins, 0)
+
+    def choose(self, dimension: str, options: Iterable[str]) -> str:
+        best, best_draw = None, -1.0
+        for option in options:
+            draw = self.rng.betavariate(*self.posterior(dimension, option))
+            if draw > best_draw:
+                best, best_draw = option, draw
+        return best
+
+    def propensity(self, dimension: str, options: Iterable[str], chosen: str,
+                   draws: int = PROPENSITY_DRAWS) -> float:
+        """Estimated probability that choose() picks `chosen` (never 0, so it can be inverted).
+
+        All options' estimates come from one Monte Carlo run per posterior
+        snapshot; later picks under the same counters are a dict lookup.
+        """
+        options = list(options)
+        params = tuple(self.posterior(dimension, option) for option in options)
+        estimates = self._propensities.get(params)
+        if estimates is None:
+            hits = [0] * len(options)
+            for _ in range(draws):
+                samples = [self.rng.betavariate(alpha, beta) for alpha, beta in params]
+                hits[samples.index(max(samples))] += 1
+            estimates = [max(hit, 1) / draws for hit in hits]
+            if len(self._propensities) >= _PROPENSITY_CACHE_SIZE:
+                self._propensities.clear()
+            self._propensities[params] = estimates
+        return estimates[options.index(chosen)]
+
+    def update(self, dimension: str, option: str, won: bool):
+        key = f"{dimension}:{option}"
+        experiments, wins = self.counts.get(key, (0, 0))
+        self.counts[key] = (experiments + 1, wins + int(won))
+
+
+class UniformPolicy:
+    """Selection as it behaved before the bandit: weights never matched, so every pick was uniform."""
+
+    name = "uniform"
+
+    def __init__(self, rng: random.Random = None):
+        self.rng = rng or random
+
+    def choose(self, dimension: str, options: Iterable[str]) -> str:
+        return self.rng.choice(list(options))
+
+    def update(self, dimension: str, option: str, won: bool):
+        pass
+
+
+class WeightedPolicy:
+    """The old +0.5-per-win weighting (capped at 5x), as if its keys had matched."""
+
+    name = "weighted"
+
+    def __init__(self, rng: random.Random = None):
+        self.rng = rng or random
+        self.weights: Dict[str, float] = {}
+
+    def choose(self, dimension: str, options: Iterable[str]) -> str:
+        options = list(options)
+        return self.rng.choices(options, [self.weights.get(f"{dimension}:{o}", 1.0) for o in options])[0]
+
+    def update(self, dimension: str, option: str, won: bool):
+        if won:
+            key = f"{dimension}:{option}"
+            self.weights[key] = min(self.weights.get(key, 1.0) + 0.5, 5.0)
+
+
+def variation_options() -> Dict[str, List[str]]:
+    """Option names per dimension, from the prompt variation tables."""
+    from app.services import HOOK_VARIATIONS, STRUCTURE_VARIATIONS, CLOSER_VARIATIONS, CTA_VARIATIONS
+    tables = (HOOK_VARIATIONS, STRUCTURE_VARIATIONS, CLOSER_VARIATIONS, CTA_VARIATIONS)
+    return {dim: list(table) for dim, table in zip(DIMENSIONS, tables)}
+
+
+def main(argv: Optional[List[str]] = None):
+    from app.simulator import main as simulator_main  # Deferred: app.simulator imports this module
+    simulator_main(["synthetic", *(sys.argv[1:] if argv is None else argv)])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Chunking - Split long transcripts for map-reduce summarization.
+
+Transcripts arrive as one space-joined string, often without punctuation
+(auto captions), so chunks break at sentence ends when there are any and at
+word boundaries otherwise. Chunk notes are joined with part headers so the
+reduce step (and Claude) can tell they are notes, in order, not the source.
+"""
+
+import re
+from typing import List
+
+MAX_DIGEST_ROUNDS = 3  # Map passes before the digest is hard-truncated to its bound
+CHARS_PER_WORD = 6  # Rough English average incl. space, to turn a char budget into a word limit
+MIN_NOTE_WORDS = 80
+NOTE_HEADER_CHARS = 40  # "[Notes, part i of n]" plus separators
+MAX_MAP_WORKERS = 8  # Threads per digest; Gemini concurrency itself is capped by provider_slot
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def _pieces(text: str, max_chars: int) -> List[str]:
+    """Sentences (or words, for unpunctuated text), none longer than max_chars."""
+    pieces = []
+    for sentence in _SENTENCE_END.split(text.strip()):
+        if len(sentence) <= max_chars:
+            pieces.append(sentence)
+            continue
+        words, current = sentence.split(), ""
+        for word in words:
+            if current and len(current) + 1 + len(word) > max_chars:
+                pieces.append(current)
+                current = ""
+            current = f"{current} {word}" if current else word[:max_chars]
+        if current:
+            pieces.append(current)
+    return pieces
+
+
+def split_into_chunks(text: str, chunk_chars: int) -> List[str]:
+    """Greedily pack sentences into chunks of at most chunk_chars."""
+    chunks, current = [], ""
+    for piece in _pieces(text, chunk_chars):
+        if current and len(current) + 1 + len(piece) > chunk_chars:
+            chunks.append(current)
+            current = ""
+        current = f"{current} {piece}" if current else piece
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def note_word_budget(max_chars: int, parts: int) -> int:
+    """Word limit per chunk note so the joined notes fit in max_chars."""
+    return max(MIN_NOTE_WORDS, (max_chars // max(parts, 1) - NOTE_HEADER_CHARS) // CHARS_PER_WORD)
+
+
+def join_notes(notes: List[str]) -> str:
+    total = len(notes)
+    return "\n\n".join(f"[Notes, part {i} of {total}]\n{note.strip()}" for i, note in enumerate(notes, 1))
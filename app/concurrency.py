@@ -0,0 +1,85 @@
+"""Concurrency helpers - bounded batch execution and per-provider call limits."""
+
+import asyncio
+import logging
+import threading
+import weakref
+from contextlib import contextmanager, asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, TypeVar
+
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+# Process-wide semaphores, so limits hold across every pipeline in a batch
+_provider_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+_lock = threading.Lock()
+
+# asyncio semaphores are bound to one event loop: {loop: {provider: Semaphore}}
+_async_semaphores: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+
+
+def parse_provider_limits(spec: str) -> Dict[str, int]:
+    """Parse 'gemini=3,anthropic=3' into {'gemini': 3, 'anthropic': 3}."""
+    limits = {}
+    for part in (spec or "").split(","):
+        name, _, value = part.partition("=")
+        name = name.strip().lower()
+        if name and value.strip().isdigit() and int(value) > 0:
+            limits[name] = int(value)
+    return limits
+
+
+@contextmanager
+def provider_slot(config: Config, provider: str):
+    """Hold one of the provider's concurrency slots for the duration of a call.
+    
+    Providers without a configured limit are unbounded.
+    """
+    with _lock:
+        semaphore = _provider_semaphores.get(provider)
+        if semaphore is None:
+            limit = parse_provider_limits(config.provider_concurrency).get(provider)
+            if limit is None:
+                semaphore = None
+            else:
+                semaphore = _provider_semaphores[provider] = threading.BoundedSemaphore(limit)
+    if semaphore is None:
+        yield
+        return
+    with semaphore:
+        yield
+
+
+@asynccontextmanager
+async def async_provider_slot(config: Config, provider: str):
+    """Async provider_slot: limits hold across every task on the running event loop."""
+    limit = parse_provider_limits(config.provider_concurrency).get(provider)
+    if limit is None:
+        yield
+        return
+    semaphores = _async_semaphores.setdefault(asyncio.get_running_loop(), {})
+    semaphore = semaphores.get(provider)
+    if semaphore is None:
+        semaphore = semaphores[provider] = asyncio.Semaphore(limit)
+    async with semaphore:
+        yield
+
+
+def run_batch(items: List[T], worker: Callable[[int, T], R], max_workers: int) -> List[R]:
+    """Run worker(index, item) for every item with bounded concurrency.
+    
+    Results come back in input order. The worker is expected to handle its own
+    errors; an uncaught exception propagates to the caller.
+    """
+    if not items:
+        return []
+    workers = max(1, min(max_workers, len(items)))
+    logger.info(f"Running batch of {len(items)} item(s) with concurrency {workers}")
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch") as pool:
+        futures = [pool.submit(worker, i, item) for i, item in enumerate(items)]
+        return [future.result() for future in futures]
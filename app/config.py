@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dataclasses import dataclass
 from typing import Optional
 from dotenv import load_dotenv
@@ -36,7 +37,52 @@ class Config:
     
     # Proxies - base URL, rotation happens per-request in services.py
     proxy_url: Optional[str] = os.getenv("PROXY_URL")
+
+    # Transcript fetching - how many backends to race at once (1 = sequential fallback chain)
+    transcript_fanout: int = int(os.getenv("TRANSCRIPT_FANOUT", "4"))
     
+    # Transcript cache - local disk tier (per instance) + KV tier (shared)
+    cache_dir: str = os.getenv("CACHE_DIR") or os.path.join(tempfile.gettempdir(), "yt2li_cache")
+    transcript_cache_ttl: int = int(os.getenv("TRANSCRIPT_CACHE_TTL", str(7 * 24 * 60 * 60)))
+    transcript_cache_max_entries: int = int(os.getenv("TRANSCRIPT_CACHE_MAX_ENTRIES", "200"))
+
+    # Long transcripts - above DIGEST_MAX_CHARS, Gemini/Claude get chunk notes (map-reduce) instead of the raw text
+    digest_max_chars: int = int(os.getenv("DIGEST_MAX_CHARS", "24000"))
+    summary_chunk_chars: int = int(os.getenv("SUMMARY_CHUNK_CHARS", "12000"))
+    chunk_cache_max_entries: int = int(os.getenv("CHUNK_CACHE_MAX_ENTRIES", "2000"))
+
+    # Kie.ai image jobs - optional completion callback (e.g. https://<app>/api/kie/callback?token=<KIE_CALLBACK_SECRET>);
+    # the callback route rejects everything until KIE_CALLBACK_SECRET is set
+    kie_callback_url: str = os.getenv("KIE_CALLBACK_URL", "")
+    kie_callback_secret: str = os.getenv("KIE_CALLBACK_SECRET", "")
+    kie_timeout: int = int(os.getenv("KIE_TIMEOUT", "120"))
+
+    # Batch processing - items run in parallel, with per-provider caps on in-flight calls
+    batch_concurrency: int = int(os.getenv("BATCH_CONCURRENCY", "5"))
+    provider_concurrency: str = os.getenv("PROVIDER_CONCURRENCY", "gemini=3,anthropic=3,kie=5,cloudinary=5,blotato=2")
+
+    # Outbound HTTP - pooled keep-alive sessions per host (app/http_client.py)
+    http_pool_size: int = int(os.getenv("HTTP_POOL_SIZE", "10"))  # Connections kept per host
+    http_timeout: int = int(os.getenv("HTTP_TIMEOUT", "30"))  # Default when a call sets none
+    http_retries: int = int(os.getenv("HTTP_RETRIES", "2"))  # GET retries on connect errors / 429 / 5xx
+
+    # Background jobs (/go) - worker time per invocation, URL to kick the worker right away
+    jobs_time_budget: int = int(os.getenv("JOBS_TIME_BUDGET", "240"))
+    jobs_run_estimate: int = int(os.getenv("JOBS_RUN_ESTIMATE", "90"))  # A job only starts with this much budget left
+    # A worker that keeps running after the kick hangs up (e.g. /api/run_jobs on a long-running server);
+    # unset, /go generates inline in the webhook request instead of queueing
+    jobs_trigger_url: str = os.getenv("JOBS_TRIGGER_URL", "")
+    # /go lock while a job is queued: long enough for the 3-hourly workflow sweep to pick up a missed kick
+    jobs_lock_seconds: int = int(os.getenv("JOBS_LOCK_SECONDS", str(3 * 60 * 60 + 300)))
+
+    # Client settings cache - seconds a process trusts its cached copy of the client roster
+    client_cache_ttl: int = int(os.getenv("CLIENT_CACHE_TTL", "30"))
+
+    # Local worker (python -m app.worker) - pipelines in flight, idle poll, how early a posting slot opens
+    worker_concurrency: int = int(os.getenv("WORKER_CONCURRENCY", "3"))
+    worker_poll_interval: int = int(os.getenv("WORKER_POLL_INTERVAL", "15"))
+    worker_slot_lead: int = int(os.getenv("WORKER_SLOT_LEAD", "1800"))  # Seconds before a slot to start generating
+
     # Telegram Bot
     telegram_bot_token: str = os.getenv("TELEGRAM_BOT_TOKEN", "")
     telegram_admin_chat_id: str = os.getenv("TELEGRAM_ADMIN_CHAT_ID", "")  # Your chat ID to restrict access
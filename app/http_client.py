@@ -0,0 +1,98 @@
+"""HTTP Client - Shared, connection-pooled sessions for every outbound provider.
+
+One requests.Session per host (and retry policy), reused across calls and warm
+invocations, so Piped probes, Kie polls, Cloudinary uploads, Blotato posts and
+Telegram messages keep their TCP+TLS connections alive instead of handshaking
+on every request. Every session applies the same default timeout and retries.
+"""
+
+import logging
+import threading
+from typing import Dict, Tuple, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from app.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Process-wide sessions keyed by (scheme://host, retries)
+_sessions: Dict[Tuple[str, int], requests.Session] = {}
+_lock = threading.Lock()
+
+
+class _DefaultTimeoutAdapter(HTTPAdapter):
+    """HTTPAdapter that applies a default timeout when the caller gives none."""
+
+    def __init__(self, timeout: float, **kwargs):
+        self.timeout = timeout
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().send(request, **kwargs)
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+def _build_session(retries: int) -> requests.Session:
+    cfg = Config()
+    retry = Retry(
+        total=retries,
+        backoff_factor=0.3,
+        status_forcelist=(429, 502, 503, 504),
+        allowed_methods=frozenset({"GET", "HEAD", "OPTIONS"}),  # Never replay POSTs (posts, uploads, task creation)
+        respect_retry_after_header=True,
+        raise_on_status=False,  # Hand the final response back to the caller
+    )
+    adapter = _DefaultTimeoutAdapter(
+        cfg.http_timeout,
+        pool_connections=4,
+        pool_maxsize=cfg.http_pool_size,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def session_for(url: str, retries: Optional[int] = None) -> requests.Session:
+    """Pooled session for this URL's host.
+
+    retries overrides HTTP_RETRIES, e.g. 0 for mirror probes where failing
+    over to the next instance beats retrying a dead one.
+    """
+    if retries is None:
+        retries = Config().http_retries
+    key = (_origin(url), retries)
+    with _lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = _sessions[key] = _build_session(retries)
+        return session
+
+
+def get(url: str, retries: Optional[int] = None, **kwargs) -> requests.Response:
+    """requests.get through the host's pooled session."""
+    return session_for(url, retries).get(url, **kwargs)
+
+
+def post(url: str, retries: Optional[int] = None, **kwargs) -> requests.Response:
+    """requests.post through the host's pooled session."""
+    return session_for(url, retries).post(url, **kwargs)
+
+
+def close_all():
+    """Close every pooled session (tests / long-running workers on shutdown)."""
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
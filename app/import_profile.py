@@ -0,0 +1,112 @@
+"""Import Profile - Cold-start import cost of a module, as a tree.
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter (so
+nothing is cached in sys.modules) and turns the output into a tree sorted by
+cumulative time. Use it to see what a cold start pays for:
+
+    python -m app.import_profile api.index --min-ms 2
+    python -m app.import_profile api.index --budget-ms 500   # exit 1 if over
+"""
+
+import os
+import sys
+import argparse
+import subprocess
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Cold import budget for the webhook entry point (api/index.py), in milliseconds
+DEFAULT_BUDGET_MS = int(os.getenv("COLD_IMPORT_BUDGET_MS", "500"))
+
+# Heavy SDKs that must stay out of the cold import path (imported on first use)
+DEFERRED_MODULES = ("google.genai", "anthropic", "youtube_transcript_api", "upstash_redis")
+
+
+@dataclass
+class ImportNode:
+    name: str
+    self_ms: float
+    cumulative_ms: float
+    children: List["ImportNode"] = field(default_factory=list)
+
+
+def profile_imports(module: str = "api.index") -> List[ImportNode]:
+    """Top-level import nodes (normally one: the module itself) from a fresh interpreter."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{proc.stderr[-2000:]}")
+
+    # importtime prints post-order (children before their parent), indented by depth
+    stack = []  # (depth, node)
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        node = ImportNode(name.strip(), int(self_us) / 1000, int(cumulative_us) / 1000)
+        while stack and stack[-1][0] > depth:
+            node.children.insert(0, stack.pop()[1])
+        stack.append((depth, node))
+    return [node for _, node in stack]
+
+
+def find(nodes: List[ImportNode], name: str) -> Optional[ImportNode]:
+    """First node with this module name, searching depth-first."""
+    for node in nodes:
+        if node.name == name:
+            return node
+        found = find(node.children, name)
+        if found:
+            return found
+    return None
+
+
+def cold_import_ms(module: str = "api.index") -> float:
+    """Cumulative cold import time of one module."""
+    node = find(profile_imports(module), module)
+    return node.cumulative_ms if node else 0.0
+
+
+def format_tree(nodes: List[ImportNode], min_ms: float = 1.0, indent: int = 0) -> str:
+    """Indented tree, children sorted slowest first, hiding nodes under min_ms."""
+    lines = []
+    for node in sorted(nodes, key=lambda n: -n.cumulative_ms):
+        if node.cumulative_ms < min_ms:
+            continue
+        lines.append(f"{node.cumulative_ms:9.1f} ms {node.self_ms:8.1f} ms  {'  ' * indent}{node.name}")
+        child_tree = format_tree(node.children, min_ms, indent + 1)
+        if child_tree:
+            lines.append(child_tree)
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Dump the cold-start import tree of a module.")
+    parser.add_argument("module", nargs="?", default="api.index")
+    parser.add_argument("--min-ms", type=float, default=1.0, help="Hide imports cheaper than this")
+    parser.add_argument("--budget-ms", type=float, default=None, help="Exit 1 if the module takes longer")
+    args = parser.parse_args()
+
+    nodes = profile_imports(args.module)
+    print(f"{'cumulative':>12} {'self':>11}  module")
+    print(format_tree(nodes, args.min_ms))
+
+    root = find(nodes, args.module)
+    total = root.cumulative_ms if root else 0.0
+    deferred = [name for name in DEFERRED_MODULES if find(nodes, name)]
+    print(f"\n{args.module}: {total:.1f} ms cold import")
+    if deferred:
+        print(f"Heavy modules on the cold path: {', '.join(deferred)}")
+    if args.budget_ms is not None and total > args.budget_ms:
+        print(f"Over budget ({args.budget_ms:.0f} ms)")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""Background Jobs - Telegram work that runs outside the webhook request.
+
+With JOBS_TRIGGER_URL set, /go enqueues a job record and answers Telegram at
+once, so webhook latency no longer depends on pipeline latency (and Telegram
+stops retrying slow webhooks). A worker executes the jobs and pushes the
+preview message when it's ready:
+- JOBS_TRIGGER_URL, kicked right after enqueue; it must keep running after the
+  kick hangs up (e.g. /api/run_jobs on a long-running server, not Vercel)
+- /api/run_jobs, swept by the auto-post GitHub workflow for anything a kick
+  missed (no per-minute Vercel cron: that needs a paid plan)
+- `python -m app.jobs` (or app.worker) locally, polling until stopped
+Without it, nothing would start the job before the next sweep, so /go runs it
+inline in the webhook request instead.
+
+/stop cancels a client's queued jobs: anything enqueued before it is skipped.
+"""
+
+import json
+import time
+import uuid
+import hashlib
+import logging
+import argparse
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Optional, List, Dict, Any
+
+from app.config import Config
+from app.queue_manager import get_redis, SimpleQueue, ClientManager, ExperimentTracker
+from app.telegram import send_telegram
+
+logger = logging.getLogger(__name__)
+
+
+class JobQueue:
+    """FIFO of pending job records (KV list: RPUSH to enqueue, LPOP to take)."""
+    KEY = "telegram_jobs"
+    CANCELLED_KEY = "telegram_jobs_cancelled"  # Per client: jobs created up to this time are skipped
+    CANCELLED_TTL = 24 * 60 * 60
+    _local_jobs: List[dict] = []  # Shared in-memory fallback
+
+    def __init__(self, config: Config):
+        self.redis = get_redis(config)
+
+    def enqueue(self, job_type: str, **fields) -> dict:
+        job = {"id": uuid.uuid4().hex[:12], "type": job_type, "created_at": time.time(), **fields}
+        if not self.redis:
+            self._local_jobs.append(job)
+            return job
+        try:
+            self.redis.rpush(self.KEY, json.dumps(job))
+        except Exception as e:
+            logger.error(f"Redis enqueue job failed: {e}")
+            raise
+        return job
+
+    def pop(self) -> Optional[dict]:
+        if not self.redis:
+            return self._local_jobs.pop(0) if self._local_jobs else None
+        try:
+            data = self.redis.lpop(self.KEY)
+            return json.loads(data) if data else None
+        except Exception as e:
+            logger.error(f"Redis pop job failed: {e}")
+            return None
+
+    def count(self) -> int:
+        if not self.redis:
+            return len(self._local_jobs)
+        try:
+            return self.redis.llen(self.KEY) or 0
+        except Exception as e:
+            logger.error(f"Redis count jobs failed: {e}")
+            return 0
+
+    def cancel_pending(self, client: str):
+        """Skip every job already queued for the client (e.g. on /stop)."""
+        if not self.redis:
+            self._local_jobs[:] = [job for job in self._local_jobs if job.get("client") != client]
+            return
+        try:
+            self.redis.setex(f"{self.CANCELLED_KEY}:{client}", self.CANCELLED_TTL, str(time.time()))
+        except Exception as e:
+            logger.error(f"Redis cancel jobs failed: {e}")
+
+    def is_cancelled(self, job: dict) -> bool:
+        if not self.redis or not job.get("client"):
+            return False
+        try:
+            cancelled_at = self.redis.get(f"{self.CANCELLED_KEY}:{job['client']}")
+            return bool(cancelled_at) and job.get("created_at", 0) <= float(cancelled_at)
+        except Exception as e:
+            logger.error(f"Redis job cancel check failed: {e}")
+            return False
+
+
+def processing_lock_key(client: str) -> str:
+    """Per-client lock held from /go until its preview job finishes."""
+    return f"processing_lock:{client}"
+
+
+def generate_preview(cfg: Config, q: SimpleQueue, chat_id: str, current: str, url: str) -> dict:
+    """Generate a post for a leased URL, store it as a preview and send it for approval.
+
+    Acks the URL once the preview is stored; on failure it is nacked (retried
+    or dead-lettered) and the chat is told. Shared by /go jobs and app.worker.
+    """
+    from app.services import ContentPipeline
+
+    client_info = ClientManager(cfg).get_client(current) or {}
+    blotato_account_id = client_info.get('blotato_account_id', cfg.blotato_account_id)
+    style = client_info.get('style', 'soulprint')
+    try:
+        tracker = ExperimentTracker(cfg)
+        pipeline = ContentPipeline(cfg, url, blotato_account_id=blotato_account_id, style=style)
+        result = pipeline.run_all(skip_post=True)
+
+        # Log experiment
+        post_id = result.get("post_id", "")
+        tracker.log_experiment(
+            post_id=post_id,
+            variation=result.get("variation", "unknown"),
+            url=url,
+            post_text=result.get("post_text", ""),
+            propensity=result.get("propensity")
+        )
+
+        url_hash = hashlib.md5(url.encode()).hexdigest()[:10]
+        preview_key = f"preview:{current}:{url_hash}"
+        if not q.redis:
+            q.nack(url, current, "Redis unavailable, could not store preview")
+            send_telegram(chat_id, "❌ Redis unavailable, could not store preview.", cfg)
+            return {"status": "failed", "url": url, "error": "no redis"}
+
+        q.redis.setex(preview_key, 3600 * 24, json.dumps(result))
+        q.ack(url, current)  # Preview stored - the approve button takes it from here
+
+        kb = {
+            "inline_keyboard": [
+                [
+                    {"text": "✅ Approve & Post", "callback_data": f"post:{current}:{url_hash}"},
+                    {"text": "❌ Cancel", "callback_data": f"cancel:{current}:{url_hash}"}
+                ],
+                [
+                    {"text": "🏆 Mark as Winner", "callback_data": f"winner:{post_id}"}
+                ]
+            ]
+        }
+        variation_info = result.get('variation', 'unknown')
+        preview_text = f"📝 <b>PREVIEW for {current}</b>\n\n🧪 <i>Variation: {variation_info}</i>\n\n{result['post_text'][:3400]}"
+        send_telegram(chat_id, preview_text, cfg, reply_markup=kb, photo_url=result.get('image_url'))
+        return {"status": "previewed", "url": url, "post_id": post_id}
+    except Exception as e:
+        outcome = q.nack(url, current, str(e))
+        note = "☠️ Moved to dead-letter list (/dead)" if outcome == "dead" else "🔁 Returned to queue for retry"
+        send_telegram(chat_id, f"❌ Failed: {str(e)[:400]}\n\n{note}", cfg)
+        return {"status": "failed", "url": url, "error": str(e)}
+
+
+def run_preview_job(cfg: Config, job: dict) -> dict:
+    """Lease the client's next URL, generate a preview and send it for approval."""
+    chat_id, current = job["chat_id"], job["client"]
+    q = SimpleQueue(cfg)
+    lock_key = processing_lock_key(current)
+    try:
+        if q.redis:
+            # The /go lock covered the wait in the queue; from here it only needs to outlast this run
+            q.redis.setex(lock_key, cfg.jobs_time_budget, "1")
+        url = q.pop_next(current)
+        if not url:
+            send_telegram(chat_id, f"📭 Queue for <b>{current}</b> is empty!", cfg)
+            return {"status": "empty"}
+
+        remaining = q.count(current)
+        send_telegram(chat_id, f"👀 Generating for <b>{current}</b>...\n\n🔗 {url}\n📝 {remaining} left\n\n⏳ Processing... (30-60s)", cfg)
+        return generate_preview(cfg, q, chat_id, current, url)
+    finally:
+        try:
+            if q.redis: q.redis.delete(lock_key)
+        except Exception:
+            pass
+
+
+JOB_HANDLERS = {
+    "preview": run_preview_job,
+}
+
+
+def run_job(cfg: Config, job: dict) -> dict:
+    """Execute one job record; errors are reported in the result, not raised."""
+    handler = JOB_HANDLERS.get(job.get("type"))
+    start = time.time()
+    if JobQueue(cfg).is_cancelled(job):
+        logger.info(f"Job {job.get('id')} skipped: cancelled by /stop")
+        outcome = {"status": "cancelled"}
+    elif not handler:
+        logger.error(f"Unknown job type: {job.get('type')}")
+        outcome = {"status": "failed", "error": f"unknown job type {job.get('type')}"}
+    else:
+        try:
+            outcome = handler(cfg, job)
+        except Exception as e:
+            logger.error(f"Job {job.get('id')} failed: {e}")
+            outcome = {"status": "failed", "error": str(e)}
+    return {
+        "job": job.get("id"),
+        "type": job.get("type"),
+        "client": job.get("client"),
+        "waited_s": round(start - job.get("created_at", start), 1),
+        "ran_s": round(time.time() - start, 1),
+        **outcome,
+    }
+
+
+def run_pending_jobs(cfg: Config, time_budget: float = None) -> List[Dict[str, Any]]:
+    """Run queued jobs, up to BATCH_CONCURRENCY at once, until empty or out of time.
+
+    A job is popped whenever a slot frees up, but only while the remaining
+    budget still covers a typical run (JOBS_RUN_ESTIMATE, or the slowest run
+    seen so far), so one invocation finishes under the serverless timeout;
+    whatever remains waits for the next run.
+    """
+    jobs = JobQueue(cfg)
+    deadline = time.time() + (time_budget or cfg.jobs_time_budget)
+    estimate = cfg.jobs_run_estimate
+    slots = max(1, cfg.batch_concurrency)
+    results = []
+    running = set()
+    with ThreadPoolExecutor(max_workers=slots, thread_name_prefix="jobs") as pool:
+        while True:
+            while len(running) < slots and deadline - time.time() >= estimate:
+                job = jobs.pop()
+                if not job:
+                    break
+                running.add(pool.submit(run_job, cfg, job))
+            if not running:
+                break
+            finished, running = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                result = future.result()
+                estimate = max(estimate, result.get("ran_s", 0))
+                results.append(result)
+    return results
+
+
+def kick_worker(cfg: Config):
+    """Best-effort nudge so a job starts now instead of at the next workflow sweep.
+
+    Fires a request at JOBS_TRIGGER_URL and gives up after a fraction of a
+    second, so the worker behind it must keep running once the caller hangs up.
+    A kick that is lost leaves the job to the workflow sweep, which the /go lock
+    (JOBS_LOCK_SECONDS) outlasts.
+    """
+    if not cfg.jobs_trigger_url:
+        return
+    from app import http_client
+    try:
+        http_client.post(cfg.jobs_trigger_url, retries=0, timeout=(1, 0.5),
+                         headers={"Authorization": f"Bearer {cfg.cron_secret}"})
+    except Exception:
+        pass  # Read timeout is expected - the worker is busy running the job
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run queued Telegram jobs.")
+    parser.add_argument("--once", action="store_true", help="Drain the queue once and exit")
+    parser.add_argument("--interval", type=float, default=5.0, help="Seconds between polls when idle")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    cfg = Config()
+    while True:
+        for result in run_pending_jobs(cfg):
+            logger.info(f"Job result: {result}")
+        if args.once:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
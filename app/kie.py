@@ -0,0 +1,202 @@
+"""Kie.ai Job Client - Non-blocking image task submission with adaptive polling.
+
+Jobs are submitted and return a task ID immediately. Completion is detected by
+either a Kie callback (stored in KV by /api/kie/callback) or by polling
+recordInfo with backoff: fast at first, slower as the job ages.
+"""
+
+import json
+import time
+import asyncio
+import logging
+from typing import Optional, Iterator
+
+from app.config import Config
+from app import http_client
+from app.queue_manager import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+class KieJobError(RuntimeError):
+    """Kie reported a failed job or could not be reached."""
+
+
+class KieClient:
+    """Submits Kie image jobs and waits for them (sync or async)."""
+    CREATE_TASK_URL = "https://api.kie.ai/api/v1/jobs/createTask"
+    RECORD_INFO_URL = "https://api.kie.ai/api/v1/jobs/recordInfo"
+    RESULT_KEY_PREFIX = "kie_result"  # Callback results: kie_result:<taskId>
+    RESULT_TTL = 60 * 60
+    MODEL = "nano-banana-pro"
+
+    # Adaptive polling: first check after 2s, then x1.5 up to 10s between checks
+    FIRST_DELAY = 2.0
+    BACKOFF = 1.5
+    MAX_DELAY = 10.0
+    MAX_POLL_ERRORS = 3  # Consecutive poll errors before giving up
+
+    def __init__(self, config: Config):
+        self.cfg = config
+        self.headers = {
+            "Authorization": f"Bearer {config.kie_api_key}",
+            "Content-Type": "application/json"
+        }
+        self.redis = get_redis(config)
+
+    def _create_payload(self, prompt: str, aspect_ratio: str) -> dict:
+        if not self.cfg.kie_api_key:
+            raise RuntimeError("Kie API key not configured")
+
+        payload = {
+            "model": self.MODEL,
+            "input": {"prompt": prompt, "aspect_ratio": aspect_ratio}
+        }
+        if self.cfg.kie_callback_url:
+            payload["callBackUrl"] = self.cfg.kie_callback_url
+        return payload
+
+    @staticmethod
+    def _task_id(data: dict) -> str:
+        task_id = (data.get("data") or {}).get("taskId")
+        if not task_id:
+            raise KieJobError(f"Kie task creation failed: No taskId returned from Kie: {data}")
+        logger.info(f"Submitted Kie task {task_id}")
+        return task_id
+
+    def submit(self, prompt: str, aspect_ratio: str = "16:9") -> str:
+        """Create an image task and return its taskId without waiting."""
+        payload = self._create_payload(prompt, aspect_ratio)
+        try:
+            r = http_client.post(self.CREATE_TASK_URL, headers=self.headers, json=payload, timeout=10)
+            r.raise_for_status()
+            data = r.json()
+        except Exception as e:
+            raise KieJobError(f"Kie task creation failed: {e}")
+        return self._task_id(data)
+
+    async def submit_async(self, prompt: str, http, aspect_ratio: str = "16:9") -> str:
+        """submit() over an httpx.AsyncClient."""
+        payload = self._create_payload(prompt, aspect_ratio)
+        try:
+            r = await http.post(self.CREATE_TASK_URL, headers=self.headers, json=payload, timeout=10)
+            r.raise_for_status()
+            data = r.json()
+        except Exception as e:
+            raise KieJobError(f"Kie task creation failed: {e}")
+        return self._task_id(data)
+
+    @staticmethod
+    def parse_record(record: dict) -> Optional[str]:
+        """Image URL for a finished record, None while pending. Raises on failure."""
+        state = record.get("state")
+        if state == "success":
+            result_json = record.get("resultJson")
+            # Handle stringified JSON if necessary
+            if isinstance(result_json, str):
+                result_json = json.loads(result_json)
+            urls = (result_json or {}).get("resultUrls", [])
+            if not urls:
+                raise KieJobError("Kie success but no URLs found")
+            return urls[0]
+        if state == "fail":
+            raise KieJobError(f"Kie generation failed: {record.get('failMsg') or record}")
+        return None
+
+    def _stored_record(self, task_id: str) -> Optional[dict]:
+        """The record a Kie callback left in KV, or None if none arrived yet."""
+        if not self.redis:
+            return None
+        try:
+            stored = self.redis.get(f"{self.RESULT_KEY_PREFIX}:{task_id}")
+            return json.loads(stored) if stored else None
+        except Exception as e:
+            logger.warning(f"Kie callback lookup failed: {e}")
+            return None
+
+    def check(self, task_id: str) -> Optional[str]:
+        """One status check: callback result in KV first, then recordInfo."""
+        record = self._stored_record(task_id)
+        if record is not None:
+            return self.parse_record(record)
+
+        res = http_client.get(self.RECORD_INFO_URL, headers=self.headers, params={"taskId": task_id}, timeout=10)
+        res.raise_for_status()
+        return self.parse_record(res.json().get("data") or {})
+
+    async def check_async(self, task_id: str, http) -> Optional[str]:
+        """check() with recordInfo fetched over an httpx.AsyncClient (the KV lookup runs on a thread)."""
+        record = await asyncio.to_thread(self._stored_record, task_id) if self.redis else None
+        if record is not None:
+            return self.parse_record(record)
+
+        res = await http.get(self.RECORD_INFO_URL, headers=self.headers, params={"taskId": task_id}, timeout=10)
+        res.raise_for_status()
+        return self.parse_record(res.json().get("data") or {})
+
+    def poll_delays(self) -> Iterator[float]:
+        """Delays between checks: fast at first, slower as the job ages."""
+        delay = self.FIRST_DELAY
+        while True:
+            yield delay
+            delay = min(delay * self.BACKOFF, self.MAX_DELAY)
+
+    def _poll_error(self, errors: int, error: Exception) -> int:
+        """Count a failed check; raises once errors pile up."""
+        errors += 1
+        logger.warning(f"Kie polling error ({errors}/{self.MAX_POLL_ERRORS}): {error}")
+        if errors >= self.MAX_POLL_ERRORS:
+            raise KieJobError(f"Kie polling failed: {error}")
+        return errors
+
+    def wait(self, task_id: str, timeout: float = None) -> str:
+        """Block until the task finishes and return the image URL."""
+        timeout = timeout or self.cfg.kie_timeout
+        deadline = time.time() + timeout
+        errors = 0
+        for delay in self.poll_delays():
+            time.sleep(min(delay, max(0, deadline - time.time())))
+            try:
+                url, errors = self.check(task_id), 0
+            except KieJobError:
+                raise
+            except Exception as e:
+                url, errors = None, self._poll_error(errors, e)
+            if url:
+                return url
+            if time.time() >= deadline:
+                break
+        raise TimeoutError("Kie image generation timed out")
+
+    async def wait_async(self, task_id: str, http, timeout: float = None) -> str:
+        """Await the task, polling over the given httpx.AsyncClient without holding a thread."""
+        timeout = timeout or self.cfg.kie_timeout
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        errors = 0
+        for delay in self.poll_delays():
+            await asyncio.sleep(min(delay, max(0, deadline - loop.time())))
+            try:
+                url, errors = await self.check_async(task_id, http), 0
+            except KieJobError:
+                raise
+            except Exception as e:
+                url, errors = None, self._poll_error(errors, e)
+            if url:
+                return url
+            if loop.time() >= deadline:
+                break
+        raise TimeoutError("Kie image generation timed out")
+
+    def store_callback(self, payload: dict) -> Optional[str]:
+        """Persist a Kie callback so waiters pick it up on their next check."""
+        record = payload.get("data") or {}
+        task_id = record.get("taskId")
+        if not task_id:
+            return None
+        if self.redis:
+            try:
+                self.redis.setex(f"{self.RESULT_KEY_PREFIX}:{task_id}", self.RESULT_TTL, json.dumps(record))
+            except Exception as e:
+                logger.error(f"Kie callback store failed: {e}")
+        return task_id
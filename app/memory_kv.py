@@ -0,0 +1,476 @@
+"""Memory KV - In-process stand-in for the Upstash Redis client.
+
+Selected with KV_REST_API_URL=memory:// so the bot, the job runner and
+`python -m app.worker` run locally with no Redis at all (memory://<name> gives
+a separate store per name, e.g. one per simulation run). It implements the
+subset of commands this app uses (strings, hashes, lists, sorted sets, TTLs,
+SCAN, pipelines) with Upstash's return conventions, and runs the app's Lua
+scripts through Python equivalents registered in SCRIPTS. Every command holds
+one lock, so scripts and MULTI batches are atomic as they are on Redis.
+
+State lives in this process only and is gone when it exits.
+"""
+
+import json
+import time
+import fnmatch
+import hashlib
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+def _str(value: Any) -> str:
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    return str(value)
+
+
+def _num(value: Any) -> str:
+    """Redis-style number formatting (integers without a trailing .0)."""
+    value = float(value)
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def _score(bound: Any) -> float:
+    text = str(bound)
+    if text in ("-inf", "+inf", "inf"):
+        return float(text)
+    return float(text.lstrip("("))
+
+
+class MemoryRedis:
+    """Thread-safe in-memory Redis with the Upstash client's method signatures."""
+
+    # Lua script text -> Python equivalent(redis, keys, args); filled by register_script
+    SCRIPTS: Dict[str, Callable[["MemoryRedis", List[str], List[str]], Any]] = {}
+
+    def __init__(self):
+        self._data: Dict[str, Any] = {}
+        self._expires: Dict[str, float] = {}
+        self._lock = threading.RLock()
+
+    # ------------------------------------------------------------- internals
+
+    def _live(self, key: str) -> bool:
+        deadline = self._expires.get(key)
+        if deadline is not None and deadline <= time.time():
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+        return key in self._data
+
+    def _get(self, key: str, kind: type, create: bool = False):
+        if not self._live(key):
+            if not create:
+                return None
+            self._data[key] = kind()
+        value = self._data[key]
+        if not isinstance(value, kind):
+            raise TypeError("WRONGTYPE Operation against a key holding the wrong kind of value")
+        return value
+
+    def _cleanup(self, key: str):
+        if key in self._data and not self._data[key] and not isinstance(self._data[key], str):
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+
+    # --------------------------------------------------------------- strings
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            return self._get(key, str)
+
+    def set(self, key: str, value: Any, ex: int = None, nx: bool = False) -> Optional[str]:
+        with self._lock:
+            if nx and self._live(key):
+                return None
+            self._data[key] = _str(value)
+            self._expires.pop(key, None)
+            if ex:
+                self._expires[key] = time.time() + ex
+            return "OK"
+
+    def setex(self, key: str, seconds: int, value: Any) -> str:
+        return self.set(key, value, ex=seconds)
+
+    def incr(self, key: str) -> int:
+        return self.incrby(key, 1)
+
+    def decr(self, key: str) -> int:
+        return self.incrby(key, -1)
+
+    def incrby(self, key: str, increment: int) -> int:
+        with self._lock:
+            value = int(self._get(key, str) or 0) + int(increment)
+            self._data[key] = str(value)
+            return value
+
+    def delete(self, *keys: str) -> int:
+        with self._lock:
+            removed = 0
+            for key in keys:
+                if self._live(key):
+                    self._data.pop(key)
+                    self._expires.pop(key, None)
+                    removed += 1
+            return removed
+
+    def exists(self, *keys: str) -> int:
+        with self._lock:
+            return sum(1 for key in keys if self._live(key))
+
+    def expire(self, key: str, seconds: int) -> bool:
+        with self._lock:
+            if not self._live(key):
+                return False
+            self._expires[key] = time.time() + seconds
+            return True
+
+    def ttl(self, key: str) -> int:
+        with self._lock:
+            if not self._live(key):
+                return -2
+            deadline = self._expires.get(key)
+            return -1 if deadline is None else max(0, int(deadline - time.time()))
+
+    def flushall(self) -> str:
+        with self._lock:
+            self._data.clear()
+            self._expires.clear()
+            return "OK"
+
+    def scan(self, cursor: int, match: str = None, count: int = None) -> Tuple[int, List[str]]:
+        """Single pass: everything matching comes back with cursor 0."""
+        with self._lock:
+            keys = [k for k in list(self._data) if self._live(k)]
+        return 0, [k for k in keys if match is None or fnmatch.fnmatchcase(k, match)]
+
+    # ---------------------------------------------------------------- hashes
+
+    def hget(self, key: str, field: str) -> Optional[str]:
+        with self._lock:
+            return (self._get(key, dict) or {}).get(field)
+
+    def hmget(self, key: str, *fields: str) -> List[Optional[str]]:
+        with self._lock:
+            h = self._get(key, dict) or {}
+            return [h.get(f) for f in fields]
+
+    def hset(self, key: str, field: str = None, value: Any = None, values: Dict[str, Any] = None) -> int:
+        with self._lock:
+            h = self._get(key, dict, create=True)
+            items = dict(values or {})
+            if field is not None:
+                items[field] = value
+            added = sum(1 for f in items if f not in h)
+            h.update({f: _str(v) for f, v in items.items()})
+            return added
+
+    def hsetnx(self, key: str, field: str, value: Any) -> bool:
+        with self._lock:
+            h = self._get(key, dict, create=True)
+            if field in h:
+                return False
+            h[field] = _str(value)
+            return True
+
+    def hdel(self, key: str, *fields: str) -> int:
+        with self._lock:
+            h = self._get(key, dict) or {}
+            removed = sum(1 for f in fields if h.pop(f, None) is not None)
+            self._cleanup(key)
+            return removed
+
+    def hgetall(self, key: str) -> Dict[str, str]:
+        with self._lock:
+            return dict(self._get(key, dict) or {})
+
+    def hkeys(self, key: str) -> List[str]:
+        with self._lock:
+            return list(self._get(key, dict) or {})
+
+    def hlen(self, key: str) -> int:
+        with self._lock:
+            return len(self._get(key, dict) or {})
+
+    def hincrby(self, key: str, field: str, increment: int) -> int:
+        with self._lock:
+            h = self._get(key, dict, create=True)
+            value = int(h.get(field, 0)) + int(increment)
+            h[field] = str(value)
+            return value
+
+    # ----------------------------------------------------------------- lists
+
+    def lpush(self, key: str, *elements: Any) -> int:
+        with self._lock:
+            items = self._get(key, list, create=True)
+            for element in elements:
+                items.insert(0, _str(element))
+            return len(items)
+
+    def rpush(self, key: str, *elements: Any) -> int:
+        with self._lock:
+            items = self._get(key, list, create=True)
+            items.extend(_str(e) for e in elements)
+            return len(items)
+
+    def lpop(self, key: str) -> Optional[str]:
+        with self._lock:
+            items = self._get(key, list)
+            value = items.pop(0) if items else None
+            self._cleanup(key)
+            return value
+
+    def rpop(self, key: str) -> Optional[str]:
+        with self._lock:
+            items = self._get(key, list)
+            value = items.pop() if items else None
+            self._cleanup(key)
+            return value
+
+    def llen(self, key: str) -> int:
+        with self._lock:
+            return len(self._get(key, list) or [])
+
+    @staticmethod
+    def _slice(items: list, start: int, stop: int) -> list:
+        n = len(items)
+        start = max(start + n if start < 0 else start, 0)
+        stop = stop + n if stop < 0 else stop
+        return items[start:stop + 1] if stop >= 0 else []
+
+    def lrange(self, key: str, start: int, stop: int) -> List[str]:
+        with self._lock:
+            return self._slice(self._get(key, list) or [], start, stop)
+
+    def ltrim(self, key: str, start: int, stop: int) -> str:
+        with self._lock:
+            items = self._get(key, list)
+            if items is not None:
+                items[:] = self._slice(items, start, stop)
+                self._cleanup(key)
+            return "OK"
+
+    # ----------------------------------------------------------- sorted sets
+
+    def _sorted(self, key: str) -> List[Tuple[str, float]]:
+        z = self._get(key, dict) or {}
+        return sorted(z.items(), key=lambda item: (item[1], item[0]))
+
+    def zadd(self, key: str, scores: Dict[str, float], nx: bool = False, xx: bool = False,
+             ch: bool = False) -> int:
+        with self._lock:
+            if xx and not self._live(key):
+                return 0
+            z = self._get(key, dict, create=True)
+            added = changed = 0
+            for member, score in scores.items():
+                if member in z:
+                    if not nx and z[member] != float(score):
+                        z[member] = float(score)
+                        changed += 1
+                elif not xx:
+                    z[member] = float(score)
+                    added += 1
+            self._cleanup(key)
+            return added + changed if ch else added
+
+    def zrem(self, key: str, *members: str) -> int:
+        with self._lock:
+            z = self._get(key, dict) or {}
+            removed = sum(1 for m in members if z.pop(m, None) is not None)
+            self._cleanup(key)
+            return removed
+
+    def zcard(self, key: str) -> int:
+        with self._lock:
+            return len(self._get(key, dict) or {})
+
+    def zscore(self, key: str, member: str) -> Optional[float]:
+        with self._lock:
+            return (self._get(key, dict) or {}).get(member)
+
+    def zrange(self, key: str, start: int, stop: int, withscores: bool = False, rev: bool = False) -> list:
+        with self._lock:
+            items = self._sorted(key)
+            if rev:
+                items.reverse()
+            items = self._slice(items, start, stop)
+            return [(m, s) for m, s in items] if withscores else [m for m, _ in items]
+
+    def zrevrange(self, key: str, start: int, stop: int, withscores: bool = False) -> list:
+        return self.zrange(key, start, stop, withscores=withscores, rev=True)
+
+    def zrangebyscore(self, key: str, min_score: Any, max_score: Any) -> List[str]:
+        with self._lock:
+            low, high = _score(min_score), _score(max_score)
+            return [m for m, s in self._sorted(key) if low <= s <= high]
+
+    def zremrangebyrank(self, key: str, start: int, stop: int) -> int:
+        with self._lock:
+            doomed = [m for m, _ in self._slice(self._sorted(key), start, stop)]
+            return self.zrem(key, *doomed) if doomed else 0
+
+    def zpopmin(self, key: str, count: int = 1) -> List[Tuple[str, float]]:
+        with self._lock:
+            popped = self._sorted(key)[:count]
+            for member, _ in popped:
+                self._data[key].pop(member)
+            self._cleanup(key)
+            return popped
+
+    # ------------------------------------------------------ batches & scripts
+
+    def pipeline(self) -> "MemoryPipeline":
+        return MemoryPipeline(self)
+
+    def multi(self) -> "MemoryPipeline":
+        return MemoryPipeline(self)
+
+    def eval(self, script: str, keys: List[str] = None, args: List[Any] = None) -> Any:
+        handler = self.SCRIPTS.get(script)
+        if handler is None:
+            sha = hashlib.sha1(script.encode()).hexdigest()
+            raise ValueError(f"MemoryRedis has no Python equivalent for script {sha}; "
+                             f"register one in memory_kv._register_app_scripts")
+        with self._lock:
+            return handler(self, list(keys or []), [_str(a) for a in (args or [])])
+
+
+class MemoryPipeline:
+    """Queues commands and runs them together (atomically) on exec()."""
+
+    def __init__(self, redis: MemoryRedis):
+        self._redis = redis
+        self._commands: List[Tuple[str, tuple, dict]] = []
+
+    def __getattr__(self, name: str):
+        if not hasattr(self._redis, name):
+            raise AttributeError(name)
+
+        def queue(*args, **kwargs):
+            self._commands.append((name, args, kwargs))
+            return self
+        return queue
+
+    def exec(self) -> List[Any]:
+        with self._redis._lock:
+            commands, self._commands = self._commands, []
+            return [getattr(self._redis, name)(*args, **kwargs) for name, args, kwargs in commands]
+
+
+def register_script(script: str):
+    """Decorator: Python equivalent of a Lua script, run by MemoryRedis.eval."""
+    def decorator(fn):
+        MemoryRedis.SCRIPTS[script] = fn
+        return fn
+    return decorator
+
+
+# Process-wide instances by URL, so every manager (and the worker) sees the same data
+_instances: Dict[str, MemoryRedis] = {}
+_instance_lock = threading.Lock()
+
+
+def get_memory_redis(url: str = "memory://") -> MemoryRedis:
+    with _instance_lock:
+        if not MemoryRedis.SCRIPTS:
+            _register_app_scripts()
+        if url not in _instances:
+            _instances[url] = MemoryRedis()
+        return _instances[url]
+
+
+def _register_app_scripts():
+    """Python equivalents of the Lua scripts in app.queue_manager."""
+    from app.queue_manager import SimpleQueue, ClientManager, ExperimentTracker
+
+    def dead_record(url: str, attempts: int, error: str, dead_at: str) -> str:
+        return json.dumps({"url": url, "attempts": attempts, "error": error, "dead_at": dead_at})
+
+    @register_script(SimpleQueue.POP_SCRIPT)
+    def pop_script(r: MemoryRedis, keys: List[str], args: List[str]):
+        queue, inflight, attempts_key, dead = keys
+        now, deadline, max_attempts, dead_at = args
+        for url in r.zrangebyscore(inflight, "-inf", now):
+            r.zrem(inflight, url)
+            attempts = int(r.hget(attempts_key, url) or 0)
+            if attempts >= int(max_attempts):
+                r.hdel(attempts_key, url)
+                r.lpush(dead, dead_record(url, attempts, "lease expired", dead_at))
+            else:
+                r.zadd(queue, {url: float(now)}, nx=True)
+        popped = r.zpopmin(queue)
+        if not popped:
+            return None
+        url = popped[0][0]
+        r.zadd(inflight, {url: float(deadline)})
+        r.hincrby(attempts_key, url, 1)
+        return url
+
+    @register_script(SimpleQueue.NACK_SCRIPT)
+    def nack_script(r: MemoryRedis, keys: List[str], args: List[str]):
+        queue, inflight, attempts_key, dead = keys
+        url, now, max_attempts, dead_at, error = args
+        if r.zrem(inflight, url) == 0:
+            return "missing"
+        attempts = int(r.hget(attempts_key, url) or 0)
+        if attempts >= int(max_attempts):
+            r.hdel(attempts_key, url)
+            r.lpush(dead, dead_record(url, attempts, error, dead_at))
+            return "dead"
+        r.zadd(queue, {url: float(now)}, nx=True)
+        return "requeued"
+
+    @register_script(ClientManager.MERGE_SCRIPT)
+    def merge_script(r: MemoryRedis, keys: List[str], args: List[str]):
+        name, updates = args
+        data = json.loads(r.hget(keys[0], name) or "{}")
+        data.update(json.loads(updates))
+        encoded = json.dumps(data)
+        r.hset(keys[0], name, encoded)
+        return encoded
+
+    @register_script(ExperimentTracker.BACKFILL_STATS_SCRIPT)
+    def backfill_stats_script(r: MemoryRedis, keys: List[str], args: List[str]):
+        if r.exists(keys[0]):
+            return 0
+        if args:
+            r.hset(keys[0], values=dict(zip(args[::2], args[1::2])))
+        return 1
+
+    @register_script(ExperimentTracker.EVICT_SCRIPT)
+    def evict_script(r: MemoryRedis, keys: List[str], args: List[str]):
+        experiments, index = keys
+        overflow = -(int(args[0]) + 1)
+        evicted = r.zrange(index, 0, overflow)
+        if not evicted:
+            return 0
+        r.zremrangebyrank(index, 0, overflow)
+        r.hdel(experiments, *evicted)
+        return len(evicted)
+
+    @register_script(ExperimentTracker.WIN_SCRIPT)
+    def win_script(r: MemoryRedis, keys: List[str], args: List[str]):
+        experiments, stats, winners = keys
+        post_id, won_at, keep, *dimensions = args
+        data = r.hget(experiments, post_id)
+        if not data:
+            return "missing"
+        experiment = json.loads(data)
+        if experiment.get("is_winner"):
+            return "already"
+        experiment["is_winner"] = True
+        experiment["won_at"] = won_at
+        encoded = json.dumps(experiment)
+        r.hset(experiments, post_id, encoded)
+        variation = experiment.get("variation") or "unknown"
+        fields = ["total", variation]
+        parts = [part for part in variation.split("|") if part]
+        if len(parts) == len(dimensions):
+            fields += [f"{dim}:{option}" for dim, option in zip(dimensions, parts)]
+        for field in fields:
+            r.hincrby(stats, f"win:{field}", 1)
+        r.lpush(winners, encoded)
+        r.ltrim(winners, 0, int(keep) - 1)
+        return encoded
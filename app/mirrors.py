@@ -0,0 +1,194 @@
+"""Mirror Registry - Health scoreboard for Piped/Invidious/Nitter instances.
+
+Records latency, success rate and last failure per instance so fetchers can
+try the healthiest mirrors first and skip dead ones (circuit breaker).
+Stats live in KV so they survive serverless cold starts; so do half-open probe
+claims, so one probe goes out per tripped mirror across all instances.
+"""
+
+import json
+import time
+import logging
+import threading
+from typing import List, Dict
+
+from app.config import Config
+from app.queue_manager import get_redis
+
+logger = logging.getLogger(__name__)
+
+
+PIPED_INSTANCES = [
+    "https://pipedapi.kavin.rocks",
+    "https://pipedapi.adminforge.de",
+    "https://api.piped.yt",
+    "https://pipedapi.in.projectsegfau.lt",
+]
+
+INVIDIOUS_INSTANCES = [
+    "https://inv.nadeko.net",
+    "https://yewtu.be",
+    "https://invidious.nerdvpn.de",
+    "https://inv.tux.pizza",
+    "https://invidious.projectsegfau.lt",
+    "https://vid.puffyan.us",
+    "https://invidious.fdn.fr",
+]
+
+NITTER_INSTANCES = [
+    "https://nitter.net",
+    "https://nitter.cz",
+    "https://nitter.it",
+]
+
+# Process-wide stats, reused across warm invocations: {instance: {...}}
+_stats: Dict[str, dict] = {}
+_loaded_at = 0.0
+_lock = threading.Lock()
+
+
+class MirrorRegistry:
+    """Shared health scoreboard with a per-instance circuit breaker."""
+    KEY = "mirror_health"  # hash: instance -> JSON stats
+    PROBE_KEY = "mirror_probe"  # mirror_probe:<instance>, held by the caller probing a half-open circuit
+    FAILURE_THRESHOLD = 3  # Consecutive failures before the circuit opens
+    OPEN_SECONDS = 10 * 60  # How long an open circuit skips the instance
+    PROBE_SECONDS = 30  # Half-open: other callers skip the instance while one probe is out
+    RELOAD_SECONDS = 60  # Refresh local stats from KV at most this often
+    LATENCY_ALPHA = 0.3  # EWMA smoothing for latency
+
+    def __init__(self, config: Config):
+        self.redis = get_redis(config)
+
+    def _load(self):
+        """Pull the shared scoreboard from KV if our local copy is stale."""
+        global _loaded_at
+        if not self.redis or time.time() - _loaded_at < self.RELOAD_SECONDS:
+            return
+        try:
+            data = self.redis.hgetall(self.KEY) or {}
+            with _lock:
+                for instance, raw in data.items():
+                    _stats[instance] = json.loads(raw)
+                _loaded_at = time.time()
+        except Exception as e:
+            logger.error(f"Mirror registry load failed: {e}")
+
+    def _state(self, stats: dict, now: float) -> str:
+        if stats.get("open_until", 0) > now:
+            return "open"
+        if stats.get("consecutive_failures", 0) >= self.FAILURE_THRESHOLD:
+            return "half_open"  # Cooldown elapsed - claim() lets one probe through
+        return "closed"
+
+    def _score(self, stats: dict) -> float:
+        """Higher is better: smoothed success rate discounted by latency."""
+        successes = stats.get("successes", 0)
+        failures = stats.get("failures", 0)
+        success_rate = (successes + 1) / (successes + failures + 2)
+        latency_s = stats.get("latency_ms", 1000) / 1000
+        return success_rate / (1 + latency_s)
+
+    def ranked(self, instances: List[str]) -> List[str]:
+        """Instances ordered by live score, with circuit-open ones skipped.
+
+        Half-open instances are included; call claim() right before each request.
+        """
+        self._load()
+        now = time.time()
+        with _lock:
+            usable = [(instance, dict(_stats.get(instance, {}))) for instance in instances
+                      if self._state(_stats.get(instance, {}), now) != "open"]
+        skipped = len(instances) - len(usable)
+        if skipped:
+            logger.info(f"Skipping {skipped} mirror(s) with open circuit")
+        # Stable sort keeps the configured order for instances with equal scores
+        usable.sort(key=lambda item: -self._score(item[1]))
+        return [instance for instance, _ in usable]
+
+    def claim(self, instance: str) -> bool:
+        """Whether to send a request to the instance now; False means skip it.
+
+        Closed circuits always pass. A half-open one lets a single probe through:
+        the first caller holds a PROBE_SECONDS claim (locally and in KV) and
+        everyone else skips the instance until record() closes or re-opens it.
+        """
+        now = time.time()
+        with _lock:
+            stats = _stats.get(instance, {})
+            state = self._state(stats, now)
+            if state != "half_open":
+                return state == "closed"
+            stats["open_until"] = now + self.PROBE_SECONDS
+        if self.redis:
+            try:
+                fresh = self.redis.hget(self.KEY, instance)
+                if fresh and self._state(json.loads(fresh), now) != "half_open":
+                    # Another instance already settled the circuit
+                    with _lock:
+                        _stats[instance] = json.loads(fresh)
+                    return self._state(_stats[instance], now) == "closed"
+                if not self.redis.set(f"{self.PROBE_KEY}:{instance}", "1", ex=self.PROBE_SECONDS, nx=True):
+                    return False  # Another instance holds the probe
+            except Exception as e:
+                logger.error(f"Mirror probe claim failed: {e}")
+        logger.info(f"Probing half-open mirror {instance}")
+        return True
+
+    def record(self, kind: str, instance: str, ok: bool, latency_ms: float, error: str = None):
+        """Record the outcome of one request to a mirror."""
+        now = time.time()
+        with _lock:
+            stats = _stats.setdefault(instance, {"kind": kind, "successes": 0, "failures": 0})
+            stats["kind"] = kind
+            previous = stats.get("latency_ms")
+            stats["latency_ms"] = round(latency_ms if previous is None else
+                                        (1 - self.LATENCY_ALPHA) * previous + self.LATENCY_ALPHA * latency_ms, 1)
+            if ok:
+                stats["successes"] = stats.get("successes", 0) + 1
+                stats["consecutive_failures"] = 0
+                stats["open_until"] = 0
+                stats["last_success"] = now
+            else:
+                stats["failures"] = stats.get("failures", 0) + 1
+                stats["consecutive_failures"] = stats.get("consecutive_failures", 0) + 1
+                stats["last_failure"] = now
+                stats["last_error"] = (error or "")[:200]
+                if stats["consecutive_failures"] >= self.FAILURE_THRESHOLD:
+                    stats["open_until"] = now + self.OPEN_SECONDS
+                    logger.warning(f"Mirror circuit opened for {instance}")
+            snapshot = json.dumps(stats)
+
+        if self.redis:
+            try:
+                self.redis.hset(self.KEY, instance, snapshot)
+            except Exception as e:
+                logger.error(f"Mirror registry save failed: {e}")
+
+    def scoreboard(self) -> List[dict]:
+        """All known instances with stats, state and score (best first per kind)."""
+        self._load()
+        now = time.time()
+        known = {i: "piped" for i in PIPED_INSTANCES}
+        known.update({i: "invidious" for i in INVIDIOUS_INSTANCES})
+        known.update({i: "nitter" for i in NITTER_INSTANCES})
+        with _lock:
+            for instance, stats in _stats.items():
+                known.setdefault(instance, stats.get("kind", "unknown"))
+            rows = []
+            for instance, kind in known.items():
+                stats = dict(_stats.get(instance, {}))
+                total = stats.get("successes", 0) + stats.get("failures", 0)
+                rows.append({
+                    "instance": instance,
+                    "kind": kind,
+                    "state": self._state(stats, now),
+                    "score": round(self._score(stats), 4),
+                    "success_rate": round(stats.get("successes", 0) / total, 3) if total else None,
+                    "requests": total,
+                    "latency_ms": stats.get("latency_ms"),
+                    "last_failure": stats.get("last_failure"),
+                    "last_error": stats.get("last_error"),
+                })
+        rows.sort(key=lambda r: (r["kind"], -r["score"]))
+        return rows
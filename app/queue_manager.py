@@ -1,14 +1,12 @@
 import json
+import time
+import hashlib
 import logging
-from datetime import datetime, timedelta
-from typing import List, Optional, Dict
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Dict, Any, Tuple
 from app.config import Config
 
-try:
-    from upstash_redis import Redis
-except ImportError:
-    Redis = None
-
 try:
     from zoneinfo import ZoneInfo
 except ImportError:
@@ -20,17 +18,55 @@ logger = logging.getLogger(__name__)
 CHICAGO_TZ = ZoneInfo("America/Chicago")
 
 
+# Process-wide Redis clients keyed by (url, token), reused across warm invocations
+_redis_clients: Dict[Tuple[str, str], Any] = {}
+_redis_lock = threading.Lock()
+
+
+def get_redis(config: Config) -> Optional[Any]:
+    """Shared Redis client for this KV, or None when KV isn't configured.
+    
+    Every manager in the process uses the same client, so its keep-alive HTTP
+    session (and TLS connection) is set up once instead of per object.
+    KV_REST_API_URL=memory:// selects the in-process stand-in (app/memory_kv.py).
+    """
+    if config.kv_url.startswith("memory://"):
+        from app.memory_kv import get_memory_redis
+        return get_memory_redis(config.kv_url)
+    if not config.kv_url or not config.kv_token:
+        return None
+    key = (config.kv_url, config.kv_token)
+    with _redis_lock:
+        client = _redis_clients.get(key)
+        if client is None:
+            try:
+                from upstash_redis import Redis  # Deferred: only paths that touch KV pay for it
+            except ImportError:
+                return None
+            client = _redis_clients[key] = Redis(url=config.kv_url, token=config.kv_token)
+        return client
+
+
+def kv_pipeline(redis, transaction: bool = False):
+    """Batch several KV commands into a single Upstash REST request.
+    
+    Queue commands on the returned object, then call .exec() to send them;
+    results come back as a list in command order. With transaction=True the
+    batch runs as MULTI/EXEC, so no other client's commands interleave.
+    """
+    return redis.multi() if transaction else redis.pipeline()
+
+
 class DailyPostTracker:
     """Tracks daily post count to enforce 5 posts per weekday limit."""
     DAILY_KEY_PREFIX = "daily_posts"
     MAX_POSTS_PER_DAY = 5
+    POSTING_HOURS = (1, 6, 11, 16, 22)  # Chicago: 1am, 6am, 11am, 4pm, 10pm - one slot per daily post
     
     def __init__(self, config: Config):
-        if not config.kv_url or not config.kv_token:
-            self.redis = None
+        self.redis = get_redis(config)
+        if not self.redis:
             self._local_counts = {}
-        else:
-            self.redis = Redis(url=config.kv_url, token=config.kv_token)
     
     def _get_chicago_date(self) -> str:
         """Get current date in Chicago timezone as YYYY-MM-DD."""
@@ -66,14 +102,28 @@ class DailyPostTracker:
             self._local_counts[date_key] = self._local_counts.get(date_key, 0) + 1
             return self._local_counts[date_key]
         try:
-            new_count = self.redis.incr(self._daily_key())
+            pipe = kv_pipeline(self.redis)
+            pipe.incr(self._daily_key())
             # Set expiry to 48 hours (auto-cleanup)
-            self.redis.expire(self._daily_key(), 48 * 60 * 60)
+            pipe.expire(self._daily_key(), 48 * 60 * 60)
+            new_count, _ = pipe.exec()
             return new_count
         except Exception as e:
             logger.error(f"Redis increment daily count failed: {e}")
             return 0
     
+    def release_daily_slot(self) -> int:
+        """Give back a slot claimed by increment_daily_count (the post never went out)."""
+        if not self.redis:
+            date_key = self._get_chicago_date()
+            self._local_counts[date_key] = max(0, self._local_counts.get(date_key, 0) - 1)
+            return self._local_counts[date_key]
+        try:
+            return self.redis.decr(self._daily_key())
+        except Exception as e:
+            logger.error(f"Redis release daily slot failed: {e}")
+            return 0
+    
     def can_post_today(self) -> bool:
         """Check if we can still post today (under limit and is weekday)."""
         if not self.is_weekday():
@@ -86,92 +136,247 @@ class DailyPostTracker:
             return 0
         return max(0, self.MAX_POSTS_PER_DAY - self.get_daily_count())
 
+    def slot_time(self, index: int) -> datetime:
+        """Today's Chicago time for posting slot `index` (the last slot if past the end)."""
+        hour = self.POSTING_HOURS[min(index, len(self.POSTING_HOURS) - 1)]
+        return datetime.now(CHICAGO_TZ).replace(hour=hour, minute=0, second=0, microsecond=0)
+
+
+class TTLCache:
+    """Small thread-safe in-process cache with per-entry expiry and hit/miss counters.
+    
+    Lives at module level so warm serverless invocations reuse it; writers call
+    invalidate() so this process never serves its own stale data.
+    """
+    MISSING = object()
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key: str, ttl: float) -> Any:
+        """Cached value if stored less than ttl seconds ago, else MISSING."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry and time.time() - entry[0] < ttl:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return self.MISSING
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            self._data[key] = (time.time(), value)
+
+    def invalidate(self, *keys: str):
+        """Drop the given keys, or everything when called without keys."""
+        with self._lock:
+            if keys:
+                for key in keys:
+                    self._data.pop(key, None)
+            else:
+                self._data.clear()
+            self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+            }
+
 
 class ClientManager:
-    """Manages client configurations (name -> blotato_account_id mapping)."""
-    KEY = "linkedin_clients"
+    """Manages client configurations (name -> blotato_account_id mapping).
+    
+    Each client is one field of a KV hash (name -> JSON settings), so a lookup
+    or update touches only that client instead of the whole roster. Reads go
+    through a process-wide TTL cache (writes from this process invalidate it;
+    writes from other instances show up within CLIENT_CACHE_TTL seconds). The
+    legacy single-blob layout is migrated on first access.
+    """
+    KEY = "linkedin_clients_v2"  # hash: name -> JSON settings
+    LEGACY_KEY = "linkedin_clients"  # Single JSON blob of every client
+    ALL = "*"  # Cache key for the full roster
+    _migrated = set()  # KV URLs whose legacy blob this process already migrated
+    _cache = TTLCache()  # Shared by every instance: name / ALL -> settings (None = known missing)
+
+    # Merge settings into one client's JSON atomically: ARGV = name, JSON updates
+    MERGE_SCRIPT = """
+    local current = redis.call('HGET', KEYS[1], ARGV[1])
+    local data = current and cjson.decode(current) or {}
+    for k, v in pairs(cjson.decode(ARGV[2])) do data[k] = v end
+    local encoded = cjson.encode(data)
+    redis.call('HSET', KEYS[1], ARGV[1], encoded)
+    return encoded
+    """
     
     def __init__(self, config: Config):
         self.config = config
-        if not config.kv_url or not config.kv_token:
-            self.redis = None
+        self.redis = get_redis(config)
+        self.kv_url = config.kv_url
+        self.cache_ttl = config.client_cache_ttl
+        if not self.redis:
             self._local_clients = {}
-        else:
-            self.redis = Redis(url=config.kv_url, token=config.kv_token)
+
+    def _migrate_legacy(self):
+        """Split the legacy linkedin_clients blob into per-client hash fields."""
+        if not self.redis or self.kv_url in ClientManager._migrated:
+            return
+        try:
+            data = self.redis.get(self.LEGACY_KEY)
+            if data:
+                clients = json.loads(data)
+                tx = kv_pipeline(self.redis, transaction=True)
+                for name, info in clients.items():
+                    # Don't clobber clients already written in the new layout
+                    tx.hsetnx(self.KEY, name, json.dumps(info))
+                tx.delete(self.LEGACY_KEY)
+                tx.exec()
+                logger.info(f"Migrated {len(clients)} client(s) to per-client hash")
+            ClientManager._migrated.add(self.kv_url)
+        except Exception as e:
+            logger.error(f"Redis client migration failed: {e}")
+
+    def _merge(self, name: str, updates: dict) -> dict:
+        """Merge updates into a client's settings and return the result."""
+        if not self.redis:
+            client = self._local_clients.setdefault(name, {})
+            client.update(updates)
+            return dict(client)
+        self._migrate_legacy()
+        try:
+            merged = json.loads(self.redis.eval(self.MERGE_SCRIPT, keys=[self.KEY], args=[name, json.dumps(updates)]))
+        except Exception as e:
+            logger.error(f"Redis update client failed: {e}")
+            self._cache.invalidate(name, self.ALL)
+            return {}
+        self._store(name, merged)
+        return merged
+
+    def _store(self, name: str, client: Optional[dict]):
+        """Cache one client's new settings after a write; the roster is re-read next time."""
+        self._cache.invalidate(self.ALL)
+        self._cache.set(name, client)
+
+    @classmethod
+    def cache_stats(cls) -> Dict[str, Any]:
+        """Hit/miss counters for the shared client cache."""
+        return cls._cache.stats()
     
     def get_all(self) -> Dict[str, dict]:
         """Get all clients as {name: {blotato_account_id: ...}}"""
         if not self.redis:
             return self._local_clients
+        cached = self._cache.get(self.ALL, self.cache_ttl)
+        if cached is not TTLCache.MISSING:
+            return dict(cached)
+        self._migrate_legacy()
         try:
-            data = self.redis.get(self.KEY)
-            if not data:
-                return {}
-            return json.loads(data)
+            data = self.redis.hgetall(self.KEY) or {}
+            clients = {name: json.loads(raw) for name, raw in data.items()}
         except Exception as e:
             logger.error(f"Redis get clients failed: {e}")
             return {}
+        self._cache.set(self.ALL, clients)
+        for name, info in clients.items():
+            self._cache.set(name, info)
+        return dict(clients)
     
     def add_client(self, name: str, blotato_account_id: str, settings: dict = None):
         """Add or update a client."""
-        clients = self.get_all()
         client_data = {"blotato_account_id": blotato_account_id}
         if settings:
+            # Explicit settings replace the stored entry
             client_data.update(settings)
-        elif name in clients:
-            # Preserve existing settings if only updating ID
-            clients[name].update(client_data)
-            client_data = clients[name]
-        
-        clients[name] = client_data
-        if not self.redis:
-            self._local_clients = clients
+            if not self.redis:
+                self._local_clients[name] = client_data
+                return
+            self._migrate_legacy()
+            try:
+                self.redis.hset(self.KEY, name, json.dumps(client_data))
+                self._store(name, client_data)
+            except Exception as e:
+                logger.error(f"Redis set client failed: {e}")
+                self._cache.invalidate(name, self.ALL)
             return
-        try:
-            self.redis.set(self.KEY, json.dumps(clients))
-        except Exception as e:
-            logger.error(f"Redis set clients failed: {e}")
+        # Preserve existing settings if only updating ID
+        self._merge(name, client_data)
     
     def update_settings(self, name: str, settings: dict):
         """Update specific settings for a client."""
-        clients = self.get_all()
-        if name not in clients:
-            # Create the client entry if it doesn't exist (e.g., 'default')
-            clients[name] = {}
-        clients[name].update(settings)
-        if self.redis:
-            self.redis.set(self.KEY, json.dumps(clients))
-        else:
-            self._local_clients = clients
+        # Creates the client entry if it doesn't exist (e.g., 'default')
+        self._merge(name, settings)
     
     def get_client(self, name: str) -> Optional[dict]:
         """Get a single client's config."""
-        clients = self.get_all()
-        return clients.get(name)
+        if not self.redis:
+            return self._local_clients.get(name)
+        cached = self._cache.get(name, self.cache_ttl)
+        if cached is not TTLCache.MISSING:
+            return dict(cached) if cached else None
+        self._migrate_legacy()
+        try:
+            data = self.redis.hget(self.KEY, name)
+        except Exception as e:
+            logger.error(f"Redis get client failed: {e}")
+            return None
+        client = json.loads(data) if data else None
+        self._cache.set(name, client)
+        return dict(client) if client else None
     
     def remove_client(self, name: str):
         """Remove a client."""
-        clients = self.get_all()
-        if name in clients:
-            del clients[name]
-            if self.redis:
-                self.redis.set(self.KEY, json.dumps(clients))
-            else:
-                self._local_clients = clients
+        if not self.redis:
+            self._local_clients.pop(name, None)
+            return
+        self._migrate_legacy()
+        try:
+            self.redis.hdel(self.KEY, name)
+            self._store(name, None)
+        except Exception as e:
+            logger.error(f"Redis remove client failed: {e}")
+            self._cache.invalidate(name, self.ALL)
 
 
 class SimpleQueue:
-    """Manages a newline-separated list of URLs stored in Redis (Vercel KV)."""
-    KEY = "youtube_queue_v2"
+    """Per-client URL queues stored as Redis sorted sets (Vercel KV).
+    
+    Each queue is a zset of url -> enqueue timestamp, so push (ZADD NX) and
+    pop (ZPOPMIN) are atomic single round-trips and duplicates are ignored.
+    Legacy newline-joined string queues (youtube_queue_v2:*) are migrated
+    on first access per client.
+    
+    pop_next leases an item instead of deleting it: the URL sits in an
+    in-flight zset until ack/mark_done, goes back to the queue on nack or
+    lease expiry, and lands in a dead-letter list after MAX_ATTEMPTS.
+    """
+    KEY = "youtube_queue_v3"
+    LEGACY_KEY = "youtube_queue_v2"
     DONE_KEY = "youtube_done_v2"
+    INFLIGHT_KEY = "youtube_inflight_v3"  # zset: url -> lease deadline
+    ATTEMPTS_KEY = "youtube_attempts_v3"  # hash: url -> times leased
+    DEAD_KEY = "youtube_dead_v3"  # list of JSON dead-letter records
+    LEASE_SECONDS = 10 * 60
+    MAX_ATTEMPTS = 3
+    _migrated_clients = set()  # (KV URL, client) pairs this process already migrated
 
     def __init__(self, config: Config):
-        if not config.kv_url or not config.kv_token:
-            self.redis = None
+        self.redis = get_redis(config)
+        self.kv_url = config.kv_url
+        if not self.redis:
             logger.warning("KV_URL/KV_TOKEN not set. Queue will be in-memory (and temporary).")
             self._local_queues = {}
-        else:
-            self.redis = Redis(url=config.kv_url, token=config.kv_token)
+            self._local_inflight = {}
+            self._local_attempts = {}
+            self._local_dead = {}
 
     def _queue_key(self, client_id: str = "default") -> str:
         return f"{self.KEY}:{client_id}"
@@ -179,49 +384,312 @@ class SimpleQueue:
     def _done_key(self, client_id: str = "default") -> str:
         return f"{self.DONE_KEY}:{client_id}"
 
+    def _ensure_migrated(self, client_id: str):
+        """Move a legacy newline-joined queue into the zset, preserving order (once per KV and client)."""
+        if not self.redis or (self.kv_url, client_id) in self._migrated_clients:
+            return
+        legacy_key = f"{self.LEGACY_KEY}:{client_id}"
+        try:
+            data = self.redis.get(legacy_key)
+            if data:
+                urls = [u.strip() for u in data.split("\n") if u.strip()]
+                base = time.time() - 365 * 24 * 60 * 60
+                tx = kv_pipeline(self.redis, transaction=True)
+                if urls:
+                    # Legacy items were enqueued before anything in the new queue
+                    tx.zadd(self._queue_key(client_id), {url: base + i for i, url in enumerate(urls)}, nx=True)
+                tx.delete(legacy_key)
+                tx.exec()
+                logger.info(f"Migrated {len(urls)} legacy queue item(s) for {client_id}")
+            self._migrated_clients.add((self.kv_url, client_id))
+        except Exception as e:
+            logger.error(f"Redis legacy queue migration failed: {e}")
+
+    def migrate_all_legacy(self) -> int:
+        """Migrate every legacy youtube_queue_v2:* queue. Returns clients migrated."""
+        if not self.redis:
+            return 0
+        migrated = 0
+        cursor = 0
+        while True:
+            cursor, keys = self.redis.scan(cursor, match=f"{self.LEGACY_KEY}:*", count=100)
+            for key in keys:
+                client_id = key.split(":", 1)[1]
+                self._migrated_clients.discard((self.kv_url, client_id))
+                self._ensure_migrated(client_id)
+                migrated += 1
+            if cursor == 0:
+                break
+        return migrated
+
     def get_urls(self, client_id: str = "default") -> List[str]:
         if not self.redis:
-            return self._local_queues.get(client_id, [])
+            return list(self._local_queues.get(client_id, []))
+        self._ensure_migrated(client_id)
         try:
-            data = self.redis.get(self._queue_key(client_id))
-            if not data: return []
-            return [u.strip() for u in data.split("\n") if u.strip()]
+            return list(self.redis.zrange(self._queue_key(client_id), 0, -1))
         except Exception as e:
             logger.error(f"Redis get failed: {e}")
             return []
 
+    def count(self, client_id: str = "default") -> int:
+        if not self.redis:
+            return len(self._local_queues.get(client_id, []))
+        self._ensure_migrated(client_id)
+        try:
+            return self.redis.zcard(self._queue_key(client_id)) or 0
+        except Exception as e:
+            logger.error(f"Redis count failed: {e}")
+            return 0
+
     def set_urls(self, urls: List[str], client_id: str = "default"):
-        text = "\n".join(u.strip() for u in urls if u.strip())
+        """Replace the whole queue (keeps the given order)."""
+        urls = list(dict.fromkeys(u.strip() for u in urls if u.strip()))
         if not self.redis:
             self._local_queues[client_id] = urls
             return
+        self._ensure_migrated(client_id)
         try:
-            self.redis.set(self._queue_key(client_id), text)
+            key = self._queue_key(client_id)
+            base = time.time() - len(urls)
+            tx = kv_pipeline(self.redis, transaction=True)
+            tx.delete(key)
+            if urls:
+                tx.zadd(key, {url: base + i for i, url in enumerate(urls)})
+            tx.exec()
         except Exception as e:
             logger.error(f"Redis set failed: {e}")
 
     def add_url(self, url: str, client_id: str = "default"):
-        urls = self.get_urls(client_id)
-        if url not in urls:
-            urls.append(url)
-            self.set_urls(urls, client_id)
-
-    def pop_next(self, client_id: str = "default") -> Optional[str]:
-        urls = self.get_urls(client_id)
-        if not urls: return None
-        next_url = urls.pop(0)
-        self.set_urls(urls, client_id)
-        return next_url
+        url = url.strip()
+        if not self.redis:
+            urls = self._local_queues.setdefault(client_id, [])
+            if url not in urls:
+                urls.append(url)
+            return
+        self._ensure_migrated(client_id)
+        try:
+            # NX keeps the original position if the URL is already queued
+            self.redis.zadd(self._queue_key(client_id), {url: time.time()}, nx=True)
+        except Exception as e:
+            logger.error(f"Redis add failed: {e}")
+
+    def remove_url(self, url: str, client_id: str = "default") -> bool:
+        """Drop a URL whether queued or leased; a leased one won't be requeued by its nack/expiry."""
+        if not self.redis:
+            urls = self._local_queues.get(client_id, [])
+            inflight, attempts, _ = self._local_lease_state(client_id)
+            attempts.pop(url, None)
+            removed = inflight.pop(url, None) is not None
+            if url in urls:
+                urls.remove(url)
+                removed = True
+            return removed
+        self._ensure_migrated(client_id)
+        try:
+            tx = kv_pipeline(self.redis, transaction=True)
+            tx.zrem(self._queue_key(client_id), url)
+            self._queue_ack(tx, url, client_id)
+            queued, leased, _ = tx.exec()
+            return bool(queued or leased)
+        except Exception as e:
+            logger.error(f"Redis remove failed: {e}")
+            return False
+
+    def clear(self, client_id: str = "default"):
+        """Empty the queue and drop every lease (dead letters and history are kept)."""
+        if not self.redis:
+            self._local_queues[client_id] = []
+            inflight, attempts, _ = self._local_lease_state(client_id)
+            inflight.clear()
+            attempts.clear()
+            return
+        self._ensure_migrated(client_id)
+        try:
+            tx = kv_pipeline(self.redis, transaction=True)
+            tx.delete(self._queue_key(client_id))
+            tx.delete(f"{self.INFLIGHT_KEY}:{client_id}")
+            tx.delete(f"{self.ATTEMPTS_KEY}:{client_id}")
+            tx.exec()
+        except Exception as e:
+            logger.error(f"Redis clear failed: {e}")
+
+    # Requeue expired leases (dead-lettering items out of attempts), then pop + lease the head.
+    # KEYS: queue, inflight, attempts, dead | ARGV: now, lease deadline, max attempts, dead_at
+    POP_SCRIPT = """
+local expired = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1])
+for _, url in ipairs(expired) do
+  redis.call('ZREM', KEYS[2], url)
+  local attempts = tonumber(redis.call('HGET', KEYS[3], url) or '0')
+  if attempts >= tonumber(ARGV[3]) then
+    redis.call('HDEL', KEYS[3], url)
+    redis.call('LPUSH', KEYS[4], cjson.encode({url=url, attempts=attempts, error='lease expired', dead_at=ARGV[4]}))
+  else
+    redis.call('ZADD', KEYS[1], 'NX', ARGV[1], url)
+  end
+end
+local popped = redis.call('ZPOPMIN', KEYS[1])
+if #popped == 0 then return false end
+redis.call('ZADD', KEYS[2], ARGV[2], popped[1])
+redis.call('HINCRBY', KEYS[3], popped[1], 1)
+return popped[1]
+"""
+
+    # Release a lease after a failure: back to the queue, or dead-letter when out of attempts.
+    # KEYS: queue, inflight, attempts, dead | ARGV: url, now, max attempts, dead_at, error
+    NACK_SCRIPT = """
+if redis.call('ZREM', KEYS[2], ARGV[1]) == 0 then return 'missing' end
+local attempts = tonumber(redis.call('HGET', KEYS[3], ARGV[1]) or '0')
+if attempts >= tonumber(ARGV[3]) then
+  redis.call('HDEL', KEYS[3], ARGV[1])
+  redis.call('LPUSH', KEYS[4], cjson.encode({url=ARGV[1], attempts=attempts, error=ARGV[5], dead_at=ARGV[4]}))
+  return 'dead'
+end
+redis.call('ZADD', KEYS[1], 'NX', ARGV[2], ARGV[1])
+return 'requeued'
+"""
+
+    def _lease_keys(self, client_id: str) -> List[str]:
+        return [
+            self._queue_key(client_id),
+            f"{self.INFLIGHT_KEY}:{client_id}",
+            f"{self.ATTEMPTS_KEY}:{client_id}",
+            f"{self.DEAD_KEY}:{client_id}",
+        ]
+
+    def _local_lease_state(self, client_id: str):
+        return (
+            self._local_inflight.setdefault(client_id, {}),
+            self._local_attempts.setdefault(client_id, {}),
+            self._local_dead.setdefault(client_id, []),
+        )
+
+    def _local_release(self, url: str, client_id: str, error: str) -> str:
+        inflight, attempts, dead = self._local_lease_state(client_id)
+        if inflight.pop(url, None) is None:
+            return "missing"
+        if attempts.get(url, 0) >= self.MAX_ATTEMPTS:
+            dead.insert(0, {"url": url, "attempts": attempts.pop(url), "error": error,
+                            "dead_at": datetime.utcnow().isoformat()})
+            return "dead"
+        self.add_url(url, client_id)
+        return "requeued"
+
+    def pop_next(self, client_id: str = "default", lease_seconds: int = None) -> Optional[str]:
+        """Lease the next URL: it stays in-flight until ack/mark_done, or returns
+        to the queue when the lease expires (dead-lettered after MAX_ATTEMPTS)."""
+        lease_seconds = lease_seconds or self.LEASE_SECONDS
+        now = time.time()
+        if not self.redis:
+            inflight, attempts, _ = self._local_lease_state(client_id)
+            for url, deadline in list(inflight.items()):
+                if deadline <= now:
+                    self._local_release(url, client_id, "lease expired")
+            urls = self._local_queues.get(client_id, [])
+            if not urls:
+                return None
+            url = urls.pop(0)
+            inflight[url] = now + lease_seconds
+            attempts[url] = attempts.get(url, 0) + 1
+            return url
+        self._ensure_migrated(client_id)
+        try:
+            url = self.redis.eval(self.POP_SCRIPT, keys=self._lease_keys(client_id), args=[
+                str(now), str(now + lease_seconds), str(self.MAX_ATTEMPTS), datetime.utcnow().isoformat()
+            ])
+            return url or None
+        except Exception as e:
+            logger.error(f"Redis pop failed: {e}")
+            return None
+
+    def extend_lease(self, url: str, client_id: str = "default", lease_seconds: int = None) -> bool:
+        """Push a held lease's deadline out again. False if the URL is no longer leased."""
+        deadline = time.time() + (lease_seconds or self.LEASE_SECONDS)
+        if not self.redis:
+            inflight = self._local_lease_state(client_id)[0]
+            if url not in inflight:
+                return False
+            inflight[url] = deadline
+            return True
+        try:
+            # XX only touches an existing lease; CH makes the reply count that update
+            return bool(self.redis.zadd(f"{self.INFLIGHT_KEY}:{client_id}", {url: deadline}, xx=True, ch=True))
+        except Exception as e:
+            logger.error(f"Redis extend lease failed: {e}")
+            return False
+
+    def _queue_ack(self, tx, url: str, client_id: str):
+        tx.zrem(f"{self.INFLIGHT_KEY}:{client_id}", url)
+        tx.hdel(f"{self.ATTEMPTS_KEY}:{client_id}", url)
+
+    def ack(self, url: str, client_id: str = "default"):
+        """Finish a lease without recording history (e.g. item moved to preview)."""
+        if not self.redis:
+            inflight, attempts, _ = self._local_lease_state(client_id)
+            inflight.pop(url, None)
+            attempts.pop(url, None)
+            return
+        try:
+            tx = kv_pipeline(self.redis, transaction=True)
+            self._queue_ack(tx, url, client_id)
+            tx.exec()
+        except Exception as e:
+            logger.error(f"Redis ack failed: {e}")
+
+    def nack(self, url: str, client_id: str = "default", error: str = "") -> str:
+        """Release a lease after a failure. Returns 'requeued', 'dead' or 'missing'."""
+        error = (error or "failed")[:300]
+        if not self.redis:
+            return self._local_release(url, client_id, error)
+        self._ensure_migrated(client_id)
+        try:
+            return self.redis.eval(self.NACK_SCRIPT, keys=self._lease_keys(client_id), args=[
+                url, str(time.time()), str(self.MAX_ATTEMPTS), datetime.utcnow().isoformat(), error
+            ])
+        except Exception as e:
+            logger.error(f"Redis nack failed: {e}")
+            return "missing"
+
+    def get_dead(self, client_id: str = "default") -> List[dict]:
+        """Dead-lettered items, newest first."""
+        if not self.redis:
+            return list(self._local_lease_state(client_id)[2])
+        try:
+            items = self.redis.lrange(f"{self.DEAD_KEY}:{client_id}", 0, 49)
+            return [json.loads(i) for i in items]
+        except Exception as e:
+            logger.error(f"Redis dead-letter read failed: {e}")
+            return []
+
+    def retry_dead(self, client_id: str = "default") -> int:
+        """Move every dead-lettered item back to the queue. Returns how many."""
+        dead = self.get_dead(client_id)
+        for item in reversed(dead):
+            self.add_url(item["url"], client_id)
+        if not self.redis:
+            self._local_lease_state(client_id)[2].clear()
+            return len(dead)
+        try:
+            self.redis.delete(f"{self.DEAD_KEY}:{client_id}")
+        except Exception as e:
+            logger.error(f"Redis dead-letter clear failed: {e}")
+        return len(dead)
 
     def mark_done(self, url: str, client_id: str = "default"):
-        if not self.redis: return
+        """Ack the lease and record the URL in history (one transaction)."""
+        if not self.redis:
+            self.ack(url, client_id)
+            return
         try:
-            self.redis.lpush(self._done_key(client_id), json.dumps({
+            tx = kv_pipeline(self.redis, transaction=True)
+            self._queue_ack(tx, url, client_id)
+            tx.lpush(self._done_key(client_id), json.dumps({
                 "url": url,
                 "done_at": datetime.utcnow().isoformat()
             }))
             # Keep only last 20 done
-            self.redis.ltrim(self._done_key(client_id), 0, 19)
+            tx.ltrim(self._done_key(client_id), 0, 19)
+            tx.exec()
         except Exception as e:
             logger.error(f"Redis mark_done failed: {e}")
 
@@ -235,71 +703,223 @@ class SimpleQueue:
             return []
 
 
+class RunCheckpoint:
+    """Persists per-stage pipeline outputs so a failed run resumes instead of restarting.
+    
+    Keyed by URL + style + Blotato account, so two clients queueing the same
+    video never share (or post from) each other's run; each stage is one field
+    of a KV hash that expires after a day.
+    """
+    KEY_PREFIX = "run_checkpoint"
+    TTL_SECONDS = 24 * 60 * 60
+    _local_runs: Dict[str, Dict[str, Any]] = {}  # Shared in-memory fallback
+    
+    def __init__(self, config: Config, url: str, style: str = "default", account: str = ""):
+        run_hash = hashlib.md5(f"{url}|{style}|{account or ''}".encode()).hexdigest()[:16]
+        self.key = f"{self.KEY_PREFIX}:{run_hash}"
+        self.redis = get_redis(config)
+    
+    def load(self) -> Dict[str, Any]:
+        """Get all completed stages as {stage: output}."""
+        if not self.redis:
+            return dict(self._local_runs.get(self.key, {}))
+        try:
+            data = self.redis.hgetall(self.key) or {}
+            return {stage: json.loads(value) for stage, value in data.items()}
+        except Exception as e:
+            logger.error(f"Redis load checkpoint failed: {e}")
+            return {}
+    
+    def save(self, stage: str, output: Any):
+        """Persist one stage's output."""
+        if not self.redis:
+            self._local_runs.setdefault(self.key, {})[stage] = output
+            return
+        try:
+            pipe = kv_pipeline(self.redis)
+            pipe.hset(self.key, stage, json.dumps(output))
+            pipe.expire(self.key, self.TTL_SECONDS)
+            pipe.exec()
+        except Exception as e:
+            logger.error(f"Redis save checkpoint failed: {e}")
+    
+    def clear(self):
+        """Drop the checkpoint once the run has completed."""
+        if not self.redis:
+            self._local_runs.pop(self.key, None)
+            return
+        try:
+            self.redis.delete(self.key)
+        except Exception as e:
+            logger.error(f"Redis clear checkpoint failed: {e}")
+
+
 class ExperimentTracker:
     """Tracks post experiments and learns from winners."""
-    EXPERIMENTS_KEY = "post_experiments"
+    EXPERIMENTS_KEY = "post_experiments"  # Hash: post_id -> experiment JSON
+    INDEX_KEY = "post_experiments:index"  # Zset: post_id scored by created_at, oldest first
+    STATS_KEY = "experiment_stats"  # Hash of counters: exp|win:total, exp|win:<variation>, exp|win:<dim>:<option>
     WINNERS_KEY = "post_winners"
     WEIGHTS_KEY = "variation_weights"
+    MAX_EXPERIMENTS = 100
+    DIMENSIONS = ("hook", "structure", "closer", "cta")  # Order of the parts of a variation id
+    _backfilled = set()  # KV URLs whose index and counters this process already backfilled
     
     def __init__(self, config: Config):
-        if not config.kv_url or not config.kv_token:
-            self.redis = None
-        else:
-            self.redis = Redis(url=config.kv_url, token=config.kv_token)
+        self.redis = get_redis(config)
+        self.kv_url = config.kv_url
+    
+    @staticmethod
+    def _created_ts(experiment: dict) -> float:
+        """created_at (naive UTC ISO string) as a Unix timestamp; 0 if missing."""
+        try:
+            return datetime.fromisoformat(experiment["created_at"]).replace(tzinfo=timezone.utc).timestamp()
+        except (KeyError, TypeError, ValueError):
+            return 0.0
+    
+    @classmethod
+    def counter_fields(cls, variation: str) -> List[str]:
+        """Counter names for a variation: "total", the full variation and each "<dim>:<option>"."""
+        parts = variation.split("|")
+        fields = ["total", variation]
+        if len(parts) == len(cls.DIMENSIONS):
+            fields += [f"{dim}:{option}" for dim, option in zip(cls.DIMENSIONS, parts)]
+        return fields
+    
+    # Seed the counters from a snapshot of the stored experiments, unless they already exist: every
+    # HINCRBY comes after its process's backfill, so an existing hash already counts what it must.
+    # KEYS: stats | ARGV: field, count, field, count, ...
+    BACKFILL_STATS_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then return 0 end
+for i = 1, #ARGV, 2 do
+  redis.call('HSET', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+return 1
+"""
     
-    def log_experiment(self, post_id: str, variation: str, url: str, post_text: str):
-        """Log which variation was used for a post."""
+    # Trim the index to the newest ARGV[1] ids and drop the trimmed experiments in the same step.
+    # KEYS: experiments, index | ARGV: experiments to keep
+    EVICT_SCRIPT = """
+local overflow = -(tonumber(ARGV[1]) + 1)
+local evicted = redis.call('ZRANGE', KEYS[2], 0, overflow)
+if #evicted == 0 then return 0 end
+redis.call('ZREMRANGEBYRANK', KEYS[2], 0, overflow)
+redis.call('HDEL', KEYS[1], unpack(evicted))
+return #evicted
+"""
+    
+    def _backfill(self):
+        """Index and count experiments logged before the zset index / counters existed."""
+        if self.kv_url in ExperimentTracker._backfilled:
+            return
+        try:
+            pipe = kv_pipeline(self.redis)
+            pipe.hlen(self.EXPERIMENTS_KEY)
+            pipe.zcard(self.INDEX_KEY)
+            pipe.exists(self.STATS_KEY)
+            stored, indexed, has_stats = pipe.exec()
+            if (stored or 0) > (indexed or 0) or (stored and not has_stats):
+                experiments = [json.loads(data) for data in (self.redis.hgetall(self.EXPERIMENTS_KEY) or {}).values()]
+                self.redis.zadd(self.INDEX_KEY, {e["post_id"]: self._created_ts(e) for e in experiments}, nx=True)
+                if not has_stats:
+                    counts: Dict[str, int] = {}
+                    for e in experiments:
+                        kinds = ("exp", "win") if e.get("is_winner") else ("exp",)
+                        for field in self.counter_fields(e.get("variation", "unknown")):
+                            for kind in kinds:
+                                counts[f"{kind}:{field}"] = counts.get(f"{kind}:{field}", 0) + 1
+                    args = [item for pair in counts.items() for item in pair]
+                    self.redis.eval(self.BACKFILL_STATS_SCRIPT, keys=[self.STATS_KEY], args=args)
+                logger.info(f"Backfilled index/counters for {len(experiments)} experiment(s)")
+            ExperimentTracker._backfilled.add(self.kv_url)
+        except Exception as e:
+            logger.error(f"Experiment backfill failed: {e}")
+    
+    def log_experiment(self, post_id: str, variation: str, url: str, post_text: str,
+                       propensity: Dict[str, float] = None):
+        """Log which variation was used for a post (and how likely each pick was), keeping the newest MAX_EXPERIMENTS."""
         if not self.redis:
             return
+        self._backfill()
         try:
+            created = datetime.utcnow()
             data = {
                 "post_id": post_id,
                 "variation": variation,
                 "url": url,
                 "post_preview": post_text[:500],
-                "created_at": datetime.utcnow().isoformat(),
+                "created_at": created.isoformat(),
                 "is_winner": False
             }
-            self.redis.hset(self.EXPERIMENTS_KEY, post_id, json.dumps(data))
-            # Keep last 100 experiments
-            all_keys = self.redis.hkeys(self.EXPERIMENTS_KEY)
-            if len(all_keys) > 100:
-                oldest = sorted(all_keys)[:len(all_keys) - 100]
-                for k in oldest:
-                    self.redis.hdel(self.EXPERIMENTS_KEY, k)
+            if propensity:
+                data["propensity"] = propensity
+            tx = kv_pipeline(self.redis, transaction=True)
+            tx.hset(self.EXPERIMENTS_KEY, post_id, json.dumps(data))
+            tx.zadd(self.INDEX_KEY, {post_id: created.replace(tzinfo=timezone.utc).timestamp()})
+            for field in self.counter_fields(variation):
+                tx.hincrby(self.STATS_KEY, f"exp:{field}", 1)
+            tx.exec()
+            # If this fails, index and hash still agree; the next log trims both
+            self.redis.eval(self.EVICT_SCRIPT, keys=[self.EXPERIMENTS_KEY, self.INDEX_KEY],
+                            args=[str(self.MAX_EXPERIMENTS)])
         except Exception as e:
             logger.error(f"Log experiment failed: {e}")
     
+    # Mark one experiment a winner and count the win, once: a second call finds is_winner set.
+    # Counter fields mirror counter_fields(): total, the variation, and <dim>:<option> when it splits into DIMENSIONS.
+    # KEYS: experiments, stats, winners | ARGV: post_id, won_at, winners to keep, *DIMENSIONS
+    WIN_SCRIPT = """
+local data = redis.call('HGET', KEYS[1], ARGV[1])
+if not data then return 'missing' end
+local experiment = cjson.decode(data)
+if experiment['is_winner'] then return 'already' end
+experiment['is_winner'] = true
+experiment['won_at'] = ARGV[2]
+local encoded = cjson.encode(experiment)
+redis.call('HSET', KEYS[1], ARGV[1], encoded)
+local variation = experiment['variation'] or 'unknown'
+redis.call('HINCRBY', KEYS[2], 'win:total', 1)
+redis.call('HINCRBY', KEYS[2], 'win:' .. variation, 1)
+local parts = {}
+for part in string.gmatch(variation, '[^|]+') do parts[#parts + 1] = part end
+if #parts == #ARGV - 3 then
+  for i, part in ipairs(parts) do
+    redis.call('HINCRBY', KEYS[2], 'win:' .. ARGV[i + 3] .. ':' .. part, 1)
+  end
+end
+redis.call('LPUSH', KEYS[3], encoded)
+redis.call('LTRIM', KEYS[3], 0, tonumber(ARGV[3]) - 1)
+return encoded
+"""
+    
     def mark_winner(self, post_id: str):
-        """Mark a post as a winner - performed well."""
+        """Mark a post as a winner - performed well. Marking it again is a no-op.
+        
+        The check and the win counters run as one script, so concurrent marks
+        (e.g. a double-tapped Telegram button) count the win once.
+        """
         if not self.redis:
             return False
+        self._backfill()
         try:
-            data = self.redis.hget(self.EXPERIMENTS_KEY, post_id)
-            if not data:
+            outcome = self.redis.eval(self.WIN_SCRIPT, keys=[self.EXPERIMENTS_KEY, self.STATS_KEY, self.WINNERS_KEY],
+                                      args=[post_id, datetime.utcnow().isoformat(), "50", *self.DIMENSIONS])
+            if outcome == "missing":
                 return False
-            experiment = json.loads(data)
-            experiment["is_winner"] = True
-            experiment["won_at"] = datetime.utcnow().isoformat()
-            
-            # Update experiment record
-            self.redis.hset(self.EXPERIMENTS_KEY, post_id, json.dumps(experiment))
-            
-            # Add to winners list
-            self.redis.lpush(self.WINNERS_KEY, json.dumps(experiment))
-            self.redis.ltrim(self.WINNERS_KEY, 0, 49)  # Keep last 50 winners
+            if outcome == "already":
+                return True  # Already counted
             
             # Update variation weights
-            self._update_weights(experiment["variation"])
+            self._update_weights(json.loads(outcome).get("variation", "unknown"))
             return True
         except Exception as e:
             logger.error(f"Mark winner failed: {e}")
             return False
     
-    def _update_weights(self, winning_variation: str):
+    def _update_weights(self, winning_variation: str, weights: Dict[str, float] = None):
         """Increase weight for winning variation."""
         try:
-            weights = self.get_weights()
+            weights = self.get_weights() if weights is None else weights
             current = weights.get(winning_variation, 1.0)
             weights[winning_variation] = min(current + 0.5, 5.0)  # Cap at 5x
             self.redis.set(self.WEIGHTS_KEY, json.dumps(weights))
@@ -329,31 +949,42 @@ class ExperimentTracker:
             return []
     
     def get_stats(self) -> Dict:
-        """Get experiment statistics."""
+        """Get experiment statistics from the running counters (one round-trip)."""
         if not self.redis:
             return {"total": 0, "winners": 0, "weights": {}}
+        self._backfill()
         try:
-            total = self.redis.hlen(self.EXPERIMENTS_KEY) or 0
-            winners = self.redis.llen(self.WINNERS_KEY) or 0
-            weights = self.get_weights()
+            pipe = kv_pipeline(self.redis)
+            pipe.hgetall(self.STATS_KEY)
+            pipe.get(self.WEIGHTS_KEY)
+            pipe.hlen(self.EXPERIMENTS_KEY)
+            counters, weights_data, stored = pipe.exec()
+            weights = json.loads(weights_data) if weights_data else {}
             
-            # Count by variation
+            # Split counters into totals, per-variation and per-dimension-option counts
+            totals = {"exp": 0, "win": 0}
             variation_counts = {}
             winner_counts = {}
-            all_experiments = self.redis.hgetall(self.EXPERIMENTS_KEY) or {}
-            for exp_data in all_experiments.values():
-                exp = json.loads(exp_data)
-                var = exp.get("variation", "unknown")
-                variation_counts[var] = variation_counts.get(var, 0) + 1
-                if exp.get("is_winner"):
-                    winner_counts[var] = winner_counts.get(var, 0) + 1
+            dimension_counts = {}
+            for name, value in (counters or {}).items():
+                kind, field = name.split(":", 1)
+                value = int(value)
+                if field == "total":
+                    totals[kind] = value
+                elif field.split(":", 1)[0] in self.DIMENSIONS:
+                    entry = dimension_counts.setdefault(field, {"experiments": 0, "wins": 0})
+                    entry["experiments" if kind == "exp" else "wins"] = value
+                else:
+                    (variation_counts if kind == "exp" else winner_counts)[field] = value
             
             return {
-                "total_experiments": total,
-                "total_winners": winners,
+                "total_experiments": totals["exp"],  # Ever logged; only the newest MAX_EXPERIMENTS are stored
+                "stored_experiments": stored or 0,
+                "total_winners": totals["win"],
                 "weights": weights,
                 "variation_counts": variation_counts,
-                "winner_counts": winner_counts
+                "winner_counts": winner_counts,
+                "dimension_counts": dimension_counts
             }
         except Exception as e:
             logger.error(f"Get stats failed: {e}")
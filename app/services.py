@@ -1,34 +1,70 @@
 import time
-import json
+import asyncio
 import hashlib
 import logging
 import re
-import random
+import threading
 import requests
-from typing import Optional, Dict, Any, Tuple
-
-# Third-party SDKs
-try:
-    from google import genai
-except ImportError:
-    genai = None
-
-try:
-    from anthropic import Anthropic
-except ImportError:
-    Anthropic = None
-
-from youtube_transcript_api import YouTubeTranscriptApi
-from youtube_transcript_api.proxies import GenericProxyConfig
-from youtube_transcript_api.formatters import TextFormatter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, Dict, Any, Tuple, List, Callable, Awaitable
 
 from app.config import Config
 from app.utils import extract_youtube_id, detect_platform
 from app.twitter_service import TwitterService
+from app.transcript_cache import TranscriptCache, ChunkSummaryCache
+from app.chunking import split_into_chunks, note_word_budget, join_notes, MAX_DIGEST_ROUNDS, MAX_MAP_WORKERS
+from app.mirrors import MirrorRegistry, PIPED_INSTANCES, INVIDIOUS_INSTANCES
+from app.queue_manager import RunCheckpoint, ExperimentTracker
+from app.bandit import ThompsonSampler
+from app.concurrency import provider_slot
+from app.kie import KieClient
+from app import http_client
 
 logger = logging.getLogger(__name__)
 
 
+# =============================================================================
+# SDK CLIENTS - imported and built on first use, shared per API key
+# =============================================================================
+
+# Process-wide clients keyed by (provider, api_key), reused across warm invocations
+_sdk_clients: Dict[Tuple[str, str], Any] = {}
+_sdk_lock = threading.Lock()
+
+
+def new_gemini_client(api_key: str):
+    """Fresh genai.Client (the google.genai import is deferred to here)."""
+    from google import genai
+    return genai.Client(api_key=api_key)
+
+
+def new_anthropic_client(api_key: str, use_async: bool = False):
+    """Fresh Anthropic / AsyncAnthropic client (the anthropic import is deferred to here)."""
+    if use_async:
+        from anthropic import AsyncAnthropic
+        return AsyncAnthropic(api_key=api_key)
+    from anthropic import Anthropic
+    return Anthropic(api_key=api_key)
+
+
+def shared_sdk_client(provider: str, api_key: str, factory: Callable[[str], Any]) -> Any:
+    """Cached factory(api_key), or None if the key is missing or the SDK can't load.
+    
+    Failures are cached too, so a missing SDK is logged once per process.
+    """
+    if not api_key:
+        return None
+    key = (provider, api_key)
+    with _sdk_lock:
+        if key not in _sdk_clients:
+            try:
+                _sdk_clients[key] = factory(api_key)
+            except Exception as e:
+                logger.error(f"Failed to init {provider} client: {e}")
+                _sdk_clients[key] = None
+        return _sdk_clients[key]
+
+
 # =============================================================================
 # STYLE VARIATIONS - Experiment with different approaches
 # =============================================================================
@@ -87,6 +123,27 @@ CTA_VARIATIONS = {
 }
 
 
+# =============================================================================
+# RUN_ALL STAGE GRAPH - stage -> stages it depends on
+# =============================================================================
+
+# content -> digest -> {summary -> brief -> image -> upload, post_text}
+RUN_STAGE_DEPS = {
+    "content": (),
+    "digest": ("content",),
+    "summary": ("digest",),
+    "brief": ("summary",),
+    "image": ("brief",),
+    "upload": ("image",),
+    "post_text": ("digest",),
+}
+
+# Stages whose failure doesn't fail the run (we post without an image)
+OPTIONAL_STAGES = ("image", "upload")
+
+BLOTATO_POSTS_URL = "https://backend.blotato.com/v2/posts"
+
+
 class ContentPipeline:
     def __init__(self, config: Config, url: str = "", blotato_account_id: str = None, style: str = "default"):
         self.cfg = config
@@ -96,34 +153,38 @@ class ContentPipeline:
         self.blotato_account_id = blotato_account_id or config.blotato_account_id
         self.style = style
         self.experiment_variation = None  # Track which variation was used
-        
-        # Initialize Gemini Client
-        if config.gemini_api_key and genai:
-            try:
-                self.gemini_client = genai.Client(api_key=config.gemini_api_key)
-            except Exception as e:
-                logger.error(f"Failed to init Gemini client: {e}")
-                self.gemini_client = None
-        else:
-            self.gemini_client = None
-            
-        # Initialize Anthropic Client
-        if config.anthropic_api_key and Anthropic:
-            try:
-                self.anthropic_client = Anthropic(api_key=config.anthropic_api_key)
-            except Exception as e:
-                logger.error(f"Failed to init Anthropic client: {e}")
-                self.anthropic_client = None
-        else:
-            self.anthropic_client = None
+        self.experiment_propensity = None  # Per dimension: probability the sampler picked that option
+        self.transcript_timings = {}  # Per-backend timing from the last transcript race
+        self.transcript_source = None  # Backend that won the last transcript race
+        self._transcript_race_done = threading.Event()
+        self.transcript_cache = TranscriptCache(config)
+        self.chunk_cache = ChunkSummaryCache(config)
+        self.mirrors = MirrorRegistry(config)
+
+    # SDK clients are built on first use (posting-only paths never import the SDKs)
+    @property
+    def gemini_client(self):
+        return shared_sdk_client("gemini", self.cfg.gemini_api_key, new_gemini_client)
+
+    @property
+    def anthropic_client(self):
+        return shared_sdk_client("anthropic", self.cfg.anthropic_api_key, new_anthropic_client)
 
     def get_content(self) -> str:
-        """Fetches content based on platform."""
+        """Fetches content based on platform (served from the transcript cache when possible)."""
+        cached = self.transcript_cache.get(self.url)
+        if cached:
+            self.transcript_source = "cache"
+            return cached
+        
         if self.platform == "twitter":
-            ts = TwitterService(self.cfg.scrapingdog_api_key)
-            return ts.get_tweet_text(self.url)
+            ts = TwitterService(self.cfg.scrapingdog_api_key, mirrors=self.mirrors)
+            content = ts.get_tweet_text(self.url)
         else:
-            return self.get_transcript()
+            content = self.get_transcript()
+        
+        self.transcript_cache.put(self.url, content)
+        return content
 
     def _parse_caption_text(self, vtt_content: str) -> str:
         """Extract plain text from VTT/SRT caption format."""
@@ -141,26 +202,26 @@ class ContentPipeline:
         return ' '.join(text_lines)
 
     def _fetch_transcript_via_piped(self, video_id: str) -> str:
-        """Fallback: fetch transcript via Piped instances."""
-        piped_instances = [
-            "https://pipedapi.kavin.rocks",
-            "https://pipedapi.adminforge.de", 
-            "https://api.piped.yt",
-            "https://pipedapi.in.projectsegfau.lt",
-        ]
-        
-        for instance in piped_instances:
+        """Fallback: fetch transcript via Piped instances (healthiest first)."""
+        for instance in self.mirrors.ranked(PIPED_INSTANCES):
+            if self._transcript_race_done.is_set():
+                return None  # Another backend already won the race
+            if not self.mirrors.claim(instance):
+                continue  # Another caller is probing this half-open mirror
+            start = time.time()
             try:
                 # Piped streams endpoint includes captions
                 streams_url = f"{instance}/streams/{video_id}"
-                resp = requests.get(streams_url, timeout=15, headers={
+                resp = http_client.get(streams_url, retries=0, timeout=15, headers={
                     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
                 })
                 if resp.status_code != 200:
                     logger.warning(f"Piped {instance} returned {resp.status_code}")
+                    self.mirrors.record("piped", instance, False, (time.time() - start) * 1000, f"HTTP {resp.status_code}")
                     continue
                 
                 data = resp.json()
+                self.mirrors.record("piped", instance, True, (time.time() - start) * 1000)
                 subtitles = data.get("subtitles", [])
                 
                 # Find English subtitles
@@ -169,7 +230,7 @@ class ContentPipeline:
                     if lang.startswith("en"):
                         sub_url = sub.get("url", "")
                         if sub_url:
-                            sub_resp = requests.get(sub_url, timeout=15)
+                            sub_resp = http_client.get(sub_url, timeout=15)
                             if sub_resp.status_code == 200:
                                 transcript = self._parse_caption_text(sub_resp.text)
                                 if transcript:
@@ -177,34 +238,32 @@ class ContentPipeline:
                                     return transcript
             except Exception as e:
                 logger.warning(f"Piped {instance} failed: {e}")
+                self.mirrors.record("piped", instance, False, (time.time() - start) * 1000, str(e))
                 continue
         
         return None  # Return None to try next fallback
 
     def _fetch_transcript_via_invidious(self, video_id: str) -> str:
-        """Fallback: fetch transcript via Invidious instances when YouTube blocks."""
-        instances = [
-            "https://inv.nadeko.net",
-            "https://yewtu.be",
-            "https://invidious.nerdvpn.de",
-            "https://inv.tux.pizza",
-            "https://invidious.projectsegfau.lt",
-            "https://vid.puffyan.us",
-            "https://invidious.fdn.fr",
-        ]
-        
-        for instance in instances:
+        """Fallback: fetch transcript via Invidious instances when YouTube blocks (healthiest first)."""
+        for instance in self.mirrors.ranked(INVIDIOUS_INSTANCES):
+            if self._transcript_race_done.is_set():
+                return None  # Another backend already won the race
+            if not self.mirrors.claim(instance):
+                continue  # Another caller is probing this half-open mirror
+            start = time.time()
             try:
                 # Get available captions
                 captions_url = f"{instance}/api/v1/captions/{video_id}"
-                resp = requests.get(captions_url, timeout=10, headers={
+                resp = http_client.get(captions_url, retries=0, timeout=10, headers={
                     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
                 })
                 if resp.status_code != 200:
                     logger.warning(f"Invidious {instance} returned {resp.status_code}")
+                    self.mirrors.record("invidious", instance, False, (time.time() - start) * 1000, f"HTTP {resp.status_code}")
                     continue
                 
                 data = resp.json()
+                self.mirrors.record("invidious", instance, True, (time.time() - start) * 1000)
                 captions = data.get("captions", [])
                 
                 # Find English track
@@ -214,7 +273,7 @@ class ContentPipeline:
                         track_url = track.get('url', '')
                         if not track_url.startswith('http'):
                             track_url = f"{instance}{track_url}"
-                        track_resp = requests.get(track_url, timeout=15, headers={
+                        track_resp = http_client.get(track_url, timeout=15, headers={
                             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
                         })
                         if track_resp.status_code == 200:
@@ -224,6 +283,7 @@ class ContentPipeline:
                                 return transcript
             except Exception as e:
                 logger.warning(f"Invidious {instance} failed: {e}")
+                self.mirrors.record("invidious", instance, False, (time.time() - start) * 1000, str(e))
                 continue
         
         return None  # Return None to try next fallback
@@ -233,7 +293,7 @@ class ContentPipeline:
         try:
             # Get video page to extract caption tracks
             watch_url = f"https://www.youtube.com/watch?v={video_id}"
-            resp = requests.get(watch_url, timeout=15, headers={
+            resp = http_client.get(watch_url, timeout=15, headers={
                 "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
                 "Accept-Language": "en-US,en;q=0.9",
             })
@@ -254,7 +314,7 @@ class ContentPipeline:
                         base_url = track.get("baseUrl", "")
                         if base_url:
                             # Fetch the transcript
-                            caption_resp = requests.get(base_url, timeout=15, headers={
+                            caption_resp = http_client.get(base_url, timeout=15, headers={
                                 "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
                             })
                             if caption_resp.status_code == 200:
@@ -288,15 +348,12 @@ class ContentPipeline:
         
         return base_url
 
-    def get_transcript(self) -> str:
-        """Fetches and formats transcript from YouTube with multiple fallbacks."""
-        video_id = extract_youtube_id(self.url)
-        if not video_id:
-            raise ValueError("No valid video ID extracted from URL")
-
-        errors = []
+    def _fetch_transcript_via_api(self, video_id: str) -> str:
+        """Primary: YouTubeTranscriptApi with proxy (fresh session each time)."""
+        from youtube_transcript_api import YouTubeTranscriptApi
+        from youtube_transcript_api.proxies import GenericProxyConfig
+        from youtube_transcript_api.formatters import TextFormatter
         
-        # Method 1: Try YouTubeTranscriptApi with proxy (fresh session each time)
         proxy_config = None
         fresh_proxy = self._get_fresh_proxy_url()
         if fresh_proxy:
@@ -308,74 +365,139 @@ class ContentPipeline:
         else:
             logger.warning("No PROXY_URL configured - YouTube will likely block requests")
         
+        ytt_api = YouTubeTranscriptApi(proxy_config=proxy_config)
+        fetched_transcript = ytt_api.fetch(video_id, languages=['en', 'en-US', 'en-GB'])
+        formatter = TextFormatter()
+        logger.info("Successfully fetched transcript via YouTubeTranscriptApi")
+        return formatter.format_transcript(fetched_transcript)
+
+    def _transcript_backends(self, video_id: str) -> List[Tuple[str, Callable[[], Optional[str]]]]:
+        """Transcript backends in priority order (used as start order when racing)."""
+        return [
+            ("YouTubeTranscriptApi", lambda: self._fetch_transcript_via_api(video_id)),
+            ("Piped", lambda: self._fetch_transcript_via_piped(video_id)),
+            ("Invidious", lambda: self._fetch_transcript_via_invidious(video_id)),
+            ("YouTubei", lambda: self._fetch_transcript_via_youtubei(video_id)),
+        ]
+
+    @staticmethod
+    def _timed_fetch(fetch: Callable[[], Optional[str]]) -> Tuple[Optional[str], Optional[str], float]:
+        """Run one backend, returning (transcript, error, elapsed_ms)."""
+        start = time.time()
         try:
-            ytt_api = YouTubeTranscriptApi(proxy_config=proxy_config)
-            fetched_transcript = ytt_api.fetch(video_id, languages=['en', 'en-US', 'en-GB'])
-            formatter = TextFormatter()
-            logger.info("Successfully fetched transcript via YouTubeTranscriptApi")
-            return formatter.format_transcript(fetched_transcript)
+            result, error = fetch(), None
         except Exception as e:
-            logger.warning(f"YouTubeTranscriptApi failed: {e}")
-            errors.append(f"YouTubeTranscriptApi: {e}")
+            result, error = None, str(e)
+        return result, error, round((time.time() - start) * 1000, 1)
+
+    def get_transcript(self) -> str:
+        """Fetches transcript from YouTube by racing the fallback backends.
         
-        # Method 2: Try Piped API
-        logger.info("Trying Piped fallback...")
-        try:
-            result = self._fetch_transcript_via_piped(video_id)
-            if result:
-                return result
-            errors.append("Piped: No transcript found")
-        except Exception as e:
-            logger.warning(f"Piped fallback failed: {e}")
-            errors.append(f"Piped: {e}")
+        Up to `transcript_fanout` backends run at once (remaining ones start as
+        slots free up, in priority order). The first non-empty transcript wins and
+        the rest are cancelled. Per-backend timings are kept on
+        `self.transcript_timings` and the winner on `self.transcript_source`.
+        """
+        video_id = extract_youtube_id(self.url)
+        if not video_id:
+            raise ValueError("No valid video ID extracted from URL")
+
+        backends = self._transcript_backends(video_id)
+        fanout = max(1, min(self.cfg.transcript_fanout or 1, len(backends)))
+        logger.info(f"Racing {len(backends)} transcript backends (fanout={fanout})...")
         
-        # Method 3: Try Invidious
-        logger.info("Trying Invidious fallback...")
-        try:
-            result = self._fetch_transcript_via_invidious(video_id)
-            if result:
-                return result
-            errors.append("Invidious: No transcript found")
-        except Exception as e:
-            logger.warning(f"Invidious fallback failed: {e}")
-            errors.append(f"Invidious: {e}")
+        self._transcript_race_done.clear()
+        self.transcript_timings = {name: {"status": "cancelled"} for name, _ in backends}
+        self.transcript_source = None
+        errors = []
         
-        # Method 4: Try direct YouTube page scraping
-        logger.info("Trying YouTubei fallback...")
+        executor = ThreadPoolExecutor(max_workers=fanout, thread_name_prefix="transcript")
         try:
-            result = self._fetch_transcript_via_youtubei(video_id)
-            if result:
-                return result
-            errors.append("YouTubei: No transcript found")
-        except Exception as e:
-            logger.warning(f"YouTubei fallback failed: {e}")
-            errors.append(f"YouTubei: {e}")
+            futures = {executor.submit(self._timed_fetch, fetch): name for name, fetch in backends}
+            for future in as_completed(futures):
+                name = futures[future]
+                transcript, error, elapsed_ms = future.result()
+                if transcript:
+                    self.transcript_timings[name] = {"status": "won", "ms": elapsed_ms}
+                    self.transcript_source = name
+                    logger.info(f"Transcript race won by {name} in {elapsed_ms}ms")
+                    return transcript
+                
+                self.transcript_timings[name] = {"status": "failed", "ms": elapsed_ms}
+                if error:
+                    logger.warning(f"{name} failed: {error}")
+                    errors.append(f"{name}: {error}")
+                else:
+                    errors.append(f"{name}: No transcript found")
+        finally:
+            # Stop the losers: queued backends never start, running ones bail between instances
+            self._transcript_race_done.set()
+            executor.shutdown(wait=False, cancel_futures=True)
         
         # All methods failed
         raise RuntimeError(f"TRANSCRIPT_FAILED: All methods failed to get transcript. Errors: {'; '.join(errors)}")
 
-    def generate_summary(self, content: str) -> str:
-        """Uses Gemini to summarize the content."""
+    def _summary_prompt(self, content: str) -> str:
+        source_label = "YouTube transcript" if self.platform == "youtube" else "Tweet text"
+        return f"Summarize this {source_label} into a structured guide with Title, Key Points, and Workflow. Return plain text.\n\nCONTENT:\n{content}"
+
+    def _gemini(self, prompt: str, label: str) -> str:
         if not self.gemini_client:
             raise RuntimeError("Gemini API key not configured or SDK missing")
-            
-        source_label = "YouTube transcript" if self.platform == "youtube" else "Tweet text"
-        prompt = f"Summarize this {source_label} into a structured guide with Title, Key Points, and Workflow. Return plain text.\n\nCONTENT:\n{content}"
         try:
-            response = self.gemini_client.models.generate_content(
-                model=self.cfg.gemini_model,
-                contents=prompt
-            )
+            with provider_slot(self.cfg, "gemini"):
+                response = self.gemini_client.models.generate_content(
+                    model=self.cfg.gemini_model,
+                    contents=prompt
+                )
             return response.text
         except Exception as e:
-            logger.error(f"Gemini summary failed: {e}")
-            raise RuntimeError(f"Gemini generation failed: {e}")
+            logger.error(f"Gemini {label} failed: {e}")
+            raise RuntimeError(f"Gemini {label} generation failed: {e}")
+
+    def _chunk_prompts(self, text: str) -> List[str]:
+        """Map step: one note-taking prompt per chunk, sized so the joined notes fit the digest bound."""
+        chunks = split_into_chunks(text, self.cfg.summary_chunk_chars)
+        max_words = note_word_budget(self.cfg.digest_max_chars, len(chunks))
+        source_label = "YouTube transcript" if self.platform == "youtube" else "text"
+        return [
+            f"This is part {i} of {len(chunks)} of a long {source_label}. Write dense notes on this part "
+            f"in at most {max_words} words: key points, concrete numbers, names, tools and steps, in the "
+            f"order they come up. Return plain text.\n\nCONTENT:\n{chunk}"
+            for i, chunk in enumerate(chunks, 1)
+        ]
 
-    def generate_brief(self, summary: str) -> str:
-        """Uses Gemini to create an infographic brief."""
-        if not self.gemini_client:
-            raise RuntimeError("Gemini API key not configured")
-        
+    def _chunk_notes(self, prompt: str) -> str:
+        """Notes for one chunk, from the chunk cache when this exact prompt was summarized before."""
+        key = self.chunk_cache.key_for(self.cfg.gemini_model, prompt)
+        notes = self.chunk_cache.get_key(key)
+        if not notes:
+            notes = self._gemini(prompt, "chunk summary")
+            self.chunk_cache.put_key(key, notes)
+        return notes
+
+    def build_digest(self, content: str) -> str:
+        """Bounded stand-in for the content that Gemini and Claude work from.
+
+        Content up to DIGEST_MAX_CHARS passes through unchanged. Longer content
+        (multi-hour transcripts) is split into chunks whose notes are generated
+        concurrently and joined in order; the summary stage is the reduce step.
+        """
+        text = content
+        for _ in range(MAX_DIGEST_ROUNDS):
+            if len(text) <= self.cfg.digest_max_chars:
+                return text
+            prompts = self._chunk_prompts(text)
+            logger.info(f"Digesting {len(text)} chars in {len(prompts)} chunks")
+            with ThreadPoolExecutor(max_workers=min(len(prompts), MAX_MAP_WORKERS)) as pool:
+                text = join_notes(list(pool.map(self._chunk_notes, prompts)))
+        return text[:self.cfg.digest_max_chars]
+
+    def generate_summary(self, content: str) -> str:
+        """Uses Gemini to summarize the content."""
+        return self._gemini(self._summary_prompt(content), "summary")
+
+    def _brief_prompt(self, summary: str) -> str:
         # For SoulPrint style, replace AI tool mentions and add branding
         if self.style == "soulprint":
             summary = self._replace_ai_mentions(summary)
@@ -402,16 +524,11 @@ SUMMARY:
 {summary}"""
         else:
             prompt = f"Create an infographic design brief for LinkedIn (16:9) from this summary. Focus on visual hierarchy. Plain text.\n\nSUMMARY:\n{summary}"
-        
-        try:
-            response = self.gemini_client.models.generate_content(
-                model=self.cfg.gemini_model,
-                contents=prompt
-            )
-            return response.text
-        except Exception as e:
-            logger.error(f"Gemini brief failed: {e}")
-            raise RuntimeError(f"Gemini brief generation failed: {e}")
+        return prompt
+
+    def generate_brief(self, summary: str) -> str:
+        """Uses Gemini to create an infographic brief."""
+        return self._gemini(self._brief_prompt(summary), "brief")
 
     def _replace_ai_mentions(self, text: str) -> str:
         """Replace mentions of competitor AI tools with SoulPrint."""
@@ -426,12 +543,8 @@ SUMMARY:
             text = re.sub(pattern, 'SoulPrint', text, flags=re.IGNORECASE)
         return text
 
-    def generate_image_kie(self, brief: str) -> str:
-        """Generates an image using Kie.ai."""
-        if not self.cfg.kie_api_key:
-            raise RuntimeError("Kie API key not configured")
-        
-        # For SoulPrint style, prepend strict color instructions
+    def _kie_prompt(self, brief: str) -> str:
+        """Image prompt for Kie, with strict color instructions for SoulPrint."""
         if self.style == "soulprint":
             color_prefix = """STRICT COLOR PALETTE - DO NOT DEVIATE:
 - Background: Pure BLACK (#000000)
@@ -444,98 +557,48 @@ The logo will be added separately. Focus only on the infographic content.
 
 """
             brief = color_prefix + brief
-            
-        headers = {
-            "Authorization": f"Bearer {self.cfg.kie_api_key}", 
-            "Content-Type": "application/json"
-        }
-        payload = {
-            "model": "nano-banana-pro", 
-            "input": {"prompt": brief, "aspect_ratio": "16:9"}
-        }
+        return brief
+
+    def submit_image_kie(self, brief: str) -> str:
+        """Submits a Kie.ai image job and returns its taskId immediately."""
+        return KieClient(self.cfg).submit(self._kie_prompt(brief))
+
+    def generate_image_kie(self, brief: str) -> str:
+        """Generates an image using Kie.ai (submit, then adaptive polling)."""
+        if not self.cfg.kie_api_key:
+            raise RuntimeError("Kie API key not configured")
         
-        try:
-            r = requests.post("https://api.kie.ai/api/v1/jobs/createTask", headers=headers, json=payload, timeout=10)
-            r.raise_for_status()
-            data = r.json()
-            task_id = data.get("data", {}).get("taskId")
-            if not task_id:
-                raise RuntimeError(f"No taskId returned from Kie: {data}")
-        except Exception as e:
-            raise RuntimeError(f"Kie task creation failed: {e}")
+        kie = KieClient(self.cfg)
+        # Hold a Kie slot for the whole job (submit + polling)
+        with provider_slot(self.cfg, "kie"):
+            task_id = kie.submit(self._kie_prompt(brief))
+            return kie.wait(task_id)
 
-        # Poll for completion
-        start_time = time.time()
-        while time.time() - start_time < 120: # 2 minute timeout
-            time.sleep(5)
-            try:
-                res = requests.get(
-                    "https://api.kie.ai/api/v1/jobs/recordInfo", 
-                    headers=headers, 
-                    params={"taskId": task_id},
-                    timeout=10
-                )
-                res_data = res.json()
-                state = res_data.get("data", {}).get("state")
-                
-                if state == "success":
-                    result_json = res_data.get("data", {}).get("resultJson")
-                    # Handle stringified JSON if necessary
-                    if isinstance(result_json, str):
-                        result_json = json.loads(result_json)
-                    
-                    urls = result_json.get("resultUrls", [])
-                    if urls:
-                        return urls[0]
-                    else:
-                        raise RuntimeError("Kie success but no URLs found")
-                        
-                if state == "fail":
-                    raise RuntimeError(f"Kie generation failed: {res_data}")
-            except Exception as e:
-                logger.warning(f"Kie polling error: {e}")
-                continue
-                
-        raise TimeoutError("Kie image generation timed out")
-
-    def _select_variation(self, weights: Dict[str, float] = None) -> Tuple[str, str, str, str, str]:
-        """Select variations for this post, weighted by past performance."""
-        weights = weights or {}
-        
-        def weighted_choice(options: dict, category: str) -> Tuple[str, str]:
-            """Choose from options, weighted by performance."""
-            items = list(options.items())
-            option_weights = []
-            for name, _ in items:
-                key = f"{category}:{name}"
-                option_weights.append(weights.get(key, 1.0))
-            
-            # Normalize and select
-            total = sum(option_weights)
-            r = random.random() * total
-            cumulative = 0
-            for (name, value), w in zip(items, option_weights):
-                cumulative += w
-                if r <= cumulative:
-                    return name, value
-            return items[-1]  # Fallback
-        
-        hook_name, hook_prompt = weighted_choice(HOOK_VARIATIONS, "hook")
-        struct_name, struct_prompt = weighted_choice(STRUCTURE_VARIATIONS, "structure")
-        closer_name, closer_prompt = weighted_choice(CLOSER_VARIATIONS, "closer")
-        cta_name, cta_prompt = weighted_choice(CTA_VARIATIONS, "cta")
-        
-        variation_id = f"{hook_name}|{struct_name}|{closer_name}|{cta_name}"
-        
-        return variation_id, hook_prompt, struct_prompt, closer_prompt, cta_prompt
-
-    def generate_post_claude(self, content: str, weights: Dict[str, float] = None) -> str:
-        """Generates a LinkedIn post using Claude with experimental variations."""
-        if not self.anthropic_client:
-            raise RuntimeError("Anthropic API key not configured or SDK missing")
+    def _select_variation(self, sampler: ThompsonSampler = None) -> Tuple[str, str, str, str, str]:
+        """Select variations for this post by Thompson sampling on past results (uniform without any).
+        
+        Each pick's propensity goes on experiment_propensity and is logged with the experiment.
+        """
+        sampler = sampler or ThompsonSampler()
+        tables = dict(zip(ExperimentTracker.DIMENSIONS, (HOOK_VARIATIONS, STRUCTURE_VARIATIONS,
+                                                          CLOSER_VARIATIONS, CTA_VARIATIONS)))
+        picks = {dim: sampler.choose(dim, table) for dim, table in tables.items()}
+        self.experiment_propensity = {
+            dim: round(sampler.propensity(dim, tables[dim], option), 4) for dim, option in picks.items()
+        }
+        
+        variation_id = "|".join(picks[dim] for dim in ExperimentTracker.DIMENSIONS)
         
+        return (variation_id, *(tables[dim][option] for dim, option in picks.items()))
+
+    def variation_sampler(self) -> ThompsonSampler:
+        """Bandit over the experiment counters so far (flat priors if KV is unavailable)."""
+        return ThompsonSampler.from_tracker(ExperimentTracker(self.cfg))
+
+    def _post_prompt(self, content: str, sampler: ThompsonSampler = None) -> str:
+        """Claude prompt with freshly selected variations (recorded on experiment_variation)."""
         # Select variations for this experiment
-        variation_id, hook_prompt, struct_prompt, closer_prompt, cta_prompt = self._select_variation(weights)
+        variation_id, hook_prompt, struct_prompt, closer_prompt, cta_prompt = self._select_variation(sampler)
         self.experiment_variation = variation_id
         logger.info(f"Using variation: {variation_id}")
         
@@ -583,84 +646,94 @@ ADDITIONAL FOR SOULPRINT:
 Replace ANY mention of AI tools (ChatGPT, GPT, Claude, Grok, Gemini, Copilot, Perplexity, OpenAI, AI assistant, LLM, etc.) with "SoulPrint" instead."""
         
         source_label = "tweet" if self.platform == "twitter" else "transcript"
-        prompt = f"{experimental_prompt}\n\nCONTENT ({source_label}):\n{content}\n\nWrite the post now. Return ONLY the post text, nothing else."
+        return f"{experimental_prompt}\n\nCONTENT ({source_label}):\n{content}\n\nWrite the post now. Return ONLY the post text, nothing else."
+
+    @staticmethod
+    def _post_text_from_message(msg) -> str:
+        """Plain post text from a Claude message, with stray hashtags removed."""
+        # Handle text block response
+        if hasattr(msg.content[0], 'text'):
+            post_text = msg.content[0].text
+        else:
+            post_text = str(msg.content)
+        
+        # Safety: remove any hashtags that slip through
+        post_text = re.sub(r'\n#\w+.*$', '', post_text, flags=re.MULTILINE)
+        post_text = re.sub(r'#\w+', '', post_text)
         
+        return post_text.strip()
+
+    def generate_post_claude(self, content: str, sampler: ThompsonSampler = None) -> str:
+        """Generates a LinkedIn post using Claude with experimental variations."""
+        if not self.anthropic_client:
+            raise RuntimeError("Anthropic API key not configured or SDK missing")
+        
+        prompt = self._post_prompt(content, sampler)
         try:
-            msg = self.anthropic_client.messages.create(
-                model=self.cfg.claude_model,
-                max_tokens=1500,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            # Handle text block response
-            if hasattr(msg.content[0], 'text'):
-                post_text = msg.content[0].text
-            else:
-                post_text = str(msg.content)
-            
-            # Safety: remove any hashtags that slip through
-            post_text = re.sub(r'\n#\w+.*$', '', post_text, flags=re.MULTILINE)
-            post_text = re.sub(r'#\w+', '', post_text)
-            
-            return post_text.strip()
+            with provider_slot(self.cfg, "anthropic"):
+                msg = self.anthropic_client.messages.create(
+                    model=self.cfg.claude_model,
+                    max_tokens=1500,
+                    messages=[{"role": "user", "content": prompt}]
+                )
+            return self._post_text_from_message(msg)
         except Exception as e:
             logger.error(f"Claude post generation failed: {e}")
             raise RuntimeError(f"Claude generation failed: {e}")
 
+    def _cloudinary_upload_request(self, image_url: str) -> Tuple[str, Dict[str, Any], str]:
+        """Signed fetch-upload request as (upload_url, form data, public_id)."""
+        timestamp = int(time.time())
+        public_id = f"yt_{timestamp}"
+        
+        # Generate signature
+        to_sign = f"public_id={public_id}&timestamp={timestamp}{self.cfg.cloudinary_api_secret}"
+        signature = hashlib.sha1(to_sign.encode()).hexdigest()
+        
+        # Fetch upload: Cloudinary pulls the image from the remote URL itself,
+        # so the bytes never pass through (or sit in memory in) this function
+        data = {
+            "file": image_url,
+            "api_key": self.cfg.cloudinary_api_key,
+            "timestamp": timestamp,
+            "public_id": public_id,
+            "signature": signature
+        }
+        
+        upload_url = f"https://api.cloudinary.com/v1_1/{self.cfg.cloudinary_cloud_name}/image/upload"
+        return upload_url, data, public_id
+
+    def _cloudinary_final_url(self, base_url: str, public_id: str) -> str:
+        # If SoulPrint style, add logo overlay using Cloudinary transformations
+        if self.style == "soulprint" and base_url:
+            # The SoulPrint logo is already on Cloudinary: Vector_1_opozvz
+            # Add it as overlay in bottom-right corner
+            # Transform URL to add overlay
+            # Format: /image/upload/l_Vector_1_opozvz,w_120,g_south_east,x_30,y_30/public_id
+            base_url = base_url.replace(
+                f"/image/upload/{public_id}",
+                f"/image/upload/l_Vector_1_opozvz,w_100,g_south_east,x_20,y_20/{public_id}"
+            )
+        return base_url
+
     def upload_cloudinary(self, image_url: str) -> str:
-        """Uploads an image URL to Cloudinary and returns the secure URL.
+        """Uploads an image URL to Cloudinary (fetched remotely) and returns the secure URL.
         If SoulPrint style, adds logo overlay."""
         if not self.cfg.cloudinary_cloud_name:
             return image_url # Fallback if not configured
             
         try:
-            # Download image first
-            r = requests.get(image_url, timeout=30)
-            r.raise_for_status()
-            
-            timestamp = int(time.time())
-            public_id = f"yt_{timestamp}"
-            
-            # Generate signature
-            to_sign = f"public_id={public_id}&timestamp={timestamp}{self.cfg.cloudinary_api_secret}"
-            signature = hashlib.sha1(to_sign.encode()).hexdigest()
-            
-            data = {
-                "api_key": self.cfg.cloudinary_api_key,
-                "timestamp": timestamp,
-                "public_id": public_id,
-                "signature": signature
-            }
-            files = {"file": r.content}
-            
-            upload_url = f"https://api.cloudinary.com/v1_1/{self.cfg.cloudinary_cloud_name}/image/upload"
-            res = requests.post(upload_url, data=data, files=files, timeout=30)
+            upload_url, data, public_id = self._cloudinary_upload_request(image_url)
+            with provider_slot(self.cfg, "cloudinary"):
+                res = http_client.post(upload_url, data=data, timeout=60)
             res.raise_for_status()
-            base_url = res.json().get("secure_url")
-            
-            # If SoulPrint style, add logo overlay using Cloudinary transformations
-            if self.style == "soulprint" and base_url:
-                # The SoulPrint logo is already on Cloudinary: Vector_1_opozvz
-                # Add it as overlay in bottom-right corner
-                # Transform URL to add overlay
-                # Format: /image/upload/l_Vector_1_opozvz,w_120,g_south_east,x_30,y_30/public_id
-                base_url = base_url.replace(
-                    f"/image/upload/{public_id}",
-                    f"/image/upload/l_Vector_1_opozvz,w_100,g_south_east,x_20,y_20/{public_id}"
-                )
-            
-            return base_url
+            return self._cloudinary_final_url(res.json().get("secure_url"), public_id)
         except Exception as e:
             logger.error(f"Cloudinary upload failed: {e}")
             return image_url # Return original on failure
 
-    def post_blotato(self, text: str, image_url: str, scheduled_time: str = None):
-        """Posts to LinkedIn via Blotato API.
-        
-        Args:
-            text: Post text content
-            image_url: URL of the image to attach
-            scheduled_time: Optional ISO 8601 timestamp for scheduled posting (e.g., '2026-01-20T16:00:00Z')
-        """
+    def _blotato_request(self, text: str, image_url: str, scheduled_time: str = None) -> Tuple[Dict[str, str], Dict[str, Any]]:
+        """Validated Blotato post request as (headers, payload)."""
         # Validate required credentials
         if not self.cfg.blotato_api_key or not self.cfg.blotato_api_key.strip():
             raise RuntimeError("BLOTATO_API_KEY is not configured")
@@ -698,14 +771,25 @@ Replace ANY mention of AI tools (ChatGPT, GPT, Claude, Grok, Gemini, Copilot, Pe
         # Add scheduled time if provided
         if scheduled_time:
             payload["scheduledTime"] = scheduled_time
+        return headers, payload
+
+    def post_blotato(self, text: str, image_url: str, scheduled_time: str = None):
+        """Posts to LinkedIn via Blotato API.
         
+        Args:
+            text: Post text content
+            image_url: URL of the image to attach
+            scheduled_time: Optional ISO 8601 timestamp for scheduled posting (e.g., '2026-01-20T16:00:00Z')
+        """
+        headers, payload = self._blotato_request(text, image_url, scheduled_time)
         try:
-            r = requests.post(
-                "https://backend.blotato.com/v2/posts",
-                headers=headers,
-                json=payload,
-                timeout=30
-            )
+            with provider_slot(self.cfg, "blotato"):
+                r = http_client.post(
+                    BLOTATO_POSTS_URL,
+                    headers=headers,
+                    json=payload,
+                    timeout=30
+                )
             r.raise_for_status()
             logger.info("Successfully posted to LinkedIn via Blotato")
             return r.json()
@@ -722,23 +806,142 @@ Replace ANY mention of AI tools (ChatGPT, GPT, Claude, Grok, Gemini, Copilot, Pe
             logger.error(f"Blotato post failed: {e}")
             raise RuntimeError(f"Blotato post failed: {e}")
 
-    def run_all(self, skip_post: bool = False) -> Dict[str, Any]:
+    @staticmethod
+    def _ready_stages(pending: Dict[str, Tuple[str, ...]], outputs: Dict[str, Any], failed: set) -> List[str]:
+        """Pop and return the pending stages whose dependencies are all done.
+        
+        Stages downstream of a failed stage are dropped from pending and marked failed.
+        """
+        blocked = [name for name, stage_deps in pending.items() if failed.intersection(stage_deps)]
+        while blocked:
+            for name in blocked:
+                pending.pop(name)
+                failed.add(name)
+            blocked = [name for name, stage_deps in pending.items() if failed.intersection(stage_deps)]
+        
+        ready = [name for name, stage_deps in pending.items() if all(d in outputs for d in stage_deps)]
+        for name in ready:
+            pending.pop(name)
+        return ready
+
+    async def _run_stage_graph(self, deps: Dict[str, Tuple[str, ...]],
+                               stage_fns: Dict[str, Callable[[Dict[str, Any]], Awaitable[Any]]],
+                               done: Dict[str, Any], on_complete: Callable[[str, Any], Awaitable[None]],
+                               optional: Tuple[str, ...] = ()) -> Dict[str, Any]:
+        """Runs stages as tasks on the running loop as soon as their dependencies are done.
+        
+        Independent branches run concurrently, so wall time is the longest branch.
+        Stages already in `done` are skipped. A failing optional stage skips its
+        dependents. A failing required stage stops new stages from starting; the
+        ones already running are finished (and checkpointed via on_complete, so
+        their paid calls are not repeated on rerun) before the error is re-raised.
+        """
+        outputs = dict(done)
+        pending = {name: stage_deps for name, stage_deps in deps.items() if name not in outputs}
+        failed = set()
+        running = {}
+        error = None
+        while pending or running:
+            if error is None:
+                for name in self._ready_stages(pending, outputs, failed):
+                    running[asyncio.ensure_future(stage_fns[name](dict(outputs)))] = name
+            
+            if not running:
+                break
+            
+            finished, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in finished:
+                name = running.pop(task)
+                try:
+                    outputs[name] = task.result()
+                except Exception as e:
+                    logger.error(f"Stage {name} failed: {e}")
+                    failed.add(name)
+                    if name not in optional and error is None:
+                        error = e
+                    continue
+                await on_complete(name, outputs[name])
+        if error is not None:
+            raise error
+        return outputs
+
+    def _stage_fns(self) -> Dict[str, Callable[[Dict[str, Any]], Awaitable[Any]]]:
+        """RUN_STAGE_DEPS stage -> coroutine function of the outputs so far.
+        
+        The stage methods here block, so each runs on a worker thread.
+        """
+        def post_text(o: Dict[str, Any]) -> Dict[str, Any]:
+            text = self.generate_post_claude(o["digest"], self.variation_sampler())
+            return {"text": text, "variation": self.experiment_variation,
+                    "propensity": self.experiment_propensity}
+        
+        blocking = {
+            "content": lambda o: self.get_content(),
+            "digest": lambda o: self.build_digest(o["content"]),
+            "summary": lambda o: self.generate_summary(o["digest"]),
+            "brief": lambda o: self.generate_brief(o["summary"]),
+            "image": lambda o: self.generate_image_kie(o["brief"]),
+            "upload": lambda o: self.upload_cloudinary(o["image"]),
+            "post_text": post_text,
+        }
+        return {name: (lambda o, fn=fn: asyncio.to_thread(fn, o)) for name, fn in blocking.items()}
+
+    async def _post(self, text: str, image_url: str):
+        """Final posting step of run_all."""
+        return await asyncio.to_thread(self.post_blotato, text, image_url)
+
+    async def aclose(self):
+        """Release per-run clients (the sync SDK and HTTP clients are shared, so nothing here)."""
+
+    async def run_all_async(self, skip_post: bool = False) -> Dict[str, Any]:
         """
         Runs the full pipeline. 
         If skip_post is True, it returns the generated data without posting to LinkedIn.
-        """
-        content = self.get_content()
-        summary = self.generate_summary(content)
-        brief = self.generate_brief(summary)
         
+        Stages follow RUN_STAGE_DEPS: the image branch (summary -> brief -> image ->
+        upload) and post_text run concurrently once the digest (the content, or
+        chunk notes for long transcripts) is available.
+        
+        Each stage's output is checkpointed under a run key (URL + style + account),
+        so a rerun after a failure resumes from the first missing stage instead of
+        repeating paid calls. The checkpoint is cleared once the run completes.
+        """
+        checkpoint = RunCheckpoint(self.cfg, self.url, self.style, self.blotato_account_id)
         try:
-            raw_img = self.generate_image_kie(brief)
-            final_img = self.upload_cloudinary(raw_img)
-        except Exception as e:
-            logger.error(f"Image generation pipeline failed: {e}")
-            final_img = "" # Continue without image if it fails
+            done = await asyncio.to_thread(checkpoint.load)
+            if done:
+                logger.info(f"Resuming run from checkpoint (done: {', '.join(sorted(done))})")
+            
+            async def save(name: str, output: Any):
+                if output:
+                    await asyncio.to_thread(checkpoint.save, name, output)
+            
+            outputs = await self._run_stage_graph(RUN_STAGE_DEPS, self._stage_fns(), done, save, OPTIONAL_STAGES)
+            result = self._run_result(outputs)
+
+            if not skip_post and result["image_url"]:
+                await self._post(result["post_text"], result["image_url"])
+                result["posted"] = True
+            else:
+                result["posted"] = False
             
-        post_text = self.generate_post_claude(content)
+            await asyncio.to_thread(checkpoint.clear)
+            return result
+        finally:
+            await self.aclose()
+
+    def run_all(self, skip_post: bool = False) -> Dict[str, Any]:
+        """Sync wrapper around run_all_async (must not be called from a running event loop)."""
+        return asyncio.run(self.run_all_async(skip_post))
+
+    def _run_result(self, outputs: Dict[str, Any]) -> Dict[str, Any]:
+        """run_all result from the stage outputs (before posting)."""
+        summary = outputs["summary"]
+        brief = outputs["brief"]
+        final_img = outputs.get("upload") or "" # Continue without image if it fails
+        post_text = outputs["post_text"]["text"]
+        self.experiment_variation = outputs["post_text"]["variation"]
+        self.experiment_propensity = outputs["post_text"].get("propensity")  # Absent in older checkpoints
         
         # Generate unique post ID for experiment tracking
         post_id = hashlib.md5(f"{self.url}:{time.time()}".encode()).hexdigest()[:12]
@@ -752,13 +955,9 @@ Replace ANY mention of AI tools (ChatGPT, GPT, Claude, Grok, Gemini, Copilot, Pe
             "brief": brief,
             "blotato_account_id": self.blotato_account_id,
             "post_id": post_id,
-            "variation": self.experiment_variation
+            "variation": self.experiment_variation,
+            "propensity": self.experiment_propensity,
+            "transcript_source": self.transcript_source,
+            "transcript_timings": self.transcript_timings
         }
-
-        if not skip_post and final_img:
-            self.post_blotato(post_text, final_img)
-            result["posted"] = True
-        else:
-            result["posted"] = False
-            
         return result
@@ -0,0 +1,350 @@
+"""Variation Simulator - Offline harness for tuning the variation learner.
+
+Runs selection policies (app.bandit) against experiment histories with no
+network: every store is a MemoryRedis (memory://sim/...), and the live runs
+go through the real ExperimentTracker code (log_experiment, mark_winner, the
+counters the bandit reads) just as production does.
+
+    python -m app.simulator synthetic --history 200 --rounds 1000 --runs 5
+    python -m app.bandit --rounds 1000 --runs 20         # same as synthetic with no history
+    python -m app.simulator export history.json        # dump post_experiments / post_winners from KV
+    python -m app.simulator replay history.json --rounds 1000
+
+A history is JSON in the KV shapes: {"post_experiments": {post_id: record},
+"post_winners": [record, ...]}. Records may be dicts or the JSON strings KV
+returns. For each history the harness reports:
+
+- live: each policy keeps posting from the history's state against a world
+  whose option win rates are known (synthetic) or estimated from the history
+  (replay). Regret, rounds to converge and selections/s come from here.
+- replay: off-policy evaluation on the logged events (per dimension, an event
+  counts when the policy picks the logged option). This is only unbiased for
+  uniformly selected events, so replay uses pre-bandit records alone: those
+  logged without a "propensity" (the bandit logs one with every pick). Bandit
+  picks are skipped rather than reweighted - a post's win depends on all four
+  dimensions, and per-dimension inverse-propensity weights can't undo the
+  bandit's choices in the other three. Live runs use every record.
+"""
+
+import json
+import time
+import random
+import argparse
+from typing import Any, Callable, Dict, List, Optional
+
+from app.config import Config
+from app.queue_manager import ExperimentTracker, get_redis
+from app.bandit import DIMENSIONS, ThompsonSampler, UniformPolicy, WeightedPolicy, variation_options
+
+CONVERGE_WINDOW = 50  # Rounds in the sliding window used for rounds-to-converge
+CONVERGE_SHARE = 0.6  # Best-option share the window must reach
+
+# Option win rates, "dimension:option" -> probability; a post's rate is the mean over its options
+World = Dict[str, float]
+History = Dict[str, Any]
+
+POLICIES: Dict[str, Callable[[random.Random], Any]] = {
+    "uniform": lambda rng: UniformPolicy(rng),
+    "weighted": lambda rng: WeightedPolicy(rng),
+    "thompson": lambda rng: ThompsonSampler(rng=rng),
+}
+
+
+# ------------------------------------------------------------------ histories
+
+def records(history: History) -> List[dict]:
+    """Every experiment in a history, oldest first (winners list merged in, deduplicated)."""
+    by_id = {}
+    for raw in list(history.get("post_experiments", {}).values()) + list(history.get("post_winners", [])):
+        record = json.loads(raw) if isinstance(raw, str) else dict(raw)
+        post_id = record.get("post_id")
+        if post_id:
+            # The winners list keeps records the experiments hash may have evicted
+            by_id[post_id] = {**by_id.get(post_id, {}), **record}
+    return sorted(by_id.values(), key=lambda r: r.get("created_at", ""))
+
+
+def variation_of(picks: Dict[str, str]) -> str:
+    return "|".join(picks[dim] for dim in DIMENSIONS)
+
+
+def parse_variation(variation: str) -> Optional[Dict[str, str]]:
+    parts = variation.split("|")
+    return dict(zip(DIMENSIONS, parts)) if len(parts) == len(DIMENSIONS) else None
+
+
+def pre_bandit(record: dict) -> bool:
+    """Logged by uniform selection: the bandit records a propensity with every pick."""
+    return not record.get("propensity")
+
+
+def post_rate(world: World, picks: Dict[str, str]) -> float:
+    return sum(world[f"{dim}:{option}"] for dim, option in picks.items()) / len(picks)
+
+
+def synthetic_world(options: Dict[str, List[str]], rng: random.Random,
+                    low: float = 0.02, high: float = 0.3) -> World:
+    return {f"{dim}:{option}": rng.uniform(low, high) for dim, opts in options.items() for option in opts}
+
+
+def estimated_world(history: History, options: Dict[str, List[str]]) -> World:
+    """Posterior-mean win rate per option from a history (Beta(1, 1) prior)."""
+    counts = {f"{dim}:{option}": [0, 0] for dim, opts in options.items() for option in opts}
+    for record in records(history):
+        picks = parse_variation(record.get("variation", ""))
+        for dim, option in (picks or {}).items():
+            if f"{dim}:{option}" in counts:
+                counts[f"{dim}:{option}"][0] += 1
+                counts[f"{dim}:{option}"][1] += int(bool(record.get("is_winner")))
+    return {key: (1 + wins) / (2 + experiments) for key, (experiments, wins) in counts.items()}
+
+
+def synthetic_history(world: World, options: Dict[str, List[str]], posts: int, rng: random.Random,
+                      start: float = 1.7e9) -> History:
+    """A history as uniform selection (today's behavior) would have logged it."""
+    experiments, winners = {}, []
+    for i in range(posts):
+        picks = {dim: rng.choice(opts) for dim, opts in options.items()}
+        won = rng.random() < post_rate(world, picks)
+        record = {
+            "post_id": f"hist{i:05d}",
+            "variation": variation_of(picks),
+            "url": "",
+            "post_preview": "",
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(start + i * 3600)),
+            "is_winner": won,
+        }
+        experiments[record["post_id"]] = record
+        if won:
+            winners.insert(0, record)
+    return {
+        "post_experiments": dict(list(experiments.items())[-ExperimentTracker.MAX_EXPERIMENTS:]),
+        "post_winners": winners[:50],
+    }
+
+
+def load_history(tracker: ExperimentTracker, history: History):
+    """Write a history into a (fresh) store in the tracker's KV layout."""
+    recs = records(history)
+    kept = recs[-ExperimentTracker.MAX_EXPERIMENTS:]
+    if kept:
+        tracker.redis.hset(tracker.EXPERIMENTS_KEY, values={r["post_id"]: json.dumps(r) for r in kept})
+    winners = [r for r in recs if r.get("is_winner")][-50:]
+    if winners:
+        tracker.redis.lpush(tracker.WINNERS_KEY, *[json.dumps(r) for r in winners])
+
+
+def export_history(config: Config) -> History:
+    """post_experiments and post_winners as stored in the configured KV."""
+    redis = get_redis(config)
+    if not redis:
+        raise RuntimeError("KV not configured")
+    experiments = redis.hgetall(ExperimentTracker.EXPERIMENTS_KEY) or {}
+    winners = redis.lrange(ExperimentTracker.WINNERS_KEY, 0, -1) or []
+    return {
+        "post_experiments": {post_id: json.loads(data) for post_id, data in experiments.items()},
+        "post_winners": [json.loads(data) for data in winners],
+    }
+
+
+# ------------------------------------------------------------------ live runs
+
+def rounds_to_converge(best_shares: List[float], window: int = CONVERGE_WINDOW,
+                       share: float = CONVERGE_SHARE) -> Optional[int]:
+    """First round whose trailing window picks the best options at least `share` of the time."""
+    total = sum(best_shares[:window])
+    for end in range(window, len(best_shares) + 1):
+        if total / window >= share:
+            return end
+        if end < len(best_shares):
+            total += best_shares[end] - best_shares[end - window]
+    return None
+
+
+def run_live(policy_name: str, world: World, options: Dict[str, List[str]], rounds: int,
+             history: History = None, seed: int = 0, store: str = "",
+             converge_share: float = CONVERGE_SHARE) -> Dict[str, Any]:
+    """Let one policy post `rounds` times through ExperimentTracker on a fresh memory store."""
+    rng = random.Random(seed)
+    tracker = ExperimentTracker(Config(kv_url=f"memory://sim/{store or policy_name}/{seed}", kv_token=""))
+    tracker.redis.flushall()  # Same URL as an earlier run in this process - start clean
+    ExperimentTracker._backfilled.discard(tracker.kv_url)
+    kv_backed = policy_name == "thompson"  # Reads its posterior from the tracker, like production
+    policy = None if kv_backed else POLICIES[policy_name](rng)
+    if history:
+        load_history(tracker, history)
+        for record in [] if kv_backed else records(history):
+            for dim, option in (parse_variation(record.get("variation", "")) or {}).items():
+                policy.update(dim, option, bool(record.get("is_winner")))
+
+    best = {dim: max(opts, key=lambda o: world[f"{dim}:{o}"]) for dim, opts in options.items()}
+    best_rate = post_rate(world, best)
+    regret, select_s, shares = 0.0, 0.0, []
+    started = time.perf_counter()
+    for round_no in range(rounds):
+        t0 = time.perf_counter()
+        chooser = ThompsonSampler.from_tracker(tracker, rng) if kv_backed else policy
+        picks = {dim: chooser.choose(dim, opts) for dim, opts in options.items()}
+        select_s += time.perf_counter() - t0
+
+        rate = post_rate(world, picks)
+        won = rng.random() < rate
+        regret += best_rate - rate
+        shares.append(sum(picks[dim] == best[dim] for dim in options) / len(options))
+
+        post_id = f"sim{round_no:06d}"
+        tracker.log_experiment(post_id, variation_of(picks), "", "")
+        if won:
+            tracker.mark_winner(post_id)
+        if not kv_backed:
+            for dim, option in picks.items():
+                policy.update(dim, option, won)
+    elapsed = time.perf_counter() - started
+
+    late = shares[-max(1, rounds // 5):]
+    return {
+        "regret": regret,
+        "converged_at": rounds_to_converge(shares, share=converge_share),
+        "best_share": sum(late) / len(late),
+        "selections_per_s": rounds / select_s if select_s else float("inf"),
+        "rounds_per_s": rounds / elapsed if elapsed else float("inf"),
+    }
+
+
+# ----------------------------------------------------------------- replay eval
+
+def run_replay(policy_name: str, history: History, options: Dict[str, List[str]], seed: int = 0) -> Dict[str, Any]:
+    """Off-policy replay on the pre-bandit events: per dimension, score the events where the
+    policy agrees with the log."""
+    policy = POLICIES[policy_name](random.Random(seed))
+    matched = wins = events = skipped = 0
+    for record in records(history):
+        picks = parse_variation(record.get("variation", ""))
+        if not picks:
+            continue
+        if not pre_bandit(record):
+            skipped += 1
+            continue
+        events += 1
+        won = bool(record.get("is_winner"))
+        for dim, logged in picks.items():
+            if dim in options and policy.choose(dim, options[dim]) == logged:
+                matched += 1
+                wins += won
+                policy.update(dim, logged, won)
+    return {"events": events, "skipped": skipped, "matched": matched,
+            "win_rate": wins / matched if matched else None}
+
+
+# ------------------------------------------------------------------ reporting
+
+def average(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    summary = {}
+    for metric in results[0]:
+        values = [r[metric] for r in results if r[metric] is not None]
+        summary[metric] = sum(values) / len(values) if values else None
+        if metric == "converged_at":
+            summary["converged_runs"] = len(values)
+    return summary
+
+
+def evaluate(history_for: Callable[[int], History], world_for: Callable[[int, History], World],
+             policies: List[str], rounds: int, runs: int, seed: int,
+             converge_share: float = CONVERGE_SHARE) -> Dict[str, Dict[str, Any]]:
+    """Live and replay results per policy, averaged over `runs` seeds."""
+    options = variation_options()
+    live = {name: [] for name in policies}
+    replay = {name: [] for name in policies}
+    for run in range(runs):
+        history = history_for(run)
+        world = world_for(run, history)
+        for name in policies:
+            live[name].append(run_live(name, world, options, rounds, history, seed=seed + run,
+                                       converge_share=converge_share))
+            replay[name].append(run_replay(name, history, options, seed=seed + run))
+    return {name: {"runs": runs, **average(live[name]), "replay": average(replay[name])} for name in policies}
+
+
+def format_report(results: Dict[str, Dict[str, Any]], rounds: int, converge_share: float = CONVERGE_SHARE) -> str:
+    lines = [
+        f"{'policy':<10} {'regret':>8} {'converged@':>11} {'best (last 20%)':>16} "
+        f"{'selections/s':>13} {'rounds/s':>9} {'replay win':>11} {'matched':>8}"
+    ]
+    for name, r in results.items():
+        converged = f"{r['converged_at']:.0f}" if r["converged_at"] is not None else "never"
+        if r["converged_at"] is not None and r["converged_runs"] < r["runs"]:
+            converged += f" ({r['converged_runs']}/{r['runs']})"
+        replay = r["replay"]
+        replay_rate = f"{replay['win_rate']:.1%}" if replay["win_rate"] is not None else "-"
+        lines.append(
+            f"{name:<10} {r['regret']:8.1f} {converged:>11} {r['best_share']:16.0%} "
+            f"{r['selections_per_s']:13,.0f} {r['rounds_per_s']:9,.0f} {replay_rate:>11} {replay['matched']:8.0f}"
+        )
+    lines.append(f"regret over {rounds} posts; converged@ = first round whose last {CONVERGE_WINDOW} posts "
+                 f"picked the best option {converge_share:.0%} of the time")
+    replay = next(iter(results.values()))["replay"]
+    if replay["skipped"]:
+        lines.append(f"replay used {replay['events']:.0f} pre-bandit events per run "
+                     f"and skipped {replay['skipped']:.0f} the bandit selected")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Replay experiment histories against variation selection policies.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--rounds", type=int, default=1000, help="Posts each policy makes in the live run")
+    common.add_argument("--runs", type=int, default=5, help="Seeds to average over")
+    common.add_argument("--seed", type=int, default=1)
+    common.add_argument("--converge-share", type=float, default=CONVERGE_SHARE,
+                        help="Best-option share that counts as converged")
+    common.add_argument("--policies", default=",".join(POLICIES), help="Comma-separated subset of: " + ", ".join(POLICIES))
+
+    synthetic = sub.add_parser("synthetic", parents=[common], help="Random worlds with known win rates")
+    synthetic.add_argument("--history", type=int, default=0, help="Uniformly selected posts logged before the run")
+    replay = sub.add_parser("replay", parents=[common], help="An exported history (win rates estimated from it)")
+    replay.add_argument("path")
+    export = sub.add_parser("export", help="Write the configured KV's experiment history to a file")
+    export.add_argument("path")
+    args = parser.parse_args(argv)
+
+    if args.command == "export":
+        history = export_history(Config())
+        with open(args.path, "w") as f:
+            json.dump(history, f, indent=1)
+        print(f"Exported {len(history['post_experiments'])} experiments, {len(history['post_winners'])} winners")
+        return
+
+    policies = [p.strip() for p in args.policies.split(",") if p.strip()]
+    unknown = [p for p in policies if p not in POLICIES]
+    if unknown:
+        parser.error(f"unknown policies: {', '.join(unknown)}")
+
+    options = variation_options()
+    if args.command == "synthetic":
+        worlds = {}
+
+        def world_for(run: int, history: History) -> World:
+            return worlds[run]
+
+        def history_for(run: int) -> History:
+            rng = random.Random(args.seed * 7919 + run)
+            worlds[run] = synthetic_world(options, rng)
+            return synthetic_history(worlds[run], options, args.history, rng)
+    else:
+        with open(args.path) as f:
+            loaded = json.load(f)
+
+        def history_for(run: int) -> History:
+            return loaded
+
+        def world_for(run: int, history: History) -> World:
+            return estimated_world(history, options)
+
+    results = evaluate(history_for, world_for, policies, args.rounds, args.runs, args.seed, args.converge_share)
+    print(format_report(results, args.rounds, args.converge_share))
+
+
+if __name__ == "__main__":
+    main()
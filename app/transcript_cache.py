@@ -0,0 +1,212 @@
+"""Transcript Cache - Skip the proxy/fallback chain for videos we've already fetched.
+
+Two tiers, both keyed by content ID (YouTube video ID or tweet ID):
+- Local disk (per serverless instance / local machine), LRU by file mtime
+- Upstash/Vercel KV (shared across instances), LRU via a sorted-set index
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+from typing import Optional
+
+from app.config import Config
+from app.utils import extract_youtube_id, extract_tweet_id, detect_platform
+from app.queue_manager import get_redis, kv_pipeline
+
+logger = logging.getLogger(__name__)
+
+
+def cache_key_for_url(url: str) -> str:
+    """Content-addressed cache key: 'yt:<video_id>' or 'tw:<tweet_id>'."""
+    if detect_platform(url) == "twitter":
+        tweet_id = extract_tweet_id(url)
+        return f"tw:{tweet_id}" if tweet_id else ""
+    video_id = extract_youtube_id(url)
+    return f"yt:{video_id}" if video_id else ""
+
+
+class TranscriptCache:
+    """Read-through transcript cache with TTL and size-bounded LRU eviction."""
+    KEY_PREFIX = "transcript_cache"
+    INDEX_KEY = "transcript_cache_index"  # zset: cache key -> last access time
+    DISK_DIR = "transcripts"
+    LABEL = "Transcript"
+
+    def __init__(self, config: Config):
+        self.ttl = config.transcript_cache_ttl
+        self.max_entries = config.transcript_cache_max_entries
+        self.cache_dir = os.path.join(config.cache_dir, self.DISK_DIR)
+        self.redis = get_redis(config)
+
+    # ---------------------------------------------------------------- public
+
+    def get(self, url: str) -> Optional[str]:
+        """Return the cached transcript for this URL, or None on miss."""
+        key = cache_key_for_url(url)
+        return self.get_key(key) if key else None
+
+    def put(self, url: str, content: str):
+        """Store a transcript in both tiers."""
+        key = cache_key_for_url(url)
+        if key:
+            self.put_key(key, content)
+
+    def get_key(self, key: str) -> Optional[str]:
+        """Cached content for a cache key (disk first, then KV), or None on miss."""
+        content = self._disk_get(key)
+        if content:
+            logger.info(f"{self.LABEL} cache hit (disk): {key}")
+            return content
+
+        content = self._kv_get(key)
+        if content:
+            logger.info(f"{self.LABEL} cache hit (kv): {key}")
+            self._disk_put(key, content)  # Warm the local tier
+            return content
+
+        return None
+
+    def put_key(self, key: str, content: str):
+        """Store content under a cache key in both tiers."""
+        if not content:
+            return
+        self._disk_put(key, content)
+        self._kv_put(key, content)
+
+    def invalidate(self, url: str):
+        """Drop a transcript from both tiers."""
+        key = cache_key_for_url(url)
+        if not key:
+            return
+        try:
+            os.remove(self._disk_path(key))
+        except OSError:
+            pass
+        if self.redis:
+            try:
+                pipe = kv_pipeline(self.redis)
+                pipe.delete(self._kv_key(key))
+                pipe.zrem(self.INDEX_KEY, key)
+                pipe.exec()
+            except Exception as e:
+                logger.error(f"Transcript cache invalidate failed: {e}")
+
+    # ------------------------------------------------------------- disk tier
+
+    def _disk_path(self, key: str) -> str:
+        digest = hashlib.sha256(key.encode()).hexdigest()[:32]
+        return os.path.join(self.cache_dir, f"{digest}.json")
+
+    def _disk_get(self, key: str) -> Optional[str]:
+        path = self._disk_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if time.time() - entry.get("stored_at", 0) > self.ttl:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+
+        try:
+            os.utime(path, None)  # Bump mtime = LRU touch
+        except OSError:
+            pass
+        return entry.get("content")
+
+    def _disk_put(self, key: str, content: str):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._disk_path(key)
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"key": key, "content": content, "stored_at": time.time()}, f)
+            os.replace(tmp_path, path)  # Atomic, so concurrent readers never see partial files
+            self._disk_evict()
+        except OSError as e:
+            logger.warning(f"Transcript disk cache write failed: {e}")
+
+    def _disk_evict(self):
+        """Remove least-recently-used entries beyond max_entries."""
+        try:
+            entries = [
+                os.path.join(self.cache_dir, name)
+                for name in os.listdir(self.cache_dir)
+                if name.endswith(".json")
+            ]
+        except OSError:
+            return
+        if len(entries) <= self.max_entries:
+            return
+        entries.sort(key=lambda p: os.path.getmtime(p) if os.path.exists(p) else 0)
+        for path in entries[:len(entries) - self.max_entries]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    # --------------------------------------------------------------- KV tier
+
+    def _kv_key(self, key: str) -> str:
+        return f"{self.KEY_PREFIX}:{key}"
+
+    def _kv_get(self, key: str) -> Optional[str]:
+        if not self.redis:
+            return None
+        try:
+            pipe = kv_pipeline(self.redis)
+            pipe.get(self._kv_key(key))
+            pipe.zadd(self.INDEX_KEY, {key: time.time()}, xx=True)  # LRU touch (only if indexed)
+            content, _ = pipe.exec()
+            return content or None
+        except Exception as e:
+            logger.error(f"Transcript cache KV get failed: {e}")
+            return None
+
+    def _kv_put(self, key: str, content: str):
+        if not self.redis:
+            return
+        try:
+            pipe = kv_pipeline(self.redis)
+            pipe.setex(self._kv_key(key), self.ttl, content)
+            pipe.zadd(self.INDEX_KEY, {key: time.time()})
+            pipe.zcard(self.INDEX_KEY)
+            size = pipe.exec()[-1] or 0
+
+            # Evict least-recently-used entries beyond max_entries
+            if size > self.max_entries:
+                stale = self.redis.zrange(self.INDEX_KEY, 0, size - self.max_entries - 1)
+                if stale:
+                    pipe = kv_pipeline(self.redis)
+                    pipe.delete(*[self._kv_key(k) for k in stale])
+                    pipe.zrem(self.INDEX_KEY, *stale)
+                    pipe.exec()
+        except Exception as e:
+            logger.error(f"Transcript cache KV put failed: {e}")
+
+
+class ChunkSummaryCache(TranscriptCache):
+    """Chunk summaries of long transcripts, keyed by a hash of the model and prompt.
+
+    Same two tiers as transcripts, so a retried or re-styled run of the same
+    video only pays for chunks it hasn't summarized yet.
+    """
+    KEY_PREFIX = "chunk_summary_cache"
+    INDEX_KEY = "chunk_summary_cache_index"
+    DISK_DIR = "chunk_summaries"
+    LABEL = "Chunk summary"
+
+    def __init__(self, config: Config):
+        super().__init__(config)
+        self.max_entries = config.chunk_cache_max_entries
+
+    @staticmethod
+    def key_for(model: str, prompt: str) -> str:
+        return hashlib.sha256(f"{model}\n{prompt}".encode()).hexdigest()[:32]
@@ -5,6 +5,9 @@ import requests
 import logging
 from typing import Dict, Any, Optional
 
+from app.mirrors import MirrorRegistry, NITTER_INSTANCES
+from app import http_client
+
 logger = logging.getLogger(__name__)
 
 def http_raise(resp: requests.Response) -> None:
@@ -17,8 +20,9 @@ def http_raise(resp: requests.Response) -> None:
     raise RuntimeError(f"HTTP {resp.status_code}: {detail}")
 
 class TwitterService:
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, mirrors: Optional[MirrorRegistry] = None):
         self.api_key = api_key
+        self.mirrors = mirrors
 
     def get_tweet_text(self, url: str) -> str:
         """
@@ -47,7 +51,7 @@ class TwitterService:
 
         for attempt in range(3):
             try:
-                r = requests.get(api_url, params=params, timeout=30)
+                r = http_client.get(api_url, retries=0, params=params, timeout=30)  # Retried by the loop
                 if r.status_code == 500 and attempt < 2:
                     time.sleep(1)
                     continue
@@ -65,20 +69,19 @@ class TwitterService:
         return text
 
     def _scrape_nitter(self, tweet_id: str) -> str:
-        """Uses a public Nitter instance as fallback."""
-        # Use a reliable Nitter instance
-        nitter_instances = [
-            "https://nitter.net",
-            "https://nitter.cz",
-            "https://nitter.it"
-        ]
+        """Uses a public Nitter instance as fallback (healthiest first when a registry is set)."""
+        nitter_instances = self.mirrors.ranked(NITTER_INSTANCES) if self.mirrors else NITTER_INSTANCES
         
         for instance in nitter_instances:
+            if self.mirrors and not self.mirrors.claim(instance):
+                continue  # Another caller is probing this half-open mirror
+            start = time.time()
             try:
                 logger.info(f"Trying Nitter ({instance}) for {tweet_id}...")
                 # Nitter format usually: instance/i/status/id
                 # But we can try the RSS feed or just the page
-                r = requests.get(f"{instance}/i/status/{tweet_id}", timeout=15)
+                r = http_client.get(f"{instance}/i/status/{tweet_id}", retries=0, timeout=15)
+                self._record(instance, r.ok, start, None if r.ok else f"HTTP {r.status_code}")
                 if r.ok:
                     # Very basic scrape from HTML
                     # Look for <div class="tweet-content media-body">
@@ -93,10 +96,15 @@ class TwitterService:
                             return f"Tweet (via Nitter): {text}"
             except Exception as e:
                 logger.warning(f"Nitter instance {instance} failed: {e}")
+                self._record(instance, False, start, str(e))
                 continue
                 
         raise RuntimeError(f"All scraping methods failed for tweet {tweet_id}")
 
+    def _record(self, instance: str, ok: bool, start: float, error: str = None):
+        if self.mirrors:
+            self.mirrors.record("nitter", instance, ok, (time.time() - start) * 1000, error)
+
     def _extract_id(self, url: str) -> str:
         match = re.search(r"/status/(\d+)", url)
         if match:
@@ -0,0 +1,273 @@
+"""Queue Worker - Long-running local process that drains the client queues.
+
+An alternative to the once-a-day /api/auto_process_all cron for running the
+bot on a machine of your own:
+
+    python -m app.worker                    # KV from the environment
+    KV_REST_API_URL=memory:// python -m app.worker --add drew=https://youtu.be/...
+
+It polls every client's SimpleQueue round-robin and keeps up to
+WORKER_CONCURRENCY pipelines in flight. Posting follows the same rules as the
+cron batch: weekdays only, at most DailyPostTracker.MAX_POSTS_PER_DAY a day,
+the n-th post of the day scheduled via Blotato for the n-th Chicago posting
+hour (or sent right away if that hour has passed). A slot opens
+WORKER_SLOT_LEAD seconds before its hour, leaving time to generate. Clients in
+preview mode don't use up posting slots (nothing posts until a preview is
+approved): each gets at most one preview per posting hour, sent to the admin
+chat. Queued Telegram /go jobs run too, whenever a pipeline is free.
+
+While a pipeline runs, its URL's lease is extended every third of
+SimpleQueue.LEASE_SECONDS, so a slow run (Kie backlog, provider slots) is not
+handed to a second worker mid-flight.
+
+SIGINT/SIGTERM stop leasing new work and wait for in-flight pipelines to
+finish; a second signal exits at once (leases expire and the URLs requeue).
+"""
+
+import os
+import signal
+import logging
+import argparse
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import Dict, List, Optional, Tuple
+
+from app.config import Config
+from app.queue_manager import SimpleQueue, ClientManager, DailyPostTracker, CHICAGO_TZ
+from app.jobs import JobQueue, run_job, generate_preview
+
+logger = logging.getLogger(__name__)
+
+
+class QueueWorker:
+    """Leases queued URLs and runs their pipelines on a thread pool until stopped."""
+
+    def __init__(self, config: Config, concurrency: int = None, poll_interval: float = None,
+                 run_jobs: bool = True):
+        self.cfg = config
+        self.concurrency = max(1, concurrency or config.worker_concurrency)
+        self.poll_interval = poll_interval if poll_interval is not None else config.worker_poll_interval
+        self.run_jobs = run_jobs
+        self.queue = SimpleQueue(config)
+        self.clients = ClientManager(config)
+        self.tracker = DailyPostTracker(config)
+        self.jobs = JobQueue(config)
+        self.stop_event = threading.Event()
+        self._next_client = 0  # Round-robin position across clients
+        self._previewed: Dict[str, datetime] = {}  # Preview-mode client -> posting hour last previewed
+
+    # ---------------------------------------------------------------- leasing
+
+    def client_names(self) -> List[str]:
+        return ['drew'] + [name for name in self.clients.get_all() if name != 'drew']
+
+    def in_preview_mode(self, client: str) -> bool:
+        return bool((self.clients.get_client(client) or {}).get('preview_mode', False))
+
+    def slot_due(self) -> Optional[Tuple[int, datetime]]:
+        """(index, time) of today's next posting slot if it is open now, else None."""
+        if not self.tracker.can_post_today():
+            return None
+        index = self.tracker.get_daily_count()
+        slot = self.tracker.slot_time(index)
+        now = datetime.now(CHICAGO_TZ)
+        if (slot - now).total_seconds() > self.cfg.worker_slot_lead:
+            return None
+        return index, slot
+
+    def preview_hour(self) -> Optional[datetime]:
+        """Today's latest posting hour that has opened, on weekdays; paces preview-mode clients."""
+        if not self.tracker.is_weekday():
+            return None
+        now = datetime.now(CHICAGO_TZ)
+        opened = [slot for slot in map(self.tracker.slot_time, range(len(self.tracker.POSTING_HOURS)))
+                  if (slot - now).total_seconds() <= self.cfg.worker_slot_lead]
+        return max(opened) if opened else None
+
+    def lease_next(self, names: List[str]) -> Optional[Tuple[str, str]]:
+        """(client, url) from the next non-empty queue among names, round-robin, or None."""
+        for offset in range(len(names)):
+            client = names[(self._next_client + offset) % len(names)]
+            url = self.queue.pop_next(client)
+            if url:
+                self._next_client = (self._next_client + offset + 1) % len(names)
+                return client, url
+        return None
+
+    def next_task(self) -> Optional[Tuple]:
+        """The next unit of work: a Telegram job, a preview due this posting hour, or a
+        queued URL whose posting slot is open."""
+        if self.run_jobs:
+            job = self.jobs.pop()
+            if job:
+                return ("job", job)
+
+        names = self.client_names()
+        hour = self.preview_hour()
+        if hour:
+            waiting = [n for n in names if self.in_preview_mode(n) and self._previewed.get(n) != hour]
+            leased = self.lease_next(waiting)
+            if leased:
+                self._previewed[leased[0]] = hour
+                return ("preview", *leased)
+
+        if not self.slot_due():
+            return None
+        leased = self.lease_next([n for n in names if not self.in_preview_mode(n)])
+        if not leased:
+            return None
+        # Claim the slot before generating, so concurrent items get successive posting hours
+        count = self.tracker.increment_daily_count()
+        if count > self.tracker.MAX_POSTS_PER_DAY:
+            logger.warning(f"Daily limit reached by another worker; returning {leased[1]}")
+            self.queue.nack(leased[1], leased[0], "daily limit reached")
+            return None
+        return ("url", leased[0], leased[1], self.tracker.slot_time(count - 1))
+
+    # -------------------------------------------------------------- execution
+
+    @contextmanager
+    def lease_heartbeat(self, client: str, url: str):
+        """Keep the URL's lease alive while the block runs."""
+        done = threading.Event()
+
+        def beat():
+            while not done.wait(self.queue.LEASE_SECONDS / 3):
+                if not self.queue.extend_lease(url, client):
+                    logger.warning(f"Lease lost for {url} ({client}); it was removed or expired")
+                    return
+
+        thread = threading.Thread(target=beat, name=f"lease-{client}", daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            done.set()
+
+    def process_preview(self, client: str, url: str) -> dict:
+        """Generate a preview for a preview-mode client's leased URL and send it for approval."""
+        with self.lease_heartbeat(client, url):
+            outcome = generate_preview(self.cfg, self.queue, self.cfg.telegram_admin_chat_id, client, url)
+        return {"client": client, "url": url, **outcome}
+
+    def process_url(self, client: str, url: str, slot: datetime) -> dict:
+        """Generate and schedule one leased URL in its claimed slot; ack/nack it accordingly."""
+        with self.lease_heartbeat(client, url):
+            return self._process_url(client, url, slot)
+
+    def _process_url(self, client: str, url: str, slot: datetime) -> dict:
+        from app.services import ContentPipeline
+
+        client_info = self.clients.get_client(client) or {}
+        # Schedule for the slot's hour; if it has already passed, post immediately
+        scheduled_time_str = None
+        schedule_display = "now"
+        if slot > datetime.now(CHICAGO_TZ):
+            scheduled_time_str = slot.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+            schedule_display = slot.strftime("%I:%M %p CT")
+        try:
+            pipeline = ContentPipeline(self.cfg, url,
+                                       blotato_account_id=client_info.get('blotato_account_id', self.cfg.blotato_account_id),
+                                       style=client_info.get('style', 'soulprint'))
+            result = pipeline.run_all(skip_post=True)  # Generate content but don't post yet
+            pipeline.post_blotato(result["post_text"], result["image_url"], scheduled_time=scheduled_time_str)
+            self.queue.mark_done(url, client)
+            return {"client": client, "url": url, "status": "scheduled", "scheduled": schedule_display}
+        except Exception as e:
+            logger.error(f"Worker failed for {client}: {e}")
+            outcome = self.queue.nack(url, client, str(e))
+            self.tracker.release_daily_slot()  # Nothing was posted; the slot goes to the next item
+            return {"client": client, "url": url, "status": "failed", "error": str(e), "queue": outcome}
+
+    def execute(self, task: Tuple) -> dict:
+        if task[0] == "job":
+            return run_job(self.cfg, task[1])
+        if task[0] == "preview":
+            return self.process_preview(*task[1:])
+        return self.process_url(*task[1:])
+
+    def run(self, once: bool = False) -> List[dict]:
+        """Poll and process until stopped (or, with once=True, until nothing is runnable)."""
+        results = []
+        in_flight: Dict[Future, Tuple] = {}
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="worker") as pool:
+            while not self.stop_event.is_set():
+                while len(in_flight) < self.concurrency and not self.stop_event.is_set():
+                    try:
+                        task = self.next_task()
+                    except Exception as e:
+                        logger.error(f"Worker poll failed: {e}")
+                        task = None
+                    if not task:
+                        break
+                    in_flight[pool.submit(self.execute, task)] = task
+
+                if in_flight:
+                    done, _ = wait(in_flight, timeout=self.poll_interval, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        in_flight.pop(future)
+                        results.append(self._collect(future))
+                elif once:
+                    break
+                else:
+                    self.stop_event.wait(self.poll_interval)  # Idle: long-poll, woken early by stop()
+
+            if in_flight:
+                logger.info(f"Stopping: waiting for {len(in_flight)} in-flight pipeline(s)")
+                for future in wait(in_flight).done:
+                    results.append(self._collect(future))
+        return results
+
+    @staticmethod
+    def _collect(future: Future) -> dict:
+        try:
+            result = future.result()
+        except Exception as e:
+            result = {"status": "failed", "error": str(e)}
+        logger.info(f"Worker result: {result}")
+        return result
+
+    def stop(self):
+        self.stop_event.set()
+
+
+def install_signal_handlers(worker: QueueWorker):
+    """First SIGINT/SIGTERM drains gracefully; a second one exits immediately."""
+    def handle(signum, frame):
+        if worker.stop_event.is_set():
+            logger.warning("Second signal: exiting now, leased URLs will requeue when their leases expire")
+            os._exit(1)
+        logger.info(f"Received {signal.Signals(signum).name}: finishing in-flight work (signal again to force)")
+        worker.stop()
+
+    signal.signal(signal.SIGINT, handle)
+    signal.signal(signal.SIGTERM, handle)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Drain the client queues continuously.")
+    parser.add_argument("--concurrency", type=int, default=None, help="Pipelines in flight (WORKER_CONCURRENCY)")
+    parser.add_argument("--interval", type=float, default=None, help="Seconds between polls when idle (WORKER_POLL_INTERVAL)")
+    parser.add_argument("--once", action="store_true", help="Exit when nothing is runnable instead of polling")
+    parser.add_argument("--no-jobs", action="store_true", help="Leave Telegram /go jobs to /api/run_jobs")
+    parser.add_argument("--add", action="append", default=[], metavar="CLIENT=URL",
+                        help="Queue a URL before starting (handy with KV_REST_API_URL=memory://)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    cfg = Config()
+    worker = QueueWorker(cfg, args.concurrency, args.interval, run_jobs=not args.no_jobs)
+    for item in args.add:
+        client, _, url = item.partition("=")
+        worker.queue.add_url(url, client)
+
+    install_signal_handlers(worker)
+    logger.info(f"Worker started: {worker.concurrency} concurrent, polling every {worker.poll_interval}s")
+    worker.run(once=args.once)
+    logger.info("Worker stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,9 +2,10 @@
 
 import os
 import logging
-import requests
 from typing import List, Dict, Optional
 
+from app import http_client
+
 logger = logging.getLogger(__name__)
 
 
@@ -31,7 +32,7 @@ def discover_channel_videos(channel_id: str, max_results: int = 5) -> List[Dict]
     try:
         # Get channel's uploads playlist
         channel_url = f"https://www.googleapis.com/youtube/v3/channels?part=contentDetails&id={channel_id}&key={api_key}"
-        resp = requests.get(channel_url, timeout=10)
+        resp = http_client.get(channel_url, timeout=10)
         
         if not resp.ok:
             logger.error(f"Channel API failed: {resp.status_code}")
@@ -46,7 +47,7 @@ def discover_channel_videos(channel_id: str, max_results: int = 5) -> List[Dict]
         
         # Get videos from uploads playlist
         playlist_url = f"https://www.googleapis.com/youtube/v3/playlistItems?part=snippet&playlistId={uploads_playlist_id}&maxResults={max_results}&key={api_key}"
-        resp = requests.get(playlist_url, timeout=10)
+        resp = http_client.get(playlist_url, timeout=10)
         
         if not resp.ok:
             logger.error(f"Playlist API failed: {resp.status_code}")
@@ -92,7 +93,7 @@ def discover_playlist_videos(playlist_id: str, max_results: int = 10) -> List[Di
     
     try:
         playlist_url = f"https://www.googleapis.com/youtube/v3/playlistItems?part=snippet&playlistId={playlist_id}&maxResults={max_results}&key={api_key}"
-        resp = requests.get(playlist_url, timeout=10)
+        resp = http_client.get(playlist_url, timeout=10)
         
         if not resp.ok:
             logger.error(f"Playlist API failed: {resp.status_code}")
@@ -136,7 +137,7 @@ def search_videos(query: str, max_results: int = 5) -> List[Dict]:
     
     try:
         search_url = f"https://www.googleapis.com/youtube/v3/search?part=snippet&type=video&q={query}&maxResults={max_results}&key={api_key}"
-        resp = requests.get(search_url, timeout=10)
+        resp = http_client.get(search_url, timeout=10)
         
         if not resp.ok:
             logger.error(f"Search API failed: {resp.status_code}")
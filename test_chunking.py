@@ -0,0 +1,85 @@
+"""Transcript chunking (app.chunking) and ContentPipeline.build_digest.
+
+Covers sentence- and word-boundary splitting, content at DIGEST_MAX_CHARS
+passing through untouched, one map pass for long content and the hard
+truncation after MAX_DIGEST_ROUNDS. Gemini is replaced by a stub, and caches
+use memory:// plus a temp dir, so no network or API keys are needed.
+
+    python test_chunking.py      (or: python -m pytest test_chunking.py)
+"""
+
+import tempfile
+import itertools
+
+from app.config import Config
+from app.chunking import MAX_DIGEST_ROUNDS, MIN_NOTE_WORDS, split_into_chunks, note_word_budget, join_notes
+from app.services import ContentPipeline
+
+_stores = itertools.count()
+
+
+def test_chunks_break_at_sentence_ends():
+    text = "One two three. Four five six! Seven eight nine? Ten."
+    assert split_into_chunks(text, 30) == ["One two three. Four five six!", "Seven eight nine? Ten."]
+
+
+def test_unpunctuated_captions_break_at_word_boundaries():
+    words = [f"word{i}" for i in range(200)]
+    chunks = split_into_chunks(" ".join(words), 50)
+    assert all(len(chunk) <= 50 for chunk in chunks)
+    assert " ".join(chunks).split() == words  # No word split, dropped or reordered
+
+
+def test_note_budget_and_headers():
+    assert note_word_budget(24000, 4) == (24000 // 4 - 40) // 6
+    assert note_word_budget(1000, 50) == MIN_NOTE_WORDS
+    assert join_notes(["a ", "b"]) == "[Notes, part 1 of 2]\na\n\n[Notes, part 2 of 2]\nb"
+
+
+def stub_pipeline(notes_for) -> ContentPipeline:
+    """Pipeline whose Gemini calls return notes_for(prompt); prompts are recorded on .prompts."""
+    cfg = Config(kv_url=f"memory://test-chunking-{next(_stores)}", cache_dir=tempfile.mkdtemp(),
+                 digest_max_chars=1000, summary_chunk_chars=400)
+    pipeline = ContentPipeline(cfg, "https://youtu.be/abc")
+    pipeline.prompts = []
+
+    def gemini(prompt: str, label: str) -> str:
+        pipeline.prompts.append(prompt)
+        return notes_for(prompt)
+    pipeline._gemini = gemini
+    return pipeline
+
+
+def test_digest_passes_short_content_through():
+    pipeline = stub_pipeline(lambda prompt: "notes")
+    content = "word " * 199 + "tails"  # Exactly DIGEST_MAX_CHARS (1000)
+    assert len(content) == 1000
+    assert pipeline.build_digest(content) == content
+    assert pipeline.prompts == []
+
+
+def test_digest_summarizes_long_content_in_one_pass():
+    pipeline = stub_pipeline(lambda prompt: f"notes on {prompt.split()[3]}")  # "part <i> of <n>"
+    digest = pipeline.build_digest("word " * 400)  # 2000 chars -> 5 chunks of <= 400
+
+    assert len(pipeline.prompts) == 5
+    assert digest.startswith("[Notes, part 1 of 5]\nnotes on 1")
+    assert digest.endswith("[Notes, part 5 of 5]\nnotes on 5")
+
+
+def test_digest_truncates_after_max_rounds():
+    pipeline = stub_pipeline(lambda prompt: "still far too long " * 30)  # Notes never shrink enough
+    content = "word " * 400
+    digest = pipeline.build_digest(content)
+
+    assert len(digest) == 1000
+    assert digest.startswith("[Notes, part 1 of")
+    rounds = sum(1 for prompt in pipeline.prompts if "part 1 of" in prompt)
+    assert rounds == MAX_DIGEST_ROUNDS
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+    print("OK")
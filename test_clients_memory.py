@@ -0,0 +1,59 @@
+"""ClientManager against the in-process KV (KV_REST_API_URL=memory://).
+
+Covers concurrent settings updates merging field by field (MERGE_SCRIPT) and
+the legacy single-blob roster migrating into per-client hash fields. No
+network needed.
+
+    python test_clients_memory.py      (or: python -m pytest test_clients_memory.py)
+"""
+
+import json
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+from app.config import Config
+from app.queue_manager import ClientManager
+
+_stores = itertools.count()
+
+
+def fresh_clients() -> ClientManager:
+    """Clients on their own empty memory:// store, read past the shared cache."""
+    return ClientManager(Config(kv_url=f"memory://test-clients-{next(_stores)}", client_cache_ttl=0))
+
+
+def test_concurrent_updates_keep_every_field():
+    clients = fresh_clients()
+    clients.add_client("drew", "acct-1")
+    updates = [{f"setting_{i}": i} for i in range(16)]
+    with ThreadPoolExecutor(max_workers=8) as pool:  # e.g. /style and /preview_mode at once
+        list(pool.map(lambda update: clients.update_settings("drew", update), updates))
+
+    stored = clients.get_client("drew")  # Read back from KV (cache TTL is 0)
+    assert stored == {"blotato_account_id": "acct-1", **{k: v for u in updates for k, v in u.items()}}
+
+
+def test_add_client_without_settings_keeps_existing_ones():
+    clients = fresh_clients()
+    clients.update_settings("drew", {"style": "story"})
+    clients.add_client("drew", "acct-2")
+    assert clients.get_client("drew") == {"style": "story", "blotato_account_id": "acct-2"}
+
+
+def test_legacy_roster_migrates_without_clobbering():
+    for _ in range(2):  # A second KV in the same process still gets migrated
+        clients = fresh_clients()
+        clients.redis.set(clients.LEGACY_KEY, json.dumps({
+            "drew": {"blotato_account_id": "old"}, "sam": {"blotato_account_id": "acct-sam"}}))
+        clients.redis.hset(clients.KEY, "drew", json.dumps({"blotato_account_id": "new"}))
+
+        assert clients.get_all() == {"drew": {"blotato_account_id": "new"},
+                                     "sam": {"blotato_account_id": "acct-sam"}}
+        assert not clients.redis.exists(clients.LEGACY_KEY)
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+    print("OK")
@@ -0,0 +1,39 @@
+"""Cold-start import regression check for the webhook entry point (api/index.py).
+
+Fails if a fresh `import api.index` takes longer than COLD_IMPORT_BUDGET_MS
+(default 500) or pulls a heavy SDK onto the cold path.
+
+    python test_cold_import.py      (or: python -m pytest test_cold_import.py)
+"""
+
+from app.import_profile import profile_imports, find, format_tree, DEFAULT_BUDGET_MS, DEFERRED_MODULES
+
+MODULE = "api.index"
+RUNS = 3  # Best of N, so one noisy run doesn't fail the check
+
+
+def test_cold_import_budget():
+    best_ms, best_nodes = None, None
+    for _ in range(RUNS):
+        nodes = profile_imports(MODULE)
+        total = find(nodes, MODULE).cumulative_ms
+        if best_ms is None or total < best_ms:
+            best_ms, best_nodes = total, nodes
+
+    print(f"{MODULE}: {best_ms:.1f} ms cold import (budget {DEFAULT_BUDGET_MS} ms)")
+    assert best_ms <= DEFAULT_BUDGET_MS, (
+        f"{MODULE} cold import took {best_ms:.1f} ms (budget {DEFAULT_BUDGET_MS} ms)\n"
+        f"{format_tree(best_nodes, min_ms=5)}"
+    )
+
+
+def test_heavy_sdks_stay_lazy():
+    nodes = profile_imports(MODULE)
+    loaded = [name for name in DEFERRED_MODULES if find(nodes, name)]
+    assert not loaded, f"Imported on cold start of {MODULE}: {', '.join(loaded)}"
+
+
+if __name__ == "__main__":
+    test_cold_import_budget()
+    test_heavy_sdks_stay_lazy()
+    print("OK")
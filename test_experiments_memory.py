@@ -0,0 +1,75 @@
+"""ExperimentTracker counters against the in-process KV (KV_REST_API_URL=memory://).
+
+Covers mark_winner counting a win once however often (or concurrently) it is
+called, and the backfill of legacy experiments (no index, no counters)
+producing the same counters as incremental logging. No network needed.
+
+    python test_experiments_memory.py      (or: python -m pytest test_experiments_memory.py)
+"""
+
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+from app.config import Config
+from app.queue_manager import ExperimentTracker
+
+VARIATIONS = ["bold|list|question|comment", "story|steps|question|share", "bold|steps|cta|comment"]
+_stores = itertools.count()
+
+
+def fresh_tracker() -> ExperimentTracker:
+    """A tracker on its own empty memory:// store."""
+    return ExperimentTracker(Config(kv_url=f"memory://test-experiments-{next(_stores)}"))
+
+
+def counters(stats: dict) -> dict:
+    return {key: stats[key] for key in ("total_experiments", "total_winners", "variation_counts",
+                                        "winner_counts", "dimension_counts")}
+
+
+def log_some(tracker: ExperimentTracker, count: int = 7):
+    for i in range(count):
+        tracker.log_experiment(f"post-{i}", VARIATIONS[i % len(VARIATIONS)], f"https://youtu.be/{i}", "text")
+
+
+def test_mark_winner_counts_once():
+    tracker = fresh_tracker()
+    log_some(tracker)
+    assert tracker.mark_winner("post-0")
+    assert tracker.mark_winner("post-0")  # Already a winner: still True, not counted again
+    with ThreadPoolExecutor(max_workers=8) as pool:  # A double-tapped button, many times over
+        assert all(pool.map(tracker.mark_winner, ["post-1"] * 8))
+    assert not tracker.mark_winner("post-missing")
+
+    stats = tracker.get_stats()
+    assert stats["total_winners"] == 2
+    assert stats["winner_counts"] == {VARIATIONS[0]: 1, VARIATIONS[1]: 1}
+    assert stats["dimension_counts"]["hook:bold"]["wins"] == 1
+    assert len(tracker.get_winners()) == 2
+
+
+def test_backfill_matches_incremental_counters():
+    live = fresh_tracker()
+    log_some(live)
+    live.mark_winner("post-1")
+    live.mark_winner("post-3")
+
+    # The same experiments as a deployment that predates the index and counters left them
+    legacy = fresh_tracker()
+    legacy.redis.hset(legacy.EXPERIMENTS_KEY, values=live.redis.hgetall(live.EXPERIMENTS_KEY))
+
+    stats = legacy.get_stats()
+    assert counters(stats) == counters(live.get_stats())
+    assert stats["dimension_counts"]["hook:bold"] == {"experiments": 5, "wins": 1}
+    assert legacy.redis.zcard(legacy.INDEX_KEY) == 7
+
+    legacy.log_experiment("post-new", VARIATIONS[0], "https://youtu.be/new", "text")
+    stats = legacy.get_stats()  # Counted on top of the backfill, which doesn't run again
+    assert (stats["total_experiments"], stats["stored_experiments"]) == (8, 8)
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+    print("OK")
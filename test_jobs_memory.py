@@ -0,0 +1,127 @@
+"""Telegram /go jobs (app.jobs) against the in-process KV (KV_REST_API_URL=memory://).
+
+Covers the enqueue -> run -> ack -> lock release path, /stop cancelling queued
+jobs and run_pending_jobs stopping when its time budget runs out. The pipeline
+and Telegram are replaced by stand-ins, so no network or API keys are needed.
+
+    python test_jobs_memory.py      (or: python -m pytest test_jobs_memory.py)
+"""
+
+import time
+import itertools
+from unittest import mock
+
+from app.config import Config
+from app.queue_manager import SimpleQueue
+from app.jobs import JobQueue, processing_lock_key, run_pending_jobs
+
+CHAT = "42"
+_stores = itertools.count()
+
+
+def fresh_config(**overrides) -> Config:
+    """Config on its own empty memory:// store."""
+    return Config(kv_url=f"memory://test-jobs-{next(_stores)}", **overrides)
+
+
+class FakePipeline:
+    """ContentPipeline stand-in: records the URLs it ran, optionally slowly."""
+    runs = []
+    seconds = 0.0
+
+    def __init__(self, cfg, url, **kwargs):
+        self.url = url
+
+    def run_all(self, skip_post: bool = False) -> dict:
+        FakePipeline.runs.append(self.url)
+        time.sleep(FakePipeline.seconds)
+        return {"post_id": f"post-{len(FakePipeline.runs)}", "post_text": f"Post for {self.url}",
+                "image_url": "", "variation": "h|s|c|t", "propensity": {"hook": 0.5}}
+
+
+def patched(seconds: float = 0.0):
+    """Swap in FakePipeline and capture Telegram messages (returned list)."""
+    FakePipeline.runs, FakePipeline.seconds = [], seconds
+    sent = []
+    patches = [
+        mock.patch("app.services.ContentPipeline", FakePipeline),
+        mock.patch("app.jobs.send_telegram", lambda chat_id, text, cfg, **kw: sent.append(text)),
+    ]
+    for p in patches:
+        p.start()
+    return sent, patches
+
+
+def unpatch(patches):
+    for p in patches:
+        p.stop()
+
+
+def test_preview_job_acks_url_and_releases_lock():
+    cfg = fresh_config()
+    q, jobs = SimpleQueue(cfg), JobQueue(cfg)
+    q.add_url("https://youtu.be/a", "drew")
+    q.add_url("https://youtu.be/b", "drew")
+    q.redis.setex(processing_lock_key("drew"), 600, "1")  # Taken by /go
+    jobs.enqueue("preview", client="drew", chat_id=CHAT)
+
+    sent, patches = patched()
+    try:
+        results = run_pending_jobs(cfg)
+    finally:
+        unpatch(patches)
+
+    assert [r["status"] for r in results] == ["previewed"]
+    assert FakePipeline.runs == ["https://youtu.be/a"]
+    assert any("PREVIEW for drew" in text for text in sent)
+    assert q.nack("https://youtu.be/a", "drew") == "missing"  # Acked once the preview was stored
+    assert q.get_urls("drew") == ["https://youtu.be/b"]
+    assert q.redis.scan(0, match="preview:drew:*")[1]
+    assert not q.redis.get(processing_lock_key("drew"))
+    assert jobs.count() == 0
+
+
+def test_cancel_pending_skips_jobs_queued_before_stop():
+    cfg = fresh_config(batch_concurrency=1)  # One at a time, in queue order
+    q, jobs = SimpleQueue(cfg), JobQueue(cfg)
+    q.add_url("https://youtu.be/a", "drew")
+    jobs.enqueue("preview", client="drew", chat_id=CHAT)
+    jobs.enqueue("preview", client="sam", chat_id=CHAT)  # Another client's job is left alone
+    jobs.cancel_pending("drew")  # /stop
+    time.sleep(0.01)
+    jobs.enqueue("preview", client="drew", chat_id=CHAT)  # /go again after /stop
+
+    _, patches = patched()
+    try:
+        results = run_pending_jobs(cfg)
+    finally:
+        unpatch(patches)
+
+    assert [(r["client"], r["status"]) for r in results] == [
+        ("drew", "cancelled"), ("sam", "empty"), ("drew", "previewed")]
+    assert FakePipeline.runs == ["https://youtu.be/a"]
+
+
+def test_run_pending_jobs_stops_when_budget_runs_out():
+    cfg = fresh_config(jobs_run_estimate=0.2, batch_concurrency=1)
+    q, jobs = SimpleQueue(cfg), JobQueue(cfg)
+    for client in ("drew", "sam", "kim"):
+        q.add_url(f"https://youtu.be/{client}", client)
+        jobs.enqueue("preview", client=client, chat_id=CHAT)
+
+    _, patches = patched(seconds=0.15)
+    try:
+        results = run_pending_jobs(cfg, time_budget=0.3)  # Room for one run, not a second
+    finally:
+        unpatch(patches)
+
+    assert [r["client"] for r in results] == ["drew"]
+    assert jobs.count() == 2  # Left for the next invocation
+    assert q.get_urls("sam") == ["https://youtu.be/sam"]
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+    print("OK")
@@ -0,0 +1,130 @@
+"""The app's Lua scripts against their MemoryRedis equivalents (KV_REST_API_URL=memory://).
+
+Every *_SCRIPT in app.queue_manager must have a Python equivalent, and each one
+is run here through MemoryRedis.eval with the same keys and arguments the app
+passes, so the stand-in can't silently drift from the scripts it replaces.
+
+    python test_memory_kv.py      (or: python -m pytest test_memory_kv.py)
+"""
+
+import json
+import itertools
+
+from app import queue_manager
+from app.memory_kv import MemoryRedis, get_memory_redis
+from app.queue_manager import SimpleQueue, ClientManager, ExperimentTracker
+
+_stores = itertools.count()
+
+
+def fresh_redis() -> MemoryRedis:
+    """An empty store with the app's scripts registered."""
+    return get_memory_redis(f"memory://test-kv-{next(_stores)}")
+
+
+def production_scripts():
+    for cls in vars(queue_manager).values():
+        if isinstance(cls, type) and cls.__module__ == queue_manager.__name__:
+            for name, value in vars(cls).items():
+                if name.endswith("_SCRIPT"):
+                    yield f"{cls.__name__}.{name}", value
+
+
+def test_every_script_has_an_equivalent():
+    scripts = dict(production_scripts())
+    assert {"SimpleQueue.POP_SCRIPT", "SimpleQueue.NACK_SCRIPT", "ClientManager.MERGE_SCRIPT",
+            "ExperimentTracker.WIN_SCRIPT"} <= set(scripts)
+    fresh_redis()
+    missing = [name for name, script in scripts.items() if script not in MemoryRedis.SCRIPTS]
+    assert missing == []
+
+
+def test_unknown_script_names_its_hash():
+    try:
+        fresh_redis().eval("return 1")
+    except ValueError as e:
+        assert "e0e1f9fabfc9d4800c877a703b823ac0578ff8db" in str(e)
+    else:
+        raise AssertionError("unknown script ran")
+
+
+LEASE_KEYS = ["queue", "inflight", "attempts", "dead"]
+
+
+def test_pop_script_requeues_expired_then_leases_head():
+    r = fresh_redis()
+    r.zadd("queue", {"a": 1, "b": 2})
+    r.zadd("inflight", {"old": 5, "spent": 5})
+    r.hset("attempts", values={"old": 1, "spent": 3})
+
+    url = r.eval(SimpleQueue.POP_SCRIPT, keys=LEASE_KEYS, args=["10", "70", "3", "now"])
+    assert url == "a"
+    assert r.zrange("inflight", 0, -1, withscores=True) == [("a", 70.0)]
+    assert r.zrange("queue", 0, -1) == ["b", "old"]  # Expired lease back at the tail (score = now)
+    assert r.hgetall("attempts") == {"old": "1", "a": "1"}
+    assert json.loads(r.lrange("dead", 0, -1)[0]) == {
+        "url": "spent", "attempts": 3, "error": "lease expired", "dead_at": "now"}
+
+    r.delete("queue")
+    assert r.eval(SimpleQueue.POP_SCRIPT, keys=LEASE_KEYS, args=["10", "70", "3", "now"]) is None
+
+
+def test_nack_script_requeues_dead_letters_or_misses():
+    r = fresh_redis()
+    r.zadd("inflight", {"a": 50, "b": 50})
+    r.hset("attempts", values={"a": 1, "b": 3})
+    args = lambda url: [url, "10", "3", "now", "boom"]
+    assert r.eval(SimpleQueue.NACK_SCRIPT, keys=LEASE_KEYS, args=args("a")) == "requeued"
+    assert r.eval(SimpleQueue.NACK_SCRIPT, keys=LEASE_KEYS, args=args("b")) == "dead"
+    assert r.eval(SimpleQueue.NACK_SCRIPT, keys=LEASE_KEYS, args=args("a")) == "missing"
+    assert r.zrange("queue", 0, -1) == ["a"]
+    assert r.hgetall("attempts") == {"a": "1"}
+    assert json.loads(r.lrange("dead", 0, -1)[0])["error"] == "boom"
+
+
+def test_merge_script_updates_fields_in_place():
+    r = fresh_redis()
+    merged = r.eval(ClientManager.MERGE_SCRIPT, keys=["clients"], args=["drew", json.dumps({"style": "story"})])
+    assert json.loads(merged) == {"style": "story"}
+    r.eval(ClientManager.MERGE_SCRIPT, keys=["clients"], args=["drew", json.dumps({"hours": [9]})])
+    assert json.loads(r.hget("clients", "drew")) == {"style": "story", "hours": [9]}
+
+
+def test_win_script_counts_a_win_once():
+    r = fresh_redis()
+    r.hset("experiments", "p1", json.dumps({"post_id": "p1", "variation": "h|s|c|t", "is_winner": False}))
+    keys = ["experiments", "stats", "winners"]
+    args = lambda post_id: [post_id, "now", "50", *ExperimentTracker.DIMENSIONS]
+
+    record = json.loads(r.eval(ExperimentTracker.WIN_SCRIPT, keys=keys, args=args("p1")))
+    assert record["is_winner"] and record["won_at"] == "now"
+    assert r.eval(ExperimentTracker.WIN_SCRIPT, keys=keys, args=args("p1")) == "already"
+    assert r.eval(ExperimentTracker.WIN_SCRIPT, keys=keys, args=args("nope")) == "missing"
+    assert r.hgetall("stats") == {"win:total": "1", "win:h|s|c|t": "1", "win:hook:h": "1",
+                                  "win:structure:s": "1", "win:closer:c": "1", "win:cta:t": "1"}
+    assert r.llen("winners") == 1
+
+
+def test_backfill_stats_script_only_seeds_missing_counters():
+    r = fresh_redis()
+    assert r.eval(ExperimentTracker.BACKFILL_STATS_SCRIPT, keys=["stats"], args=["exp:total", "2"]) == 1
+    assert r.eval(ExperimentTracker.BACKFILL_STATS_SCRIPT, keys=["stats"], args=["exp:total", "9"]) == 0
+    assert r.hgetall("stats") == {"exp:total": "2"}
+
+
+def test_evict_script_trims_index_and_hash_together():
+    r = fresh_redis()
+    for rank, post_id in enumerate("abcd"):
+        r.hset("experiments", post_id, "{}")
+        r.zadd("index", {post_id: rank})
+    assert r.eval(ExperimentTracker.EVICT_SCRIPT, keys=["experiments", "index"], args=["2"]) == 2
+    assert r.zrange("index", 0, -1) == ["c", "d"]
+    assert sorted(r.hkeys("experiments")) == ["c", "d"]
+    assert r.eval(ExperimentTracker.EVICT_SCRIPT, keys=["experiments", "index"], args=["2"]) == 0
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+    print("OK")
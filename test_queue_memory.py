@@ -0,0 +1,114 @@
+"""SimpleQueue lease lifecycle against the in-process KV (KV_REST_API_URL=memory://).
+
+Covers leasing, ack, nack/requeue, dead-lettering after MAX_ATTEMPTS, lease
+expiry, lease extension, removal of leased URLs and the legacy-queue migration.
+No network needed.
+
+    python test_queue_memory.py      (or: python -m pytest test_queue_memory.py)
+"""
+
+import time
+import itertools
+
+from app.config import Config
+from app.queue_manager import SimpleQueue
+
+CLIENT = "drew"
+_stores = itertools.count()
+
+
+def fresh_queue() -> SimpleQueue:
+    """A queue on its own empty memory:// store."""
+    return SimpleQueue(Config(kv_url=f"memory://test-queue-{next(_stores)}"))
+
+
+def test_pop_leases_in_order_and_ack_finishes():
+    q = fresh_queue()
+    for url in ("a", "b", "c"):
+        q.add_url(url, CLIENT)
+    q.add_url("a", CLIENT)  # Duplicate keeps its place
+
+    assert q.pop_next(CLIENT) == "a"
+    assert q.get_urls(CLIENT) == ["b", "c"]
+    q.ack("a", CLIENT)
+    assert q.pop_next(CLIENT) == "b"
+    q.mark_done("b", CLIENT)
+    assert [item["url"] for item in q.get_history(CLIENT)] == ["b"]
+    assert q.nack("a", CLIENT, "late") == "missing"  # Acked leases can't be released twice
+
+
+def test_nack_requeues_then_dead_letters():
+    q = fresh_queue()
+    q.add_url("a", CLIENT)
+    for attempt in range(1, q.MAX_ATTEMPTS + 1):
+        assert q.pop_next(CLIENT) == "a"
+        outcome = q.nack("a", CLIENT, f"boom {attempt}")
+        assert outcome == ("dead" if attempt == q.MAX_ATTEMPTS else "requeued")
+
+    assert q.get_urls(CLIENT) == []
+    dead = q.get_dead(CLIENT)
+    assert [(d["url"], d["attempts"], d["error"]) for d in dead] == [("a", q.MAX_ATTEMPTS, f"boom {q.MAX_ATTEMPTS}")]
+    assert q.retry_dead(CLIENT) == 1
+    assert q.get_urls(CLIENT) == ["a"] and q.get_dead(CLIENT) == []
+
+
+def test_expired_lease_requeues_on_next_pop():
+    q = fresh_queue()
+    q.add_url("a", CLIENT)
+    assert q.pop_next(CLIENT, lease_seconds=0.05) == "a"
+    assert q.pop_next(CLIENT) is None  # Still leased
+    time.sleep(0.1)
+    assert q.pop_next(CLIENT) == "a"  # Expired lease went back to the queue first
+
+
+def test_expired_lease_dead_letters_after_max_attempts():
+    q = fresh_queue()
+    q.add_url("a", CLIENT)
+    for _ in range(q.MAX_ATTEMPTS):
+        assert q.pop_next(CLIENT, lease_seconds=0.01) == "a"
+        time.sleep(0.03)
+    assert q.pop_next(CLIENT) is None
+    assert q.get_dead(CLIENT)[0]["error"] == "lease expired"
+
+
+def test_extend_lease_keeps_url_leased():
+    q = fresh_queue()
+    q.add_url("a", CLIENT)
+    assert q.pop_next(CLIENT, lease_seconds=0.05) == "a"
+    assert q.extend_lease("a", CLIENT, lease_seconds=60)
+    time.sleep(0.1)
+    assert q.pop_next(CLIENT) is None  # Not requeued: the lease was extended
+    q.ack("a", CLIENT)
+    assert not q.extend_lease("a", CLIENT)
+
+
+def test_remove_and_clear_drop_leased_urls():
+    q = fresh_queue()
+    for url in ("a", "b", "c"):
+        q.add_url(url, CLIENT)
+    assert q.pop_next(CLIENT) == "a"
+    assert q.remove_url("a", CLIENT)
+    assert q.nack("a", CLIENT, "failed") == "missing"  # A removed lease is not requeued
+    assert q.get_urls(CLIENT) == ["b", "c"]
+
+    assert q.pop_next(CLIENT) == "b"
+    q.clear(CLIENT)
+    assert q.get_urls(CLIENT) == []
+    assert q.nack("b", CLIENT, "failed") == "missing"
+    assert q.pop_next(CLIENT) is None
+
+
+def test_legacy_queue_migrates_on_every_store():
+    for _ in range(2):  # A second KV in the same process still gets migrated
+        q = fresh_queue()
+        q.redis.set(f"{q.LEGACY_KEY}:{CLIENT}", "a\nb\n")
+        q.add_url("c", CLIENT)
+        assert q.get_urls(CLIENT) == ["a", "b", "c"]  # Legacy items keep their place ahead of new ones
+        assert not q.redis.exists(f"{q.LEGACY_KEY}:{CLIENT}")
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+    print("OK")
@@ -0,0 +1,81 @@
+"""QueueWorker (app.worker) against the in-process KV (KV_REST_API_URL=memory://).
+
+Covers a scheduled run marking its URL done, and a failing pipeline giving its
+claimed daily posting slot back and returning the URL to the queue. The
+pipeline is replaced by a stand-in, so no network or API keys are needed.
+
+    python test_worker_memory.py      (or: python -m pytest test_worker_memory.py)
+"""
+
+import itertools
+from datetime import datetime, timedelta
+from unittest import mock
+
+from app.config import Config
+from app.queue_manager import CHICAGO_TZ
+from app.worker import QueueWorker
+
+_stores = itertools.count()
+
+
+def fresh_worker() -> QueueWorker:
+    """Worker on its own empty memory:// store, without Telegram jobs."""
+    return QueueWorker(Config(kv_url=f"memory://test-worker-{next(_stores)}"), run_jobs=False)
+
+
+class FakePipeline:
+    """ContentPipeline stand-in: generation fails when `error` is set; posts are recorded."""
+    error = None
+    posted = []
+
+    def __init__(self, cfg, url, **kwargs):
+        self.url = url
+
+    def run_all(self, skip_post: bool = False) -> dict:
+        if FakePipeline.error:
+            raise RuntimeError(FakePipeline.error)
+        return {"post_text": f"Post for {self.url}", "image_url": ""}
+
+    def post_blotato(self, text: str, image_url: str, scheduled_time: str = None):
+        FakePipeline.posted.append((self.url, scheduled_time))
+
+
+def run_leased(worker: QueueWorker, client: str, error: str = None) -> dict:
+    """Claim a slot and lease the client's next URL as next_task() would, then process it."""
+    FakePipeline.error, FakePipeline.posted = error, []
+    worker.tracker.increment_daily_count()
+    url = worker.queue.pop_next(client)
+    slot = datetime.now(CHICAGO_TZ) + timedelta(hours=1)
+    with mock.patch("app.services.ContentPipeline", FakePipeline):
+        return worker.execute(("url", client, url, slot))
+
+
+def test_scheduled_run_marks_url_done():
+    worker = fresh_worker()
+    worker.queue.add_url("https://youtu.be/a", "drew")
+
+    result = run_leased(worker, "drew")
+
+    assert result["status"] == "scheduled"
+    assert [url for url, scheduled in FakePipeline.posted if scheduled] == ["https://youtu.be/a"]
+    assert worker.tracker.get_daily_count() == 1
+    assert [item["url"] for item in worker.queue.get_history("drew")] == ["https://youtu.be/a"]
+
+
+def test_failed_pipeline_releases_daily_slot():
+    worker = fresh_worker()
+    worker.queue.add_url("https://youtu.be/a", "drew")
+
+    result = run_leased(worker, "drew", error="Gemini quota")
+
+    assert (result["status"], result["queue"]) == ("failed", "requeued")
+    assert FakePipeline.posted == []
+    assert worker.tracker.get_daily_count() == 0  # The slot goes to the next item
+    assert worker.queue.get_urls("drew") == ["https://youtu.be/a"]
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+    print("OK")